@@ -0,0 +1,105 @@
+# benchmarks/_pages.py
+"""Synthetic but realistically shaped VNDB response pages for the benchmarks."""
+import random
+from typing import Any, Dict, List
+
+LANGS = ["ja", "en", "zh-Hans", "ko", "ru", "de", "fr", "es"]
+PLATFORMS = ["win", "lin", "mac", "and", "ios", "swi", "ps4", "psv"]
+ROLES = ["scenario", "director", "chardesign", "art", "music", "songs"]
+
+
+def _image(rng: random.Random, prefix: str, n: int) -> Dict[str, Any]:
+    return {
+        "id": f"{prefix}{n}",
+        "url": f"https://t.vndb.org/{prefix}/{n % 100:02d}/{n}.jpg",
+        "dims": [rng.randint(200, 1920), rng.randint(200, 1080)],
+        "sexual": round(rng.random() * 2, 2),
+        "violence": round(rng.random() * 2, 2),
+        "votecount": rng.randint(0, 50),
+        "thumbnail": f"https://t.vndb.org/{prefix}.t/{n % 100:02d}/{n}.jpg",
+    }
+
+
+def vn_item(rng: random.Random, n: int) -> Dict[str, Any]:
+    """One /vn result with titles, tags, staff, va and screenshots selected."""
+    return {
+        "id": f"v{n}",
+        "title": f"Visual Novel {n}",
+        "alttitle": f"ビジュアルノベル {n}",
+        "titles": [
+            {"lang": lang, "title": f"Title {n} ({lang})", "latin": None, "official": True, "main": i == 0}
+            for i, lang in enumerate(rng.sample(LANGS, 3))
+        ],
+        "aliases": [f"VN{n}", f"vn-{n}"],
+        "olang": "ja",
+        "devstatus": 0,
+        "released": f"20{rng.randint(0, 24):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "languages": rng.sample(LANGS, 4),
+        "platforms": rng.sample(PLATFORMS, 3),
+        "image": _image(rng, "cv", n),
+        "length": rng.randint(1, 5),
+        "length_minutes": rng.randint(60, 6000),
+        "length_votes": rng.randint(0, 500),
+        "description": "A story about " + " ".join(f"word{rng.randint(0, 999)}" for _ in range(80)),
+        "average": round(rng.uniform(10, 100), 2),
+        "rating": round(rng.uniform(10, 100), 2),
+        "votecount": rng.randint(0, 20000),
+        "screenshots": [_image(rng, "sf", n * 10 + i) for i in range(6)],
+        "tags": [
+            {"id": f"g{rng.randint(1, 3000)}", "name": f"Tag {i}", "category": "cont",
+             "rating": round(rng.uniform(0, 3), 1), "spoiler": rng.randint(0, 2), "lie": False}
+            for i in range(25)
+        ],
+        "staff": [
+            {"id": f"s{rng.randint(1, 30000)}", "name": f"Staff {i}", "original": None,
+             "role": rng.choice(ROLES), "note": None, "eid": None}
+            for i in range(12)
+        ],
+        "va": [
+            {"note": None,
+             "staff": {"id": f"s{rng.randint(1, 30000)}", "name": f"Seiyuu {i}"},
+             "character": {"id": f"c{rng.randint(1, 100000)}", "name": f"Character {i}"}}
+            for i in range(10)
+        ],
+    }
+
+
+def release_item(rng: random.Random, n: int) -> Dict[str, Any]:
+    """One /release result with languages, media, vns, producers and images selected."""
+    return {
+        "id": f"r{n}",
+        "title": f"Release {n}",
+        "alttitle": None,
+        "languages": [
+            {"lang": lang, "title": f"Release {n}", "latin": None, "mtl": False, "main": i == 0}
+            for i, lang in enumerate(rng.sample(LANGS, 2))
+        ],
+        "platforms": rng.sample(PLATFORMS, 2),
+        "media": [{"medium": "dvd", "qty": 1}],
+        "vns": [{"id": f"v{n}", "rtype": "complete", "title": f"Visual Novel {n}"}],
+        "producers": [{"id": f"p{rng.randint(1, 20000)}", "developer": True, "publisher": False, "name": "Studio"}],
+        "images": [dict(_image(rng, "cv", n), type="pkgfront", vn=None, languages=None, photo=False,
+                        thumbnail_dims=[256, 362])],
+        "released": "2020-01-01",
+        "minage": 18,
+        "patch": False,
+        "freeware": False,
+        "uncensored": None,
+        "official": True,
+        "has_ero": True,
+        "resolution": [1280, 720],
+        "engine": "KiriKiri",
+        "voiced": 4,
+        "notes": None,
+        "gtin": "4935560001234",
+        "catalog": "ABC-0001",
+        "extlinks": [{"url": "https://example.com", "label": "Official website", "name": "website", "id": None}],
+    }
+
+
+def page(kind: str = "vn", results: int = 100, seed: int = 0) -> Dict[str, Any]:
+    """A full query response page of `results` items."""
+    rng = random.Random(seed)
+    make = vn_item if kind == "vn" else release_item
+    items: List[Dict[str, Any]] = [make(rng, i + 1) for i in range(results)]
+    return {"results": items, "more": True}
@@ -0,0 +1,47 @@
+# benchmarks/bench_decode.py
+"""
+Compares the old response decoding in `_fetch_api` (``resp.text()`` followed by
+``resp.json()``, i.e. two UTF-8 decodes and a stdlib ``json`` parse) with the
+current single pass (``resp.read()`` + ``orjson.loads`` on the raw bytes).
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/bench_decode.py
+"""
+import json
+import timeit
+import tracemalloc
+
+import orjson
+
+from _pages import page
+
+
+def old_decode(body: bytes):
+    text = body.decode("utf-8")  # await resp.text()
+    return json.loads(body.decode("utf-8")), text  # await resp.json()
+
+
+def new_decode(body: bytes):
+    return orjson.loads(body)
+
+
+def peak_memory(func, body: bytes) -> int:
+    tracemalloc.start()
+    func(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    body = orjson.dumps(page("vn", results=100))
+    print(f"/vn page: 100 results, {len(body) / 1024:.0f} KiB")
+    number = 50
+    for name, func in (("text + json", old_decode), ("orjson bytes", new_decode)):
+        seconds = min(timeit.repeat(lambda: func(body), number=number, repeat=5)) / number
+        print(f"  {name:<14} {seconds * 1000:8.3f} ms/page   peak {peak_memory(func, body) / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
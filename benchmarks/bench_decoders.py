@@ -0,0 +1,66 @@
+# benchmarks/bench_decoders.py
+"""
+Compares ``dacite.from_dict`` with the precompiled decoders from
+``veedb.decoders`` on realistic 100-item /vn and /release pages, and on a
+narrow ``fields`` selection where the selection-specialised decoder applies.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/bench_decoders.py
+"""
+import timeit
+
+from dacite import from_dict
+
+from veedb.apitypes.entities import VN, Release
+from veedb.decoders import dacite_config, get_decoder
+
+from _pages import page
+
+NARROW_FIELDS = "id, title, rating, released"
+
+
+def narrow() -> None:
+    keys = [name.strip() for name in NARROW_FIELDS.split(",")]
+    items = [{key: item[key] for key in keys} for item in page("vn", results=100)["results"]]
+    generic = get_decoder(VN)
+    selected = get_decoder(VN, NARROW_FIELDS)
+    assert [selected(item) for item in items] == [generic(item) for item in items]
+
+    number = 50
+    timings = {}
+    for label, run in (
+        ("dacite.from_dict", lambda: [from_dict(data_class=VN, data=item, config=dacite_config) for item in items]),
+        ("compiled decoder", lambda: [generic(item) for item in items]),
+        ("selection decoder", lambda: [selected(item) for item in items]),
+    ):
+        timings[label] = min(timeit.repeat(run, number=number, repeat=5)) / number
+    print(f"/vn page (100 items, fields={NARROW_FIELDS!r})")
+    for label, seconds in timings.items():
+        print(f"  {label:<18}{seconds * 1000:8.3f} ms/page   ({timings['dacite.from_dict'] / seconds:.1f}x)")
+
+
+def main() -> None:
+    number = 5
+    for kind, data_class in (("vn", VN), ("release", Release)):
+        items = page(kind, results=100)["results"]
+        decode = get_decoder(data_class)
+        assert [decode(item) for item in items] == [
+            from_dict(data_class=data_class, data=item, config=dacite_config) for item in items
+        ]
+
+        dacite_seconds = min(timeit.repeat(
+            lambda: [from_dict(data_class=data_class, data=item, config=dacite_config) for item in items],
+            number=number, repeat=5,
+        )) / number
+        compiled_seconds = min(timeit.repeat(
+            lambda: [decode(item) for item in items], number=number, repeat=5,
+        )) / number
+        print(f"/{kind} page (100 items)")
+        print(f"  dacite.from_dict  {dacite_seconds * 1000:8.2f} ms/page")
+        print(f"  compiled decoder  {compiled_seconds * 1000:8.2f} ms/page   ({dacite_seconds / compiled_seconds:.1f}x)")
+    narrow()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_fanout.py
+"""
+Wall time of ``query_all_pages`` for a 40-page /release scan, serial versus
+concurrent page fan-out, against a fake endpoint with a fixed round trip.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/bench_fanout.py
+"""
+import asyncio
+import time
+
+import veedb.client
+from veedb import VNDB, QueryRequest
+
+PAGES = 40
+PER_PAGE = 100
+RTT = 0.05  # seconds per request
+
+
+async def fake_fetch_api(session, method, url, token=None, json_payload=None, params=None, raw=False):
+    await asyncio.sleep(RTT)
+    page = json_payload["page"]
+    start = (page - 1) * PER_PAGE
+    data = {"results": [{"id": f"r{n}"} for n in range(start + 1, start + PER_PAGE + 1)], "more": page < PAGES}
+    if json_payload.get("count"):
+        data["count"] = PAGES * PER_PAGE
+    return data
+
+
+async def main() -> None:
+    veedb.client._fetch_api = fake_fetch_api
+    async with VNDB(rate_limit_requests=None, max_concurrent_requests=8) as client:
+        query = QueryRequest(fields="id", results=PER_PAGE)
+        print(f"/release scan, {PAGES} pages, {RTT * 1000:.0f} ms round trip")
+        for concurrency in (None, 4, 8):
+            started = time.perf_counter()
+            results = await client.release.query_all_pages(query, raw=True, concurrency=concurrency)
+            elapsed = time.perf_counter() - started
+            assert len(results) == PAGES * PER_PAGE
+            label = "serial" if concurrency is None else f"concurrency={concurrency}"
+            print(f"  {label:<15}{elapsed:8.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+# benchmarks/bench_schema.py
+"""
+Cold-start cost of loading the schema: parsing ``schema.json`` and
+extracting every endpoint's field list, against loading the binary
+snapshot ``SchemaCache`` writes next to it.
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/bench_schema.py
+"""
+import os
+import tempfile
+import timeit
+
+import orjson
+
+from veedb.schema_validator import SchemaCache, extract_fields
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "schema.example.json")
+
+
+def main() -> None:
+    with open(SCHEMA_PATH, "rb") as f:
+        schema = orjson.loads(f.read())
+    with tempfile.TemporaryDirectory() as cache_dir:
+        SchemaCache(cache_dir=cache_dir).save_schema(schema)
+        json_path = os.path.join(cache_dir, "schema.json")
+
+        def from_json() -> None:
+            with open(json_path, "rb") as f:
+                loaded = orjson.loads(f.read())
+            for endpoint in loaded["api_fields"]:
+                extract_fields(loaded, endpoint)
+
+        def from_snapshot() -> None:
+            SchemaCache(cache_dir=cache_dir)._read_from_disk()
+
+        number = 200
+        json_seconds = min(timeit.repeat(from_json, number=number, repeat=5)) / number
+        snapshot_seconds = min(timeit.repeat(from_snapshot, number=number, repeat=5)) / number
+    print(f"schema load ({os.path.getsize(SCHEMA_PATH)} bytes, {len(schema['api_fields'])} endpoints)")
+    print(f"  json + extract_fields {json_seconds * 1000:8.3f} ms")
+    print(f"  snapshot              {snapshot_seconds * 1000:8.3f} ms   ({json_seconds / snapshot_seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
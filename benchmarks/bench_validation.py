@@ -0,0 +1,95 @@
+# benchmarks/bench_validation.py
+"""
+Filter validation on large generated `and`/`or` trees over the /vn fields
+of the example schema: the previous list scan plus `difflib` over every
+field, against the `FieldIndex` lookups `FilterValidator` now uses, and
+against its opt-in memo of verdicts per filter shape (the same tree with
+other values).
+
+Run with::
+
+    PYTHONPATH=src python benchmarks/bench_validation.py
+"""
+import asyncio
+import os
+import random
+import tempfile
+import timeit
+from difflib import get_close_matches
+from typing import Any, List
+
+import orjson
+
+from veedb.schema_validator import FilterValidator, SchemaCache, extract_fields
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "schema.example.json")
+
+
+def filter_tree(rng: random.Random, fields: List[str], depth: int, fanout: int, typo_rate: float) -> Any:
+    if depth == 0:
+        field = rng.choice(fields)
+        if rng.random() < typo_rate:
+            position = rng.randrange(len(field))
+            field = field[:position] + field[position + 1:]
+        return [field, "=", "x"]
+    return [rng.choice(("and", "or"))] + [
+        filter_tree(rng, fields, depth - 1, fanout, typo_rate) for _ in range(fanout)
+    ]
+
+
+def baseline(filters: Any, available_fields: List[str]) -> int:
+    """The validation loop before the index: list membership and difflib over all fields."""
+    errors = 0
+
+    def walk(node: Any) -> None:
+        nonlocal errors
+        if node[0] in ("and", "or"):
+            for child in node[1:]:
+                walk(child)
+        elif node[0] not in available_fields:
+            errors += 1
+            get_close_matches(node[0], available_fields, n=3, cutoff=0.7)
+
+    walk(filters)
+    return errors
+
+
+def main() -> None:
+    with open(SCHEMA_PATH, "rb") as f:
+        schema = orjson.loads(f.read())
+    fields = extract_fields(schema, "/vn")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = SchemaCache(cache_dir=cache_dir)
+        cache.save_schema(schema)
+        validator = FilterValidator(cache, memo_size=0)
+        memoised = FilterValidator(cache, memo_size=1024)
+        loop = asyncio.new_event_loop()
+        for depth, fanout, typo_rate in ((4, 4, 0.0), (4, 4, 0.05), (6, 4, 0.05)):
+            filters = filter_tree(random.Random(depth), fields, depth, fanout, typo_rate)
+            result = loop.run_until_complete(validator.validate_filters("/vn", filters, None))
+            assert len(result["errors"]) == baseline(filters, fields)
+
+            number = 5
+            before = min(timeit.repeat(lambda: baseline(filters, fields), number=number, repeat=3)) / number
+            after = min(timeit.repeat(
+                lambda: loop.run_until_complete(validator.validate_filters("/vn", filters, None)),
+                number=number, repeat=3,
+            )) / number
+            print(f"{fanout ** depth} predicates, {typo_rate:.0%} typos ({len(fields)} /vn fields)")
+            print(f"  list + difflib  {before * 1000:9.2f} ms")
+            print(f"  FieldIndex      {after * 1000:9.2f} ms   ({before / after:.1f}x)")
+
+            loop.run_until_complete(memoised.validate_filters("/vn", filters, None))
+            other_values = filter_tree(random.Random(depth), fields, depth, fanout, typo_rate)
+            other_values = orjson.loads(orjson.dumps(other_values).replace(b'"x"', b'"y"'))
+            memo = min(timeit.repeat(
+                lambda: loop.run_until_complete(memoised.validate_filters("/vn", other_values, None)),
+                number=number, repeat=3,
+            )) / number
+            assert memoised.hits > 0
+            print(f"  memoised shape  {memo * 1000:9.2f} ms   ({before / memo:.1f}x)")
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,15 @@ import os
 # or if it's the primary export.
 from .client import VNDB
 from .schema_validator import FilterValidator, SchemaCache
+from .methods.ratelimit import RateLimiter
+from .methods.retry import RetryPolicy
+from .methods.stream import ItemStream
+from .methods.singleflight import SingleFlight
+from .loader import BatchLoader
+from .cache import QueryCache, CacheBackend, MemoryCacheBackend
+from .compact import FilterCodec
+from .entity_cache import EntityCache
+from .mirror import LocalMirror
 
 from .exceptions import (
     VNDBAPIError,
@@ -14,6 +23,9 @@ from .exceptions import (
     NotFoundError,
     ServerError,
     TooMuchDataSelectedError,
+    LocalQueryError,
+    RequestTimeoutError,
+    NetworkError,
 )
 
 # Assuming your types directory was renamed to 'apitypes'
@@ -50,6 +62,17 @@ __all__ = [
     "VNDB",
     "FilterValidator",
     "SchemaCache",
+    "RateLimiter",
+    "RetryPolicy",
+    "ItemStream",
+    "SingleFlight",
+    "BatchLoader",
+    "QueryCache",
+    "CacheBackend",
+    "MemoryCacheBackend",
+    "FilterCodec",
+    "EntityCache",
+    "LocalMirror",
     "QueryRequest",
     "VNDBAPIError",
     "AuthenticationError",
@@ -58,6 +81,9 @@ __all__ = [
     "NotFoundError",
     "ServerError",
     "TooMuchDataSelectedError",
+    "LocalQueryError",
+    "RequestTimeoutError",
+    "NetworkError",
     "VNDBID",  # Exporting common types can be useful
     "ReleaseDate",
     "LanguageEnum",
@@ -0,0 +1,275 @@
+# src/veedb/cache.py
+"""
+Result cache for database queries.
+
+Responses are cached as the undecoded response body, keyed on a canonical
+form of the request: the `fields` selection is normalised (``"title, id"``
+and ``"id,title"`` are the same query) and the operands of `and`/`or`
+filters are flattened and sorted, so equivalent spellings of a query share
+one entry. Every hit is decoded afresh, so callers never share objects.
+
+Storage is pluggable: `QueryCache` talks to a `CacheBackend` through async
+methods, so e.g. a Redis or memcached backend can replace the in-process
+`MemoryCacheBackend`.
+
+With a `grace` period, expired responses are served stale-while-revalidate:
+for `grace` seconds after the TTL the stale body is returned at once and a
+single background request refreshes the entry.
+"""
+import asyncio
+import hashlib
+import struct
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from .exceptions import InvalidRequestError
+from .fields import normalize_fields
+
+DEFAULT_QUERY_CACHE_TTL = 300.0
+DEFAULT_QUERY_CACHE_SIZE = 1024
+
+# User lists change through the same client, so they are not cached unless asked for.
+DEFAULT_ENDPOINT_TTLS: Dict[str, float] = {"/ulist": 0.0}
+
+# Stored values are prefixed with the wall-clock time they were fetched at.
+_STORED_AT = struct.Struct(">d")
+
+
+class CacheBackend(ABC):
+    """Async storage interface used by `QueryCache`. Values are bytes."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under `key`, or `None` if missing or expired."""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove the value stored under `key`, if any."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Remove every value."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU backend bounded to `max_entries`. Expired entries are
+    dropped when they are read or when they reach the end of the LRU.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_QUERY_CACHE_SIZE):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+def canonical_filters(filters: Any) -> Any:
+    """
+    Canonical form of a filter expression: nested `and`/`or` groups with the
+    same operator are flattened, duplicate operands dropped, single-operand
+    groups unwrapped, and operands sorted. Predicates and compact filter strings are kept as is.
+    """
+    if not isinstance(filters, list) or not filters or filters[0] not in ("and", "or"):
+        return filters
+    operator = filters[0]
+    operands = []
+    for operand in filters[1:]:
+        operand = canonical_filters(operand)
+        if isinstance(operand, list) and operand and operand[0] == operator:
+            operands.extend(operand[1:])
+        else:
+            operands.append(operand)
+    unique = {orjson.dumps(operand, option=orjson.OPT_SORT_KEYS): operand for operand in operands}
+    if len(unique) == 1:
+        return operands[0]
+    return [operator] + [unique[encoded] for encoded in sorted(unique)]
+
+
+def canonical_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """`payload` with its `fields` and `filters` in canonical form."""
+    canonical = dict(payload)
+    if canonical.get("fields"):
+        try:
+            canonical["fields"] = normalize_fields(canonical["fields"])
+        except InvalidRequestError:
+            pass  # cached under the spelling given; the server rejects it anyway
+    if "filters" in canonical:
+        canonical["filters"] = canonical_filters(canonical["filters"])
+    return canonical
+
+
+class QueryCache:
+    """
+    Caches query responses per canonical request, with a TTL per endpoint.
+
+    Shared by all entity clients of a `VNDB` client (and by several clients,
+    if the same instance is passed to them).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: float = DEFAULT_QUERY_CACHE_TTL,
+        endpoint_ttls: Optional[Dict[str, float]] = None,
+        max_entries: int = DEFAULT_QUERY_CACHE_SIZE,
+        grace: float = 0.0,
+    ):
+        """
+        Args:
+            backend: Where entries are stored. Defaults to a
+                `MemoryCacheBackend` holding `max_entries` responses.
+            ttl: Seconds a response stays fresh.
+            endpoint_ttls: TTL overrides per endpoint path, e.g.
+                ``{"/vn": 3600, "/ulist": 0}``. A TTL of 0 disables caching
+                for that endpoint. `/ulist` is not cached by default.
+            max_entries: Size of the default in-memory backend.
+            grace: Seconds past the TTL during which a stale response is
+                still served while one background request refreshes it.
+                Callers only wait for the network once a response is older
+                than TTL + `grace`. 0 disables stale serving.
+        """
+        if grace < 0:
+            raise ValueError("grace must not be negative")
+        self.backend = backend if backend is not None else MemoryCacheBackend(max_entries)
+        self.ttl = ttl
+        self.grace = grace
+        self.endpoint_ttls = dict(DEFAULT_ENDPOINT_TTLS)
+        if endpoint_ttls:
+            self.endpoint_ttls.update(endpoint_ttls)
+        self._refreshing: Dict[str, "asyncio.Task[None]"] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_error: Optional[BaseException] = None
+
+    def ttl_for(self, endpoint: str) -> float:
+        return self.endpoint_ttls.get(endpoint, self.ttl)
+
+    def key(self, endpoint: str, payload: Dict[str, Any], token: Optional[str] = None) -> Optional[str]:
+        """Cache key of a query, or `None` if the endpoint is not cached."""
+        if self.ttl_for(endpoint) <= 0:
+            return None
+        digest = hashlib.sha256(orjson.dumps(canonical_payload(payload), option=orjson.OPT_SORT_KEYS))
+        if token:
+            # Results may depend on who is asking; keep users apart without storing the token.
+            digest.update(b"\0" + hashlib.sha256(token.encode()).digest())
+        return f"veedb:{endpoint}:{digest.hexdigest()}"
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """The cached body and its age in seconds, fresh or not, or `None`."""
+        value = await self.backend.get(key)
+        if value is None or len(value) < _STORED_AT.size:
+            return None
+        (stored_at,) = _STORED_AT.unpack_from(value)
+        return value[_STORED_AT.size:], max(0.0, time.time() - stored_at)
+
+    async def set(self, key: str, endpoint: str, value: bytes) -> None:
+        # Kept until the end of the grace period; `get_or_fetch` tells fresh from stale by age.
+        await self.backend.set(key, _STORED_AT.pack(time.time()) + value, self.ttl_for(endpoint) + self.grace)
+
+    async def get_or_fetch(self, key: str, endpoint: str, fetch: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        The cached body for `key` if it is fresh, or stale but within the
+        grace period (starting a background refresh); otherwise the body
+        returned by `fetch()`, which is then cached.
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            body, age = cached
+            ttl = self.ttl_for(endpoint)
+            if age < ttl:
+                self.hits += 1
+                return body
+            if age < ttl + self.grace:
+                self.stale_hits += 1
+                self._revalidate(key, endpoint, fetch)
+                return body
+        self.misses += 1
+        body = await fetch()
+        await self.set(key, endpoint, body)
+        return body
+
+    def _revalidate(self, key: str, endpoint: str, fetch: Callable[[], Awaitable[bytes]]) -> None:
+        if key in self._refreshing:
+            return  # one refresh per entry at a time
+        self._refreshing[key] = asyncio.ensure_future(self._refresh(key, endpoint, fetch))
+
+    async def _refresh(self, key: str, endpoint: str, fetch: Callable[[], Awaitable[bytes]]) -> None:
+        try:
+            body = await fetch()
+            await self.set(key, endpoint, body)
+            self.refreshes += 1
+        except Exception as e:
+            # The stale entry keeps being served until its grace period ends.
+            self.refresh_failures += 1
+            self.last_refresh_error = e
+        finally:
+            del self._refreshing[key]
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of lookups answered from the cache, stale ones included."""
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
+    def reset_stats(self) -> None:
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_error = None
+
+    def __repr__(self) -> str:
+        return f"QueryCache(ttl={self.ttl}, hits={self.hits}, misses={self.misses})"
@@ -1,10 +1,26 @@
 import asyncio
+import dataclasses
 import os
+import re
 import aiohttp
 import logging
-from typing import List, Optional, Union, TypeVar, Type, Dict, Any, Generic, AsyncGenerator
+import math
+import orjson
+from typing import (
+    List, Optional, Union, TypeVar, Type, Dict, Any, Generic, AsyncGenerator, Literal, Callable, Awaitable,
+    Iterable, Tuple,
+)
 
 from .methods.fetch import _fetch_api
+from .methods.ratelimit import (
+    RateLimiter,
+    DEFAULT_RATE_LIMIT_REQUESTS,
+    DEFAULT_RATE_LIMIT_WINDOW,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+)
+from .methods.retry import RetryPolicy
+from .methods.stream import ItemStream
+from .methods.singleflight import SingleFlight
 from .apitypes.common import (
     QueryRequest,
     QueryResponse,
@@ -33,9 +49,11 @@ from .exceptions import (
     AuthenticationError,
     VNDBAPIError,
     InvalidRequestError,
+    LocalQueryError,
     NotFoundError,
     RateLimitError,
     ServerError,
+    TooMuchDataSelectedError,
 )
 from .schema_validator import FilterValidator, SchemaCache
 
@@ -46,9 +64,245 @@ SANDBOX_URL = "https://beta.vndb.org/api/kana"
 T_Entity = TypeVar("T_Entity")
 T_QueryItem = TypeVar("T_QueryItem")
 
-from dacite import from_dict, Config as DaciteConfig
+from .decoders import get_decoder, dacite_config
+from .fields import format_fields, parse_fields, top_level_fields
+from .entity_cache import EntityCache, merge_fields
+from .mirror import LocalMirror
+from .loader import BatchLoader
+from .cache import QueryCache
+from .compact import FilterCodec
+from .local_query import run_query
+
+# `raw=` modes of the query methods: False builds dataclasses, True keeps the
+# decoded result dicts, "bytes" returns each page's undecoded response body.
+RawMode = Union[bool, Literal["bytes"]]
+RAW_BYTES = "bytes"
+
+
+def _wants_bytes(raw: RawMode) -> bool:
+    if raw not in (False, True, RAW_BYTES):
+        raise ValueError(f"raw must be False, True or {RAW_BYTES!r}, got {raw!r}")
+    return raw == RAW_BYTES
+
+
+_TOP_LEVEL_VALUE = re.compile(rb"\s*:\s*(true|false|null|-?[0-9]+)")
+
+
+def _page_top_level(body: bytes, key: str) -> Any:
+    """
+    Read a top-level scalar (`more`, `count`) of an undecoded query response
+    page without parsing the results. String values cannot contain an
+    unescaped `"key"`, and result objects carry neither key, so the last
+    unescaped occurrence is the top-level one.
+    """
+    needle = b'"' + key.encode() + b'"'
+    end = len(body)
+    while True:
+        index = body.rfind(needle, 0, end)
+        if index < 0:
+            break
+        if index == 0 or body[index - 1] != 0x5C:  # not preceded by a backslash
+            match = _TOP_LEVEL_VALUE.match(body, index + len(needle))
+            if match:
+                return orjson.loads(match.group(1))
+        end = index
+    data = orjson.loads(body) if body else None
+    return data.get(key) if isinstance(data, dict) else None
+
+
+def _page_has_more(body: bytes) -> bool:
+    return bool(_page_top_level(body, "more"))
+
+
+async def _send_query(
+    client: "VNDB", path: str, payload: Dict[str, Any], item_dataclass: type, raw: RawMode
+) -> Union[QueryResponse, bytes]:
+    as_bytes = _wants_bytes(raw)
+    url = f"{client.base_url}{path}"
+    if client.preflight_fields:
+        await client._preflight_fields(path, payload)
+    codec = client.filter_codec
+    learn_from = None
+    if codec is not None:
+        sent, learn = codec.prepare(path, payload)
+        if learn:
+            learn_from = payload["filters"]
+        payload = sent
+    cache = client.query_cache
+    cache_key = cache.key(path, payload, client.api_token) if cache is not None else None
+    if cache_key is not None:
+        # Cached as the response body, so every hit decodes its own objects.
+        body = await cache.get_or_fetch(cache_key, path, lambda: client._request(
+            method="POST",
+            url=url,
+            token=client.api_token,
+            json_payload=payload,
+            raw=True,
+        ))
+        if learn_from is not None:
+            codec.learn(path, learn_from, _page_top_level(body, "compact_filters"))
+        if as_bytes:
+            return body
+        response_data = orjson.loads(body)
+    else:
+        response_data = await client._request(
+            method="POST",
+            url=url,
+            token=client.api_token,
+            json_payload=payload,
+            raw=as_bytes,
+        )
+        if learn_from is not None:
+            compact = _page_top_level(response_data, "compact_filters") if as_bytes else response_data.get("compact_filters")
+            codec.learn(path, learn_from, compact)
+        if as_bytes:
+            return response_data
+    results_data = response_data.get("results", [])
+    entity_cache = client.entity_cache
+    if entity_cache is not None and path != "/ulist":
+        try:
+            selected = parse_fields(payload.get("fields") or "id")
+        except InvalidRequestError:
+            selected = None
+        if selected is not None:
+            # raw callers get the result dicts themselves, so the cache keeps a copy
+            entity_cache.store_many(path, selected, orjson.loads(orjson.dumps(results_data)) if raw else results_data)
+    if raw:
+        parsed_results = results_data
+    else:
+        decode = get_decoder(item_dataclass, payload.get("fields"))
+        parsed_results = [decode(item) for item in results_data]
+
+    return QueryResponse(
+        results=parsed_results,
+        more=response_data.get("more", False),
+        count=response_data.get("count"),
+        compact_filters=response_data.get("compact_filters"),
+        normalized_filters=response_data.get("normalized_filters"),
+    )
+
+
+def _page_more(response: Union[QueryResponse, bytes]) -> bool:
+    if isinstance(response, (bytes, bytearray)):
+        return _page_has_more(response)
+    return response.more
+
+
+def _page_count(response: Union[QueryResponse, bytes]) -> Optional[int]:
+    if isinstance(response, (bytes, bytearray)):
+        return _page_top_level(response, "count")
+    return response.count
+
+
+def _collect_page(all_results: list, response: Union[QueryResponse, bytes]) -> None:
+    if isinstance(response, (bytes, bytearray)):
+        all_results.append(response)
+    else:
+        all_results.extend(response.results)
+
+
+def _keyset_query(query_options: QueryRequest, last_id: Optional[VNDBID]) -> QueryRequest:
+    """
+    The query for the page after `last_id` in a keyset scan: sorted by id,
+    with an id cursor predicate and-ed onto the caller's filters.
+    """
+    filters = query_options.filters
+    if isinstance(filters, str):
+        raise ValueError("keyset pagination needs filters given as a list, not a compact filter string")
+    if last_id is not None:
+        cursor = ["id", "<" if query_options.reverse else ">", last_id]
+        filters = ["and", filters, cursor] if filters else cursor
+    fields = query_options.fields or "id"
+    if "id" not in top_level_fields(parse_fields(fields)):
+        fields = "id, " + fields  # the cursor is read from the results
+    return dataclasses.replace(query_options, filters=filters, fields=fields, sort="id", page=1)
+
 
-dacite_config = DaciteConfig(check_types=False)
+def _last_result_id(response: Union[QueryResponse, bytes]) -> Optional[VNDBID]:
+    if isinstance(response, (bytes, bytearray)):
+        results = (orjson.loads(response) or {}).get("results") or []
+    else:
+        results = response.results
+    if not results:
+        return None
+    last = results[-1]
+    return last["id"] if isinstance(last, dict) else last.id
+
+
+# Largest `results` the API accepts, and so the most IDs one OR filter may match.
+MAX_RESULTS_PER_PAGE = 100
+
+
+def _single_id_lookup(query_options: QueryRequest) -> Optional[VNDBID]:
+    """The ID if `query_options` is a plain `["id", "=", x]` lookup that can be batched."""
+    filters = query_options.filters
+    if (
+        isinstance(filters, list) and len(filters) == 3 and filters[0] == "id" and filters[1] == "="
+        and isinstance(filters[2], str) and query_options.page == 1 and query_options.results >= 1
+        and not query_options.count and not query_options.compact_filters and not query_options.normalized_filters
+    ):
+        return filters[2]
+    return None
+
+
+def _id_filter(ids: List[VNDBID]) -> list:
+    """`["id", "=", x]` for one ID, otherwise an OR over `id =` predicates."""
+    if len(ids) == 1:
+        return ["id", "=", ids[0]]
+    return ["or"] + [["id", "=", vndb_id] for vndb_id in ids]
+
+
+async def _fan_out_pages(
+    fetch: Callable[[QueryRequest], Awaitable[Union[QueryResponse, bytes]]],
+    query_options: QueryRequest,
+    max_pages: Optional[int],
+    concurrency: int,
+) -> list:
+    """
+    Fetch page 1 with `count=True`, work out how many pages there are and
+    fetch the rest concurrently, at most `concurrency` at a time. Requests
+    still go through the client's rate limiter. Pages are collected in order;
+    if the data grew since page 1 was counted, the remaining pages are
+    fetched one by one as usual.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    first = await fetch(dataclasses.replace(query_options, page=1, count=True))
+    all_results: list = []
+    _collect_page(all_results, first)
+    if not _page_more(first) or (max_pages and max_pages <= 1):
+        return all_results
+
+    count = _page_count(first)
+    per_page = query_options.results or 10
+    last_page = max(1, math.ceil(count / per_page)) if count is not None else 1
+    if max_pages:
+        last_page = min(last_page, max_pages)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(page_number: int) -> Union[QueryResponse, bytes]:
+        async with semaphore:
+            return await fetch(dataclasses.replace(query_options, page=page_number))
+
+    tasks = [asyncio.ensure_future(fetch_page(page_number)) for page_number in range(2, last_page + 1)]
+    try:
+        responses = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    last = first
+    for last in responses:
+        _collect_page(all_results, last)
+
+    page_number = last_page
+    while _page_more(last) and not (max_pages and page_number >= max_pages):
+        page_number += 1
+        last = await fetch(dataclasses.replace(query_options, page=page_number))
+        _collect_page(all_results, last)
+    return all_results
 
 
 class _SSLTimeoutFilter(logging.Filter):
@@ -81,79 +335,158 @@ class _BaseEntityClient(Generic[T_Entity, T_QueryItem]):
         self.query_item_dataclass = query_item_dataclass
 
     async def _post_query(
-        self, query_options: QueryRequest
-    ) -> QueryResponse[T_QueryItem]:
-        url = f"{self._client.base_url}{self._endpoint_path}"
+        self, query_options: QueryRequest, raw: RawMode = False
+    ) -> Union[QueryResponse[T_QueryItem], QueryResponse[Dict[str, Any]], bytes]:
         payload = query_options.to_dict()
-        session = self._client._get_session()
-        response_data = await _fetch_api(
-            session=session,
-            method="POST",
-            url=url,
-            token=self._client.api_token,
-            json_payload=payload,
-        )
-        results_data = response_data.get("results", [])
-        parsed_results = [
-            from_dict(
-                data_class=self.query_item_dataclass, data=item, config=dacite_config
-            )
-            for item in results_data
-        ]
-
-        return QueryResponse[T_QueryItem](
-            results=parsed_results,
-            more=response_data.get("more", False),
-            count=response_data.get("count"),
-            compact_filters=response_data.get("compact_filters"),
-            normalized_filters=response_data.get("normalized_filters"),
-        )
+        return await _send_query(self._client, self._endpoint_path, payload, self.query_item_dataclass, raw)
 
     async def query(
-        self, query_options: QueryRequest = QueryRequest()
-    ) -> QueryResponse[T_QueryItem]:
+        self, query_options: QueryRequest = QueryRequest(), raw: RawMode = False
+    ) -> Union[QueryResponse[T_QueryItem], QueryResponse[Dict[str, Any]], bytes]:
+        """
+        Run a single query.
+
+        Args:
+            query_options: The query to execute
+            raw: False to build dataclasses, True to return the result dicts
+                as decoded from JSON, or "bytes" to return the undecoded
+                response body
+        """
         if not query_options.fields:
             query_options.fields = "id"
-        return await self._post_query(query_options)
+        if (self._client.loader is not None or self._client.entity_cache is not None) and raw != RAW_BYTES:
+            vndb_id = _single_id_lookup(query_options)
+            if vndb_id is not None:
+                item = await self.load(vndb_id, query_options.fields, raw)
+                return QueryResponse(results=[] if item is None else [item], more=False)
+        return await self._post_query(query_options, raw)
+
+    async def query_local(
+        self, query_options: QueryRequest = QueryRequest(), raw: bool = False
+    ) -> Union[QueryResponse[T_QueryItem], QueryResponse[Dict[str, Any]]]:
+        """
+        Answer a query from the entities held by the entity cache or mirror,
+        without network I/O (see `veedb.local_query` for how filters are
+        evaluated). Only the entities held locally are searched, whatever
+        their age, so the answer is as complete as the mirror or cache is.
+
+        Raises:
+            LocalQueryError: If a filtered, sorted or selected field is not
+                held for an entity; the query can then be sent with `query`.
+        """
+        entity_cache = self._client.entity_cache
+        if entity_cache is None:
+            raise LocalQueryError("Local queries need an entity cache or mirror.")
+        filters = query_options.filters
+        if isinstance(filters, str) and self._client.filter_codec is not None:
+            query_options = dataclasses.replace(
+                query_options, filters=self._client.filter_codec.decode(self._endpoint_path, filters)
+            )
+        path = self._endpoint_path
+        schema = self._client._schema_cache_instance.loaded_schema  # used if already loaded, never fetched for this
+        if entity_cache.mirror is not None:
+            # A full scan of the mirror's rows, decoded afresh from SQLite; keep it off the event loop.
+            response = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: run_query(entity_cache.entities(path), query_options, path, schema)
+            )
+        else:
+            response = run_query(entity_cache.entities(path), query_options, path, schema)
+            response.results = orjson.loads(orjson.dumps(response.results))  # never hand out the cached objects
+        if not raw:
+            decode = get_decoder(self.query_item_dataclass, query_options.fields)
+            response.results = [decode(item) for item in response.results]
+        return response
+
+    async def load(
+        self, vndb_id: VNDBID, fields: str = "id", raw: bool = False
+    ) -> Optional[Union[T_QueryItem, Dict[str, Any]]]:
+        """
+        Fetch one entity by ID, or `None` if it does not exist. With batching
+        enabled on the client, concurrent calls share a single request; with
+        an entity cache, known fields are not fetched again.
+        """
+        loader = self._client.loader
+        if loader is None:
+            return (await self.get_many([vndb_id], fields, raw=raw))[vndb_id]
+        return await loader.load(self, vndb_id, fields, raw)
+
+    async def _keyset_pages(
+        self, query_options: QueryRequest, raw: RawMode, max_pages: Optional[int] = None,
+        after: Optional[VNDBID] = None,
+    ) -> AsyncGenerator[Union[QueryResponse[T_QueryItem], QueryResponse[Dict[str, Any]], bytes], None]:
+        """
+        Pages of a keyset (id cursor) scan, each one starting after the last id
+        of the previous; the first starts after `after` when given.
+        """
+        last_id: Optional[VNDBID] = after
+        page_number = 1
+        while True:
+            current_query = _keyset_query(query_options, last_id)
+            if page_number > 1:
+                current_query.count = False  # only the first page needs the total
+
+            response = await self._post_query(current_query, raw)
+            yield response
+
+            if not _page_more(response):
+                break
+            if max_pages and page_number >= max_pages:
+                break
+            last_id = _last_result_id(response)
+            if last_id is None:
+                break
+            page_number += 1
 
     async def query_all_pages(
-        self, query_options: QueryRequest = QueryRequest(), max_pages: Optional[int] = None
-    ) -> List[T_QueryItem]:
+        self, query_options: QueryRequest = QueryRequest(), max_pages: Optional[int] = None,
+        raw: RawMode = False, concurrency: Optional[int] = None, keyset: bool = False,
+    ) -> Union[List[T_QueryItem], List[Dict[str, Any]], List[bytes]]:
         """
         Fetch all results across multiple pages automatically.
         
         Args:
             query_options: The query to execute
             max_pages: Maximum number of pages to fetch (None for unlimited)
+            raw: False to build dataclasses, True to return the result dicts,
+                or "bytes" to return one undecoded response body per page
+            concurrency: If set, page 1 is fetched with `count=True` and the
+                remaining pages are fetched concurrently, at most this many
+                at a time (None fetches pages one after another)
+            keyset: Page with an id cursor instead of page numbers: results
+                are sorted by id and each request asks for ids after the last
+                one seen, so deep scans stay fast and rows never shift
+                between pages
             
         Returns:
-            List of all results from all pages
+            List of all results from all pages (or of page bodies with raw="bytes")
         """
         if not query_options.fields:
             query_options.fields = "id"
+
+        if keyset:
+            if concurrency is not None:
+                raise ValueError("keyset pagination is sequential and cannot be combined with concurrency")
+            all_results = []
+            async for response in self._keyset_pages(query_options, raw, max_pages):
+                _collect_page(all_results, response)
+            return all_results
+
+        if concurrency is not None:
+            return await _fan_out_pages(
+                lambda query: self._post_query(query, raw), query_options, max_pages, concurrency
+            )
             
         all_results = []
         page_number = 1
         
         while True:
             # Create a copy of the query options with the current page number
-            current_query = QueryRequest(
-                filters=query_options.filters,
-                fields=query_options.fields,
-                sort=query_options.sort,
-                reverse=query_options.reverse,
-                results=query_options.results,
-                page=page_number,
-                user=query_options.user,
-                count=query_options.count,
-                compact_filters=query_options.compact_filters,
-                normalized_filters=query_options.normalized_filters,
-            )
+            current_query = dataclasses.replace(query_options, page=page_number)
             
-            response = await self._post_query(current_query)
-            all_results.extend(response.results)
+            response = await self._post_query(current_query, raw)
+            _collect_page(all_results, response)
             
-            if not response.more:
+            if not _page_more(response):
                 break
                 
             if max_pages and page_number >= max_pages:
@@ -164,49 +497,182 @@ class _BaseEntityClient(Generic[T_Entity, T_QueryItem]):
         return all_results
 
     async def query_paginated(
-        self, query_options: QueryRequest = QueryRequest()
-    ) -> AsyncGenerator[QueryResponse[T_QueryItem], None]:
+        self, query_options: QueryRequest = QueryRequest(), raw: RawMode = False, keyset: bool = False
+    ) -> AsyncGenerator[Union[QueryResponse[T_QueryItem], QueryResponse[Dict[str, Any]], bytes], None]:
         """
         Generator that yields query responses page by page.
         
         Args:
             query_options: The query to execute
+            raw: False to build dataclasses, True to keep the result dicts,
+                or "bytes" to yield each undecoded response body
+            keyset: Page with an id cursor instead of page numbers (see
+                `query_all_pages`)
             
         Yields:
-            QueryResponse objects for each page
+            QueryResponse objects for each page (bytes with raw="bytes")
         """
         if not query_options.fields:
             query_options.fields = "id"
+
+        if keyset:
+            async for response in self._keyset_pages(query_options, raw):
+                yield response
+            return
             
         page_number = 1
         
         while True:
             # Create a copy of the query options with the current page number
-            current_query = QueryRequest(
-                filters=query_options.filters,
-                fields=query_options.fields,
-                sort=query_options.sort,
-                reverse=query_options.reverse,
-                results=query_options.results,
-                page=page_number,
-                user=query_options.user,
-                count=query_options.count,
-                compact_filters=query_options.compact_filters,
-                normalized_filters=query_options.normalized_filters,
-            )
+            current_query = dataclasses.replace(query_options, page=page_number)
             
-            response = await self._post_query(current_query)
+            response = await self._post_query(current_query, raw)
             yield response
             
-            if not response.more:
+            if not _page_more(response):
                 break
                 
             page_number += 1
 
+    async def get_many(
+        self, ids: Iterable[VNDBID], fields: str = "id", raw: bool = False,
+        chunk_size: int = MAX_RESULTS_PER_PAGE, concurrency: Optional[int] = None,
+    ) -> Dict[VNDBID, Optional[Union[T_QueryItem, Dict[str, Any]]]]:
+        """
+        Fetch entities by ID.
+
+        IDs are de-duplicated and split into chunks of at most `chunk_size`
+        (the API's per-page maximum), each fetched with a single OR filter.
+        Chunks run concurrently; requests still go through the client's rate
+        limiter.
+
+        Args:
+            ids: The IDs to fetch
+            fields: The fields to select; `id` is always included
+            raw: Return the result dicts instead of dataclasses
+            chunk_size: IDs per request, at most 100
+            concurrency: Maximum number of chunks in flight (None leaves it
+                to the rate limiter's concurrency cap)
+
+        Returns:
+            Dict keyed by every requested ID, in order, with `None` for IDs
+            that do not exist
+        """
+        if not 1 <= chunk_size <= MAX_RESULTS_PER_PAGE:
+            raise ValueError(f"chunk_size must be between 1 and {MAX_RESULTS_PER_PAGE}")
+        unique_ids = list(dict.fromkeys(ids))
+        if not fields:
+            fields = "id"
+        if "id" not in top_level_fields(parse_fields(fields)):
+            fields = "id, " + fields  # results are matched back to IDs by id
+
+        entity_cache = self._client.entity_cache
+        if entity_cache is None:
+            found = await self._fetch_by_ids(unique_ids, fields, raw, chunk_size, concurrency)
+            return {vndb_id: found.get(vndb_id) for vndb_id in unique_ids}
+
+        # Serve what the entity cache knows and fetch only the missing fields,
+        # grouping IDs that miss the same fields into one request.
+        endpoint = self._endpoint_path
+        paths = parse_fields(fields)
+        known: Dict[VNDBID, Dict[str, Any]] = {}
+        partial: Dict[VNDBID, Optional[Dict[str, Any]]] = {}  # what is known of the ones to fetch
+        groups: Dict[Tuple[str, ...], List[VNDBID]] = {}
+        for vndb_id in unique_ids:
+            data = entity_cache.lookup(endpoint, vndb_id, paths)
+            if data is not None:
+                known[vndb_id] = data
+            else:
+                missing = tuple(entity_cache.missing(endpoint, vndb_id, paths))
+                groups.setdefault(missing, []).append(vndb_id)
+                partial[vndb_id] = entity_cache.project(endpoint, vndb_id, paths)
+
+        # _send_query merges the fetched results into the entity cache, but the
+        # cache is bounded and may evict them again, so they are merged here too.
+        fetched = await asyncio.gather(*(
+            self._fetch_by_ids(group_ids, format_fields(("id",) + missing), True, chunk_size, concurrency)
+            for missing, group_ids in groups.items()
+        ))
+        for missing, found in zip(groups, fetched):
+            for vndb_id, item in found.items():
+                data = partial.get(vndb_id) or {}
+                merge_fields(data, {}, ("id",) + missing, item, 0.0)  # fetch times are the cache's business
+                known[vndb_id] = data
+        for group_ids in groups.values():
+            for vndb_id in group_ids:
+                if vndb_id not in known:
+                    entity_cache.invalidate(endpoint, vndb_id)  # no longer exists
+
+        decode = None if raw else get_decoder(self.query_item_dataclass, fields)
+        result: Dict[VNDBID, Any] = {}
+        for vndb_id in unique_ids:
+            data = known.get(vndb_id)
+            if data is None:
+                result[vndb_id] = None
+            elif raw:
+                result[vndb_id] = orjson.loads(orjson.dumps(data))  # never hand out the cached objects
+            else:
+                result[vndb_id] = decode(data)
+        return result
+
+    async def _fetch_by_ids(
+        self, ids: List[VNDBID], fields: str, raw: bool, chunk_size: int, concurrency: Optional[int]
+    ) -> Dict[VNDBID, Any]:
+        """Query `ids` in OR-filter chunks, concurrently; returns the results found, by ID."""
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def fetch_chunk(chunk: List[VNDBID]) -> QueryResponse:
+            query = QueryRequest(filters=_id_filter(chunk), fields=fields, results=len(chunk))
+            if semaphore is None:
+                return await self._post_query(query, raw)
+            async with semaphore:
+                return await self._post_query(query, raw)
+
+        chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+        tasks = [asyncio.ensure_future(fetch_chunk(chunk)) for chunk in chunks]
+        try:
+            responses = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        found: Dict[VNDBID, Any] = {}
+        for response in responses:
+            for item in response.results:
+                found[item["id"] if raw else item.id] = item
+        return found
+
+    def aiter_items(
+        self, query_options: QueryRequest = QueryRequest(), prefetch: int = 1,
+        raw: bool = False, keyset: bool = False,
+    ) -> ItemStream[Union[T_QueryItem, Dict[str, Any]]]:
+        """
+        Stream individual results across all pages, fetching up to
+        `prefetch` pages ahead in the background.
+
+        Args:
+            query_options: The query to execute
+            prefetch: Number of pages buffered ahead of the consumer
+            raw: Yield the result dicts instead of dataclasses
+            keyset: Page with an id cursor instead of page numbers
+
+        Returns:
+            An `ItemStream`; use it with `async with` to stop fetching
+            promptly when leaving the loop early
+        """
+        if raw == RAW_BYTES:
+            raise ValueError("aiter_items yields single results; use query_paginated(raw='bytes') for page bodies")
+        return ItemStream(self.query_paginated(query_options, raw=raw, keyset=keyset), prefetch)
+
     async def validate_filters(self, filters: Union[List, str, None]) -> Dict[str, Any]:
         """Validates filters against the schema for this specific endpoint."""
         return await self._client.validate_filters(self._endpoint_path, filters)
     
+    async def validate_fields(self, fields: str) -> Dict[str, Any]:
+        """Validates a `fields` selection against the schema for this specific endpoint."""
+        return await self._client.validate_fields(self._endpoint_path, fields)
+
     async def get_available_fields(self) -> List[str]:
         """Gets all available filterable fields for this endpoint."""
         return await self._client.get_available_fields(self._endpoint_path)
@@ -261,14 +727,14 @@ class _UlistClient:
         self,
         user_id: Optional[VNDBID] = None,
         query_options: QueryRequest = QueryRequest(),
-    ) -> QueryResponse[UlistItem]:
+        raw: RawMode = False,
+    ) -> Union[QueryResponse[UlistItem], QueryResponse[Dict[str, Any]], bytes]:
         # Allow callers to pass either positional user_id or set
         # `user` on the QueryRequest itself (the upstream API accepts
         # the latter, and our self-hosted backend follows the same shape).
         if isinstance(user_id, QueryRequest):
             query_options = user_id
             user_id = None
-        url = f"{self._client.base_url}/ulist"
         payload = query_options.to_dict()
         if user_id is not None:
             payload["user"] = user_id
@@ -276,26 +742,7 @@ class _UlistClient:
             raise InvalidRequestError(
                 "ulist.query requires `user_id` (positional) "
                 "or `user` set on the QueryRequest")
-        session = self._client._get_session()
-        response_data = await _fetch_api(
-            session=session,
-            method="POST",
-            url=url,
-            token=self._client.api_token,
-            json_payload=payload,
-        )
-        results_data = response_data.get("results", [])
-        parsed_results = [
-            from_dict(data_class=UlistItem, data=item, config=dacite_config)
-            for item in results_data
-        ]
-        return QueryResponse[UlistItem](
-            results=parsed_results,
-            more=response_data.get("more", False),
-            count=response_data.get("count"),
-            compact_filters=response_data.get("compact_filters"),
-            normalized_filters=response_data.get("normalized_filters"),
-        )
+        return await _send_query(self._client, "/ulist", payload, UlistItem, raw)
 
     async def get_labels(
         self, user_id: Optional[VNDBID] = None, fields: Optional[str] = None
@@ -306,26 +753,20 @@ class _UlistClient:
             params["user"] = user_id
         if fields:
             params["fields"] = fields
-        session = self._client._get_session()
-        response_data = await _fetch_api(
-            session=session,
+        response_data = await self._client._request(
             method="GET",
             url=url,
             token=self._client.api_token,
             params=params,
         )
-        return [
-            from_dict(data_class=UlistLabel, data=label, config=dacite_config)
-            for label in response_data.get("labels", [])
-        ]
+        decode = get_decoder(UlistLabel)
+        return [decode(label) for label in response_data.get("labels", [])]
 
     async def update_entry(self, vn_id: VNDBID, payload: UlistUpdatePayload) -> None:
         if not self._client.api_token:
             raise AuthenticationError("listwrite permission and token required for ulist updates.")
         url = f"{self._client.base_url}/ulist/{vn_id}"
-        session = self._client._get_session()
-        await _fetch_api(
-            session=session,
+        await self._client._request(
             method="PATCH",
             url=url,
             token=self._client.api_token,
@@ -336,12 +777,12 @@ class _UlistClient:
         if not self._client.api_token:
             raise AuthenticationError("listwrite permission and token required for ulist deletions.")
         url = f"{self._client.base_url}/ulist/{vn_id}"
-        session = self._client._get_session()
-        await _fetch_api(session=session, method="DELETE", url=url, token=self._client.api_token)
+        await self._client._request(method="DELETE", url=url, token=self._client.api_token)
 
     async def query_all_pages(
-        self, user_id: VNDBID, query_options: QueryRequest = QueryRequest(), max_pages: Optional[int] = None
-    ) -> List[UlistItem]:
+        self, user_id: VNDBID, query_options: QueryRequest = QueryRequest(), max_pages: Optional[int] = None,
+        raw: RawMode = False, concurrency: Optional[int] = None,
+    ) -> Union[List[UlistItem], List[Dict[str, Any]], List[bytes]]:
         """
         Fetch all ulist results across multiple pages automatically.
         
@@ -349,32 +790,31 @@ class _UlistClient:
             user_id: The user ID to query
             query_options: The query to execute
             max_pages: Maximum number of pages to fetch (None for unlimited)
+            raw: False to build dataclasses, True to return the result dicts,
+                or "bytes" to return one undecoded response body per page
+            concurrency: If set, page 1 is fetched with `count=True` and the
+                remaining pages are fetched concurrently, at most this many
+                at a time (None fetches pages one after another)
             
         Returns:
-            List of all results from all pages
+            List of all results from all pages (or of page bodies with raw="bytes")
         """
+        if concurrency is not None:
+            return await _fan_out_pages(
+                lambda query: self.query(user_id, query, raw), query_options, max_pages, concurrency
+            )
+
         all_results = []
         page_number = 1
         
         while True:
             # Create a copy of the query options with the current page number
-            current_query = QueryRequest(
-                filters=query_options.filters,
-                fields=query_options.fields,
-                sort=query_options.sort,
-                reverse=query_options.reverse,
-                results=query_options.results,
-                page=page_number,
-                user=query_options.user,
-                count=query_options.count,
-                compact_filters=query_options.compact_filters,
-                normalized_filters=query_options.normalized_filters,
-            )
+            current_query = dataclasses.replace(query_options, page=page_number)
             
-            response = await self.query(user_id, current_query)
-            all_results.extend(response.results)
+            response = await self.query(user_id, current_query, raw)
+            _collect_page(all_results, response)
             
-            if not response.more:
+            if not _page_more(response):
                 break
                 
             if max_pages and page_number >= max_pages:
@@ -385,43 +825,56 @@ class _UlistClient:
         return all_results
 
     async def query_paginated(
-        self, user_id: VNDBID, query_options: QueryRequest = QueryRequest()
-    ) -> AsyncGenerator[QueryResponse[UlistItem], None]:
+        self, user_id: VNDBID, query_options: QueryRequest = QueryRequest(), raw: RawMode = False
+    ) -> AsyncGenerator[Union[QueryResponse[UlistItem], QueryResponse[Dict[str, Any]], bytes], None]:
         """
         Generator that yields ulist query responses page by page.
         
         Args:
             user_id: The user ID to query
             query_options: The query to execute
+            raw: False to build dataclasses, True to keep the result dicts,
+                or "bytes" to yield each undecoded response body
             
         Yields:
-            QueryResponse objects for each page
+            QueryResponse objects for each page (bytes with raw="bytes")
         """
         page_number = 1
         
         while True:
             # Create a copy of the query options with the current page number
-            current_query = QueryRequest(
-                filters=query_options.filters,
-                fields=query_options.fields,
-                sort=query_options.sort,
-                reverse=query_options.reverse,
-                results=query_options.results,
-                page=page_number,
-                user=query_options.user,
-                count=query_options.count,
-                compact_filters=query_options.compact_filters,
-                normalized_filters=query_options.normalized_filters,
-            )
+            current_query = dataclasses.replace(query_options, page=page_number)
             
-            response = await self.query(user_id, current_query)
+            response = await self.query(user_id, current_query, raw)
             yield response
             
-            if not response.more:
+            if not _page_more(response):
                 break
                 
             page_number += 1
 
+    def aiter_items(
+        self, user_id: VNDBID, query_options: QueryRequest = QueryRequest(), prefetch: int = 1,
+        raw: bool = False,
+    ) -> ItemStream[Union[UlistItem, Dict[str, Any]]]:
+        """
+        Stream individual ulist entries across all pages, fetching up to
+        `prefetch` pages ahead in the background.
+
+        Args:
+            user_id: The user ID to query
+            query_options: The query to execute
+            prefetch: Number of pages buffered ahead of the consumer
+            raw: Yield the result dicts instead of dataclasses
+
+        Returns:
+            An `ItemStream`; use it with `async with` to stop fetching
+            promptly when leaving the loop early
+        """
+        if raw == RAW_BYTES:
+            raise ValueError("aiter_items yields single results; use query_paginated(raw='bytes') for page bodies")
+        return ItemStream(self.query_paginated(user_id, query_options, raw=raw), prefetch)
+
 class _RlistClient:
     def __init__(self, client: "VNDB"):
         self._client = client
@@ -430,9 +883,7 @@ class _RlistClient:
         if not self._client.api_token:
             raise AuthenticationError("listwrite permission and token required for rlist updates.")
         url = f"{self._client.base_url}/rlist/{release_id}"
-        session = self._client._get_session()
-        await _fetch_api(
-            session=session,
+        await self._client._request(
             method="PATCH",
             url=url,
             token=self._client.api_token,
@@ -443,8 +894,7 @@ class _RlistClient:
         if not self._client.api_token:
             raise AuthenticationError("listwrite permission and token required for rlist deletions.")
         url = f"{self._client.base_url}/rlist/{release_id}"
-        session = self._client._get_session()
-        await _fetch_api(session=session, method="DELETE", url=url, token=self._client.api_token)
+        await self._client._request(method="DELETE", url=url, token=self._client.api_token)
 
 
 class VNDB:
@@ -456,14 +906,77 @@ class VNDB:
         local_schema_path: Optional[str] = None,
         schema_cache_dir: str = ".veedb_cache",
         schema_cache_ttl_hours: float = 15 * 24,  # Default to 15 days
+        schema_stale_grace_hours: float = 0.0,
         base_url: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        rate_limit_requests: Optional[int] = DEFAULT_RATE_LIMIT_REQUESTS,
+        rate_limit_window: float = DEFAULT_RATE_LIMIT_WINDOW,
+        max_concurrent_requests: Optional[int] = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        retry_policy: Optional[RetryPolicy] = None,
+        batch_lookups: Union[bool, BatchLoader] = False,
+        batch_window: float = 0.0,
+        coalesce_requests: Union[bool, SingleFlight] = True,
+        query_cache: Union[bool, QueryCache] = False,
+        entity_cache: Union[bool, EntityCache] = False,
+        mirror: Optional[Union[str, LocalMirror]] = None,
+        preflight_fields: bool = False,
+        max_response_weight: Optional[float] = None,
+        filter_codec: Union[bool, FilterCodec] = False,
     ):
         """
         Args:
+            schema_stale_grace_hours: Hours past `schema_cache_ttl_hours`
+                during which the expired schema is still used while it is
+                downloaded again in the background.
             base_url: Override the kana API endpoint. Useful for self-hosted
                 replicas. Falls back to the `VEEDB_BASE_URL` environment
                 variable, then to the upstream `api.vndb.org/kana` (or sandbox
                 if `use_sandbox=True`). Strip any trailing slash.
+            rate_limiter: A `RateLimiter` to pace every request made by this
+                client. Pass the same instance to several clients to share one
+                budget. When omitted, one is built from the arguments below.
+            rate_limit_requests: Requests allowed per `rate_limit_window`
+                seconds. `None` disables pacing.
+            rate_limit_window: Length of the rate limit window in seconds.
+            max_concurrent_requests: Cap on concurrently in-flight requests.
+                `None` disables the cap.
+            retry_policy: How throttled, failing and timed out requests are
+                retried. Defaults to `RetryPolicy()`; pass
+                `RetryPolicy(max_attempts=1)` to disable retries.
+            batch_lookups: Merge single-ID lookups (`query` with an
+                `["id", "=", x]` filter, and `load`) made concurrently into one
+                OR-filtered request per endpoint and field selection. Pass a
+                `BatchLoader` to configure it directly.
+            batch_window: Seconds to collect lookups before sending a batch;
+                0 batches the lookups made within one event-loop tick.
+            coalesce_requests: Let identical concurrent GET/POST requests
+                share one in-flight request (see `SingleFlight`). Pass a
+                `SingleFlight` to share it between clients or `False` to
+                disable coalescing.
+            query_cache: Cache query responses keyed on the canonical
+                request. `True` uses a `QueryCache()` with an in-memory LRU;
+                pass a `QueryCache` to choose the TTLs or the backend.
+            entity_cache: Keep every entity seen in query results, merging
+                the fields of different queries, and answer by-ID lookups
+                (`get_many`, `load`, `["id", "=", x]` queries) from it,
+                fetching only missing or stale fields. `True` uses an
+                `EntityCache()`.
+            mirror: Back the entity cache with a SQLite `LocalMirror` (or the
+                path of its database file, which the client then opens and
+                closes), so entities survive restarts. Enables the entity
+                cache if it is not.
+            preflight_fields: Check the `fields` of every query against the
+                schema before sending it, raising `InvalidRequestError` for
+                unknown fields or objects selected without subfields.
+            max_response_weight: With `preflight_fields`, also raise
+                `TooMuchDataSelectedError` when the estimated weight of a
+                selection (see `validate_fields`) times `results` exceeds this.
+            filter_codec: Send large filters in the compact string form
+                instead of JSON lists. The filter ids that form needs are
+                learned from the server: a large filter with unknown ids or
+                value kinds is sent as JSON with `compact_filters`
+                requested, and later ones are encoded locally. `True` uses a `FilterCodec()`;
+                pass one to share the learned ids or set the size threshold.
         """
         self.api_token = api_token
 
@@ -478,6 +991,45 @@ class VNDB:
         self._session_param = session
         self._session_internal: Optional[aiohttp.ClientSession] = None
         self._session_owner = session is None
+
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(
+                requests=rate_limit_requests,
+                window=rate_limit_window,
+                max_concurrency=max_concurrent_requests,
+            )
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        if isinstance(batch_lookups, BatchLoader):
+            self.loader: Optional[BatchLoader] = batch_lookups
+        else:
+            self.loader = BatchLoader(window=batch_window) if batch_lookups else None
+        if isinstance(coalesce_requests, SingleFlight):
+            self.singleflight: Optional[SingleFlight] = coalesce_requests
+        else:
+            self.singleflight = SingleFlight() if coalesce_requests else None
+        if isinstance(query_cache, QueryCache):
+            self.query_cache: Optional[QueryCache] = query_cache
+        else:
+            self.query_cache = QueryCache() if query_cache else None
+        if isinstance(entity_cache, EntityCache):
+            self.entity_cache: Optional[EntityCache] = entity_cache
+        else:
+            self.entity_cache = EntityCache() if entity_cache else None
+        self.preflight_fields = preflight_fields
+        self.max_response_weight = max_response_weight
+        if isinstance(filter_codec, FilterCodec):
+            self.filter_codec: Optional[FilterCodec] = filter_codec
+        else:
+            self.filter_codec = FilterCodec() if filter_codec else None
+        self._mirror_owner = isinstance(mirror, str)
+        if isinstance(mirror, str):
+            mirror = LocalMirror(mirror)
+        self.mirror: Optional[LocalMirror] = mirror
+        if mirror is not None:
+            if self.entity_cache is None:
+                self.entity_cache = EntityCache()
+            self.entity_cache.mirror = mirror
         
         # Store schema configuration
         self.local_schema_path = local_schema_path
@@ -488,7 +1040,8 @@ class VNDB:
         self._schema_cache_instance = SchemaCache(
             cache_dir=self.schema_cache_dir,
             local_schema_path=self.local_schema_path,
-            ttl_hours=self.schema_cache_ttl_hours
+            ttl_hours=self.schema_cache_ttl_hours,
+            stale_grace_hours=schema_stale_grace_hours,
         )
         # Pass the SchemaCache instance to FilterValidator
         self._filter_validator: FilterValidator = FilterValidator(schema_cache=self._schema_cache_instance)
@@ -522,10 +1075,52 @@ class VNDB:
                 raise RuntimeError("aiohttp.ClientSession not available.")
         return self._session_internal
 
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        token: Optional[str] = None,
+        json_payload: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        raw: bool = False,
+    ) -> Any:
+        """
+        Sends a request through the client's rate limiter and retry policy.
+        Every API call goes through here. `raw=True` returns the undecoded
+        body of a successful response. Identical concurrent requests are
+        coalesced into one when `coalesce_requests` is enabled.
+        """
+        session = self._get_session()
+
+        async def send() -> Any:
+            async with self.rate_limiter:
+                try:
+                    return await _fetch_api(
+                        session=session,
+                        method=method,
+                        url=url,
+                        token=token,
+                        json_payload=json_payload,
+                        params=params,
+                        raw=raw,
+                    )
+                except RateLimitError as e:
+                    # Hold back every other request too, not just this one.
+                    if e.retry_after:
+                        self.rate_limiter.pause(e.retry_after)
+                    raise
+
+        if self.singleflight is None:
+            return await self.retry_policy.run(method, url, send)
+        key = self.singleflight.key(method, url, json_payload, params, token, raw)
+        return await self.singleflight.do(key, lambda: self.retry_policy.run(method, url, send))
+
     async def close(self):
         if self._session_internal is not None and self._session_owner and not self._session_internal.closed:
             await self._session_internal.close()
             await asyncio.sleep(0.05)  # Allow time for cleanup
+        if self.mirror is not None and self._mirror_owner:
+            self.mirror.close()
 
     async def __aenter__(self):
         return self
@@ -533,6 +1128,13 @@ class VNDB:
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
+    async def warm_up(self) -> None:
+        """
+        Preload the schema (from disk, or the API if there is no fresh copy)
+        so the first filter validation does not wait for it.
+        """
+        await self._schema_cache_instance.warm_up(self)
+
     async def get_schema(self) -> dict:
         """
         Get the VNDB API schema, using cache if available and not older than configured TTL.
@@ -548,29 +1150,27 @@ class VNDB:
 
     async def get_stats(self) -> UserStats:
         url = f"{self.base_url}/stats"
-        session = self._get_session()
-        data = await _fetch_api(session=session, method="GET", url=url, token=self.api_token)
-        return from_dict(data_class=UserStats, data=data, config=dacite_config)
+        data = await self._request(method="GET", url=url, token=self.api_token)
+        return get_decoder(UserStats)(data)
 
     async def get_user(self, q: Union[VNDBID, List[VNDBID]], fields: Optional[str] = None) -> Dict[str, Optional[User]]:
         url = f"{self.base_url}/user"
         params: Dict[str, Any] = {"q": q}
         if fields:
             params["fields"] = fields
-        session = self._get_session()
-        response_data = await _fetch_api(session=session, method="GET", url=url, token=self.api_token, params=params)
+        response_data = await self._request(method="GET", url=url, token=self.api_token, params=params)
+        decode = get_decoder(User)
         parsed_response: Dict[str, Optional[User]] = {}
         for key, value_data in response_data.items():
-            parsed_response[key] = from_dict(data_class=User, data=value_data, config=dacite_config) if value_data else None
+            parsed_response[key] = decode(value_data) if value_data else None
         return parsed_response
 
     async def get_authinfo(self, token: str = None) -> AuthInfo:
         if not self.api_token and not token:
             raise AuthenticationError("API token required for /authinfo endpoint.")
         url = f"{self.base_url}/authinfo"
-        session = self._get_session()
-        response_data = await _fetch_api(session=session, method="GET", url=url, token=token or self.api_token)
-        return from_dict(data_class=AuthInfo, data=response_data, config=dacite_config)
+        response_data = await self._request(method="GET", url=url, token=token or self.api_token)
+        return get_decoder(AuthInfo)(response_data)
     
     def _get_filter_validator(self) -> FilterValidator:
         """Returns the FilterValidator instance."""
@@ -582,6 +1182,30 @@ class VNDB:
         validator = self._get_filter_validator()
         return await validator.validate_filters(endpoint, filters, self)
     
+    async def validate_fields(self, endpoint: str, fields: str) -> Dict[str, Any]:
+        """Validates a `fields` selection against the schema for a specific endpoint."""
+        validator = self._get_filter_validator()
+        return await validator.validate_fields(endpoint, fields, self)
+
+    async def _preflight_fields(self, endpoint: str, payload: Dict[str, Any]) -> None:
+        """Raise locally for a selection the API would reject (`preflight_fields`)."""
+        validator = self._get_filter_validator()
+        schema = await validator.schema_cache.get_schema(self)
+        if endpoint not in schema.get("api_fields", {}):
+            return  # e.g. endpoints of a self-hosted mirror the schema does not describe
+        report = await validator.validate_fields(endpoint, payload.get("fields") or "id", self)
+        if not report["valid"]:
+            message = " ".join(report["errors"])
+            if report["suggestions"]:
+                message += f" Did you mean: {', '.join(report['suggestions'])}?"
+            raise InvalidRequestError(message)
+        weight = report["weight"] * (payload.get("results") or 10)
+        if self.max_response_weight is not None and weight > self.max_response_weight:
+            raise TooMuchDataSelectedError(
+                f"Estimated response weight {weight:.0f} exceeds max_response_weight "
+                f"{self.max_response_weight:.0f}. Reduce fields or results per page."
+            )
+
     async def get_available_fields(self, endpoint: str) -> List[str]:
         """Get all available filterable fields for an endpoint."""
         validator = self._get_filter_validator()
@@ -0,0 +1,448 @@
+# src/veedb/compact.py
+"""
+Conversion between the JSON list form of filters and the compact string form.
+
+The API accepts `filters` either as nested lists or as the compact string it
+returns in `compact_filters`. A compact filter is a sequence of tokens
+without separators, drawn from the alphabet ``0-9a-zA-Z_-``:
+
+- integers: one character for 0-48, ``N``-``W`` plus one character for the
+  next 640 values, ``X``-``Z`` plus two characters for the next 12288, and
+  ``_`` plus four characters for the next 64**4 and ``-`` plus six
+  characters above that;
+- ``and``/``or`` groups: the integer 0 or 1, the number of operands and the
+  operands;
+- predicates: the integer id of the filter, the operator and value type
+  packed into one integer (``operator * 8 + type``) and the value;
+- strings: letters and digits as is, any other character as ``_`` and its
+  code point as an integer, terminated by ``-`` (which only starts an
+  integer after ``_``, so it cannot be mistaken for one).
+
+The filter ids are assigned by the server and are not part of the API
+schema, so a `FilterCodec` learns them from `compact_filters` responses
+(`FilterCodec.learn`) or from a mapping passed in. Filters with fields it
+has not learned yet cannot be encoded; `FilterCodec.prepare` then sends them
+as JSON and asks the server for their compact form instead. Values the
+format has no type for (floats, booleans, null) are always sent as JSON.
+
+The format above is reconstructed, not specified, so `prepare` also only
+compacts filters whose every feature (value type, integer width, escaped
+string characters, ``and``/``or`` group) has already been seen in a
+compact form the server produced and `learn` checked against its filters.
+"""
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from .exceptions import InvalidRequestError
+
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_-"
+_DIGIT = {char: value for value, char in enumerate(_ALPHABET)}
+
+OPERATORS = ("=", "!=", ">=", ">", "<=", "<")
+_AND, _OR = 0, 1
+
+# Value types of a predicate.
+_INT, _NEGATIVE, _STRING, _VNDBID, _QUERY, _ARRAY = range(6)
+
+_VNDBID_PATTERN = re.compile(r"^([a-z])([1-9][0-9]*)$")
+_PLAIN = frozenset("0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+# Filters shorter than this (as JSON) are sent as they are by `FilterCodec.prepare`.
+DEFAULT_MIN_COMPACT_SIZE = 512
+
+# Features of the format that `learn` can verify; see `FilterCodec.verified`.
+_ESCAPE = ("escape",)
+# Marks a filter without a known id among the features; never verified.
+_UNKNOWN_ID = "unknown id"
+
+
+def _int_feature(tier: int) -> Tuple[str, int]:
+    return ("int", tier)
+
+
+def _type_feature(value_type: int) -> Tuple[str, int]:
+    return ("type", value_type)
+
+
+def _group_feature(operator: int) -> Tuple[str, int]:
+    return ("group", operator)
+
+
+def _encode_int(number: int, out: List[str]) -> int:
+    """Append the compact form of `number`; returns its width tier (0-4)."""
+    if number < 0:
+        raise InvalidRequestError(f"Cannot encode negative integer {number} in a compact filter.")
+    if number < 49:
+        out.append(_ALPHABET[number])
+        return 0
+    number -= 49
+    if number < 640:
+        out.append(_ALPHABET[49 + (number >> 6)] + _ALPHABET[number & 63])
+        return 1
+    number -= 640
+    if number < 3 * 4096:
+        out.append(_ALPHABET[59 + (number >> 12)] + _ALPHABET[(number >> 6) & 63] + _ALPHABET[number & 63])
+        return 2
+    number -= 3 * 4096
+    if number < 64 ** 4:
+        out.append("_" + "".join(_ALPHABET[(number >> shift) & 63] for shift in (18, 12, 6, 0)))
+        return 3
+    number -= 64 ** 4
+    if number < 64 ** 6:
+        out.append("-" + "".join(_ALPHABET[(number >> shift) & 63] for shift in (30, 24, 18, 12, 6, 0)))
+        return 4
+    raise InvalidRequestError("Integer too large for a compact filter.")
+
+
+def _is_query(value: Any) -> bool:
+    """Whether a predicate value is a nested filter rather than an array value."""
+    if not isinstance(value, list) or not value or not isinstance(value[0], str):
+        return False
+    if value[0] in ("and", "or"):
+        return True
+    return len(value) == 3 and value[1] in OPERATORS
+
+
+def _namespace(namespace: str, name: str) -> str:
+    """Filter ids of a nested filter are scoped by the predicate that holds it."""
+    return f"{namespace}.{name}"
+
+
+class _Reader:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+        self.features: Set[Tuple[Any, ...]] = set()  # of the format, as read so far
+
+    def error(self, message: str) -> InvalidRequestError:
+        return InvalidRequestError(f"Invalid compact filter {self.text!r} at position {self.pos}: {message}")
+
+    def char(self) -> str:
+        if self.pos >= len(self.text):
+            raise self.error("unexpected end")
+        char = self.text[self.pos]
+        self.pos += 1
+        return char
+
+    def digit(self) -> int:
+        char = self.char()
+        if char not in _DIGIT:
+            raise self.error(f"unexpected character {char!r}")
+        return _DIGIT[char]
+
+    def integer(self) -> int:
+        first = self.digit()
+        if first < 49:
+            self.features.add(_int_feature(0))
+            return first
+        if first < 59:
+            self.features.add(_int_feature(1))
+            return 49 + ((first - 49) << 6) + self.digit()
+        if first < 62:
+            self.features.add(_int_feature(2))
+            return 689 + ((first - 59) << 12) + (self.digit() << 6) + self.digit()
+        if first == 62:
+            self.features.add(_int_feature(3))
+            number = 0
+            for _ in range(4):
+                number = (number << 6) + self.digit()
+            return 689 + 3 * 4096 + number
+        self.features.add(_int_feature(4))
+        number = 0
+        for _ in range(6):
+            number = (number << 6) + self.digit()
+        return 689 + 3 * 4096 + 64 ** 4 + number
+
+    def string(self) -> str:
+        chars = []
+        while True:
+            char = self.char()
+            if char == "-":
+                return "".join(chars)
+            if char == "_":
+                self.features.add(_ESCAPE)
+                code = self.integer()
+                if code > 0x10FFFF:
+                    raise self.error("invalid code point")
+                chars.append(chr(code))
+            elif char in _PLAIN:
+                chars.append(char)
+            else:
+                raise self.error(f"unexpected character {char!r}")
+
+
+class FilterCodec:
+    """
+    Encoder and decoder of compact filters, with the filter ids it knows.
+
+    Args:
+        ids: Known filter ids per namespace: the endpoint path for top-level
+            filters (``{"/vn": {"lang": 2}}``), and ``"<namespace>.<filter>"``
+            for the filters nested in an entity filter (``"/vn.release"``).
+        min_size: `prepare` only compacts filters whose JSON form has at
+            least this many bytes.
+
+    `verified` holds the features of the format (see the module docstring)
+    that `learn` has seen the server use; `prepare` only compacts filters
+    made of those, while `encode` and `decode` work regardless.
+    """
+
+    def __init__(self, ids: Optional[Dict[str, Dict[str, int]]] = None, min_size: int = DEFAULT_MIN_COMPACT_SIZE):
+        self.ids: Dict[str, Dict[str, int]] = {namespace: dict(names) for namespace, names in (ids or {}).items()}
+        if any(number in (_AND, _OR) for names in self.ids.values() for number in names.values()):
+            raise ValueError("filter ids 0 and 1 are reserved for 'and' and 'or'")
+        self._names: Dict[str, Dict[int, str]] = {
+            namespace: {number: name for name, number in names.items()} for namespace, names in self.ids.items()
+        }
+        self.min_size = min_size
+        self.verified: Set[Tuple[Any, ...]] = set()
+
+    # Encoding
+
+    def encode(self, endpoint: str, filters: list) -> str:
+        """
+        The compact string of `filters` for `endpoint`.
+
+        Raises:
+            InvalidRequestError: For malformed filters, values the format cannot
+                hold (floats, booleans, null) or filters without a known id.
+        """
+        compact, features = self._encode(endpoint, filters)
+        for feature in sorted(feature for feature in features if feature[0] == _UNKNOWN_ID):
+            raise InvalidRequestError(f"No compact filter id known for '{feature[2]}' in '{feature[1]}'.")
+        return compact
+
+    def _encode(self, endpoint: str, filters: list) -> Tuple[str, Set[Tuple[Any, ...]]]:
+        """
+        The compact string of `filters` and the features of the format it
+        uses. Filters without a known id are left out of the string and
+        listed among the features instead, so that only filters the format
+        cannot hold at all raise.
+        """
+        out: List[str] = []
+        features: Set[Tuple[Any, ...]] = set()
+        self._encode_query(endpoint, filters, out, features)
+        return "".join(out), features
+
+    def can_encode(self, endpoint: str, filters: Any) -> bool:
+        try:
+            self.encode(endpoint, filters)
+        except InvalidRequestError:
+            return False
+        return True
+
+    def _encode_query(self, namespace: str, query: Any, out: List[str], features: Set[Tuple[Any, ...]]) -> None:
+        if not isinstance(query, list) or not query or not isinstance(query[0], str):
+            raise InvalidRequestError(f"Invalid filter format: {query}")
+        operator = query[0].lower()
+        if operator in ("and", "or"):
+            group = _AND if operator == "and" else _OR
+            features.add(_group_feature(group))
+            features.add(_int_feature(_encode_int(group, out)))
+            features.add(_int_feature(_encode_int(len(query) - 1, out)))
+            for operand in query[1:]:
+                self._encode_query(namespace, operand, out, features)
+            return
+        if len(query) != 3 or query[1] not in OPERATORS:
+            raise InvalidRequestError(f"Invalid filter predicate: {query}")
+        name, predicate_operator, value = query
+        number = self.ids.get(namespace, {}).get(name)
+        if number is None:
+            features.add((_UNKNOWN_ID, namespace, name))
+        else:
+            features.add(_int_feature(_encode_int(number, out)))
+        operator_at = len(out)
+        out.append("")  # filled in once the value type is known
+        value_type = self._encode_value(_namespace(namespace, name), value, out, features)
+        operator_out: List[str] = []
+        features.add(_int_feature(_encode_int(OPERATORS.index(predicate_operator) * 8 + value_type, operator_out)))
+        out[operator_at] = "".join(operator_out)
+
+    def _encode_value(self, namespace: str, value: Any, out: List[str], features: Set[Tuple[Any, ...]]) -> int:
+        value_type = self._encode_typed_value(namespace, value, out, features)
+        features.add(_type_feature(value_type))
+        return value_type
+
+    def _encode_typed_value(self, namespace: str, value: Any, out: List[str], features: Set[Tuple[Any, ...]]) -> int:
+        if isinstance(value, bool) or value is None or isinstance(value, float):
+            raise InvalidRequestError(f"Cannot encode {value!r} in a compact filter.")
+        if isinstance(value, int):
+            features.add(_int_feature(_encode_int(-value if value < 0 else value, out)))
+            return _NEGATIVE if value < 0 else _INT
+        if isinstance(value, str):
+            match = _VNDBID_PATTERN.match(value)
+            if match:
+                out.append(match.group(1))
+                features.add(_int_feature(_encode_int(int(match.group(2)), out)))
+                return _VNDBID
+            out.append("".join(char if char in _PLAIN else self._escape(char, features) for char in value) + "-")
+            return _STRING
+        if _is_query(value):
+            self._encode_query(namespace, value, out, features)
+            return _QUERY
+        if isinstance(value, list):
+            features.add(_int_feature(_encode_int(len(value), out)))
+            for item in value:
+                type_at = len(out)
+                out.append("")  # the type of each item precedes it
+                out[type_at] = _ALPHABET[self._encode_value(namespace, item, out, features)]
+            return _ARRAY
+        raise InvalidRequestError(f"Cannot encode {value!r} in a compact filter.")
+
+    @staticmethod
+    def _escape(char: str, features: Set[Tuple[Any, ...]]) -> str:
+        out = ["_"]
+        features.add(_ESCAPE)
+        features.add(_int_feature(_encode_int(ord(char), out)))
+        return "".join(out)
+
+    # Decoding
+
+    def decode(self, endpoint: str, compact: str) -> list:
+        """
+        The JSON list form of the compact filter `compact` for `endpoint`.
+
+        Raises:
+            InvalidRequestError: For malformed strings or unknown filter ids.
+        """
+        reader = _Reader(compact)
+        query = self._decode_query(reader, endpoint, self._names)
+        if reader.pos != len(compact):
+            raise reader.error("trailing characters")
+        return query
+
+    def _decode_query(self, reader: _Reader, namespace: str, names: Optional[Dict[str, Dict[int, str]]]) -> list:
+        number = reader.integer()
+        if number in (_AND, _OR):
+            reader.features.add(_group_feature(number))
+            count = reader.integer()
+            return ["and" if number == _AND else "or"] + [
+                self._decode_query(reader, namespace, names) for _ in range(count)
+            ]
+        if names is None:
+            name: Any = number  # structural decoding, see `learn`
+        else:
+            name = names.get(namespace, {}).get(number)
+            if name is None:
+                raise reader.error(f"unknown filter id {number} in '{namespace}'")
+        operator_index, value_type = divmod(reader.integer(), 8)
+        if operator_index >= len(OPERATORS):
+            raise reader.error("unknown operator")
+        nested = _namespace(namespace, name) if isinstance(name, str) else f"{namespace}.#{name}"
+        return [name, OPERATORS[operator_index], self._decode_value(reader, value_type, nested, names)]
+
+    def _decode_value(self, reader: _Reader, value_type: int, namespace: str,
+                      names: Optional[Dict[str, Dict[int, str]]]) -> Any:
+        reader.features.add(_type_feature(value_type))
+        if value_type == _INT:
+            return reader.integer()
+        if value_type == _NEGATIVE:
+            return -reader.integer()
+        if value_type == _STRING:
+            return reader.string()
+        if value_type == _VNDBID:
+            prefix = reader.char()
+            if not "a" <= prefix <= "z":
+                raise reader.error("invalid id prefix")
+            return f"{prefix}{reader.integer()}"
+        if value_type == _QUERY:
+            return self._decode_query(reader, namespace, names)
+        if value_type == _ARRAY:
+            return [self._decode_value(reader, reader.integer(), namespace, names) for _ in range(reader.integer())]
+        raise reader.error(f"unknown value type {value_type}")
+
+    # Learning filter ids
+
+    def learn(self, endpoint: str, filters: list, compact: Optional[str]) -> bool:
+        """
+        Record the filter ids used in `compact`, the server's compact form
+        of `filters`, and mark the features of the format it uses as
+        verified. Nothing is recorded unless both forms have the same
+        structure and values and the ids agree with the ones already known.
+
+        Returns:
+            Whether the ids were recorded.
+        """
+        if not isinstance(compact, str):
+            return False
+        reader = _Reader(compact)
+        try:
+            decoded = self._decode_query(reader, endpoint, None)
+        except InvalidRequestError:
+            return False
+        if reader.pos != len(compact):
+            return False
+        found: Dict[str, Dict[str, int]] = {}
+        if not self._align(endpoint, filters, decoded, found):
+            return False
+        for namespace, names in found.items():
+            known = self.ids.get(namespace, {})
+            numbers = self._names.get(namespace, {})
+            for name, number in names.items():
+                if known.get(name, number) != number or numbers.get(number, name) != name:
+                    return False
+        for namespace, names in found.items():
+            for name, number in names.items():
+                self.ids.setdefault(namespace, {})[name] = number
+                self._names.setdefault(namespace, {})[number] = name
+        self.verified |= reader.features
+        return True
+
+    def _align(self, namespace: str, query: Any, decoded: list, found: Dict[str, Dict[str, int]]) -> bool:
+        if not isinstance(query, list) or not query or not isinstance(query[0], str):
+            return False
+        operator = query[0].lower()
+        if operator in ("and", "or"):
+            return (
+                decoded[0] == operator and len(decoded) == len(query)
+                and all(self._align(namespace, a, b, found) for a, b in zip(query[1:], decoded[1:]))
+            )
+        if len(query) != 3 or isinstance(decoded[0], str) or decoded[1] != query[1]:
+            return False
+        name, _, value = query
+        names = found.setdefault(namespace, {})
+        if names.get(name, decoded[0]) != decoded[0] or (decoded[0] in names.values() and names.get(name) != decoded[0]):
+            return False
+        names[name] = decoded[0]
+        nested = _namespace(namespace, name)
+        if _is_query(value):
+            return isinstance(decoded[2], list) and self._align(nested, value, decoded[2], found)
+        return self._same_value(value, decoded[2])
+
+    @staticmethod
+    def _same_value(value: Any, decoded: Any) -> bool:
+        if isinstance(value, list) and isinstance(decoded, list):
+            return len(value) == len(decoded) and all(map(FilterCodec._same_value, value, decoded))
+        return type(value) is type(decoded) and value == decoded
+
+    # Requests
+
+    def prepare(self, endpoint: str, payload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        The payload to send for a query: `filters` of at least `min_size`
+        bytes of JSON are replaced by their compact form. If they use filter
+        ids not known yet, or features of the format not yet `verified`,
+        `compact_filters` is requested so the response teaches them. Filters
+        the format cannot hold at all (floats, booleans, null, malformed
+        filters) are sent as they are, without asking for their compact form.
+
+        Returns:
+            The payload and whether the response should be passed to `learn`.
+        """
+        filters = payload.get("filters")
+        if not isinstance(filters, list) or not filters or len(orjson.dumps(filters)) < self.min_size:
+            return payload, False
+        try:
+            compact, features = self._encode(endpoint, filters)
+        except InvalidRequestError:
+            return payload, False  # no server answer would make these encodable
+        if features <= self.verified:
+            return {**payload, "filters": compact}, False
+        if payload.get("compact_filters"):
+            return payload, True
+        return {**payload, "compact_filters": True}, True
+
+    def __repr__(self) -> str:
+        return f"FilterCodec(namespaces={len(self.ids)}, min_size={self.min_size})"
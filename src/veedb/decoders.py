@@ -0,0 +1,353 @@
+# src/veedb/decoders.py
+"""
+Precompiled decoders turning API result dicts into the `apitypes` dataclasses.
+
+`dacite.from_dict` re-inspects the type hints of a dataclass, and of every
+nested dataclass, for each item it builds. The decoders here walk a
+dataclass once, resolve every field type into a small converter function,
+and reuse those for every item. Results are identical to
+``from_dict(data_class, data, Config(check_types=False))``; values whose
+shape has no fast path (e.g. a tuple or a non-JSON container where a list
+is annotated) are delegated to dacite itself.
+"""
+import dataclasses
+import typing
+from collections.abc import Mapping
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from dacite import Config as DaciteConfig, MissingValueError, from_dict
+from dacite.core import _build_value as _dacite_build_value
+from dacite.types import is_instance as _dacite_is_instance
+
+from .exceptions import InvalidRequestError
+from .fields import parse_fields, subselection, top_level_fields
+
+T = TypeVar("T")
+
+# Same configuration the client has always used with dacite.
+dacite_config = DaciteConfig(check_types=False)
+
+Converter = Callable[[Any], Any]
+Decoder = Callable[[Mapping], Any]
+
+_NONE_TYPE = type(None)
+_decoders: Dict[type, Decoder] = {}
+_hints_cache: Dict[type, Dict[str, Any]] = {}
+
+# Selection-specialised decoders, keyed on (dataclass, parsed leaf paths).
+MAX_SELECTION_DECODERS = 512
+_selection_decoders: "OrderedDict[Tuple[type, Tuple[str, ...]], Decoder]" = OrderedDict()
+
+
+def _slow_converter(type_: Any) -> Converter:
+    """Let dacite build values of a type we do not specialise."""
+    def convert(value: Any) -> Any:
+        return _dacite_build_value(type_=type_, data=value, config=dacite_config)
+    return convert
+
+
+def _dataclass_converter(type_: type, selection: Optional[Tuple[str, ...]] = None) -> Converter:
+    decode = get_decoder(type_) if selection is None else _selection_decoder(type_, selection)
+
+    def convert(value: Any) -> Any:
+        if value.__class__ is dict or isinstance(value, Mapping):
+            return decode(value)
+        return value
+    return convert
+
+
+def _list_converter(type_: Any, item: Optional[Converter]) -> Converter:
+    slow = _slow_converter(type_)
+    if item is None:
+        def convert(value: Any) -> Any:
+            if value.__class__ is list:
+                return list(value)
+            return slow(value)
+    else:
+        def convert(value: Any) -> Any:
+            if value.__class__ is list:
+                return [item(element) for element in value]
+            return slow(value)
+    return convert
+
+
+def _dict_converter(type_: Any, item: Optional[Converter]) -> Converter:
+    slow = _slow_converter(type_)
+    if item is None:
+        def convert(value: Any) -> Any:
+            if value.__class__ is dict:
+                return dict(value)
+            return slow(value)
+    else:
+        def convert(value: Any) -> Any:
+            if value.__class__ is dict:
+                return {key: item(element) for key, element in value.items()}
+            return slow(value)
+    return convert
+
+
+def _union_converter(members: list, converters: list) -> Converter:
+    """
+    Mirror dacite's union handling without `check_types`: the first member
+    whose built value is an instance of that member wins, otherwise the
+    value is handed through unchanged.
+    """
+    candidates = []
+    for member, convert in zip(members, converters):
+        if typing.get_origin(member) is typing.Literal:
+            check = (lambda args: lambda value: value in args)(typing.get_args(member))
+        else:
+            check = (lambda type_: lambda value: _dacite_is_instance(value, type_))(member)
+        candidates.append((convert, check))
+
+    def convert_union(value: Any) -> Any:
+        for convert, check in candidates:
+            try:
+                built = value if convert is None else convert(value)
+            except Exception:
+                continue
+            if check(built):
+                return built
+        return value
+    return convert_union
+
+
+def _optional(convert: Converter) -> Converter:
+    def convert_optional(value: Any) -> Any:
+        if value is None:
+            return None
+        return convert(value)
+    return convert_optional
+
+
+def compile_type(type_: Any, selection: Optional[Tuple[str, ...]] = None) -> Optional[Converter]:
+    """
+    Build a converter for values annotated with `type_`.
+
+    `selection` holds the leaf paths selected below this value, if known;
+    nested dataclasses then get selection-specialised decoders as well.
+
+    Returns `None` when dacite would hand the value through unchanged
+    (primitives, `Any`, `Literal`, bare containers), so callers can skip the call.
+    """
+    origin = typing.get_origin(type_)
+
+    if origin is typing.Union:
+        members = [arg for arg in typing.get_args(type_) if arg is not _NONE_TYPE]
+        if len(members) == 1:
+            # Optional[X]: dacite short-circuits None and builds X otherwise.
+            convert = compile_type(members[0], selection)
+            return None if convert is None else _optional(convert)
+        converters = [compile_type(arg) for arg in members]
+        if all(convert is None for convert in converters):
+            return None
+        return _optional(_union_converter(members, converters))
+
+    if origin is not None and origin is not typing.Literal:
+        if isinstance(origin, type) and issubclass(origin, Mapping):
+            args = typing.get_args(type_)
+            return _dict_converter(type_, compile_type(args[1]) if len(args) == 2 else None)
+        if isinstance(origin, type) and issubclass(origin, (list, tuple, set, frozenset)):
+            args = typing.get_args(type_)
+            # Like dacite, JSON arrays keep being lists and use the first item type.
+            return _list_converter(type_, compile_type(args[0], selection) if args else None)
+        return _slow_converter(type_)
+
+    if dataclasses.is_dataclass(type_) and isinstance(type_, type):
+        return _dataclass_converter(type_, selection)
+
+    return None
+
+
+def _type_hints(data_class: type) -> Dict[str, Any]:
+    hints = _hints_cache.get(data_class)
+    if hints is None:
+        hints = _hints_cache[data_class] = typing.get_type_hints(data_class)
+    return hints
+
+
+def _is_optional(type_: Any) -> bool:
+    return typing.get_origin(type_) is typing.Union and _NONE_TYPE in typing.get_args(type_)
+
+
+def _compile(data_class: type, decode_cell: list) -> None:
+    hints = _type_hints(data_class)
+    converters: Dict[str, Optional[Converter]] = {}
+    missing: list = []  # (name, is_optional) for fields without a default
+    for field in dataclasses.fields(data_class):
+        field_type = hints[field.name]
+        converters[field.name] = compile_type(field_type)
+        if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING:
+            missing.append((field.name, _is_optional(field_type)))
+
+    field_count = len(converters)
+    sentinel = object()
+
+    def decode(data: Mapping) -> Any:
+        kwargs = {}
+        for key, value in data.items():
+            convert = converters.get(key, sentinel)
+            if convert is None:
+                kwargs[key] = value
+            elif convert is not sentinel:
+                kwargs[key] = convert(value)
+        if len(kwargs) != field_count:
+            for name, is_optional in missing:
+                if name not in kwargs:
+                    if not is_optional:
+                        raise MissingValueError(name)
+                    kwargs[name] = None
+        return data_class(**kwargs)
+
+    decode_cell.append(decode)
+
+
+def _compile_selection(data_class: type, paths: Tuple[str, ...]) -> Decoder:
+    """
+    Generate a decoder that only reads the keys selected by `paths`.
+
+    Unselected fields get their defaults directly: immutable defaults are
+    shared, while list/dict factories produce a fresh container per item so
+    instances never alias each other. Whenever the data does not have
+    exactly the selected keys, the generic decoder takes over.
+    """
+    generic = get_decoder(data_class)
+    class_fields = dataclasses.fields(data_class)
+    if any(not field.init for field in class_fields):
+        return generic
+    hints = _type_hints(data_class)
+    names = {field.name for field in class_fields}
+    top_level = top_level_fields(paths)
+    selected = [name for name in top_level if name in names]
+    if not selected:
+        return generic
+    for field in class_fields:
+        if (field.name not in selected and field.default is dataclasses.MISSING
+                and field.default_factory is dataclasses.MISSING and not _is_optional(hints[field.name])):
+            return generic  # dacite would raise MissingValueError; leave that to the generic path
+
+    namespace: Dict[str, Any] = {"generic": generic, "cls": data_class, "new": object.__new__}
+    variables = {name: f"v{index}" for index, name in enumerate(selected)}
+    values = []
+    for index, field in enumerate(class_fields):
+        name = field.name
+        if name in variables:
+            convert = compile_type(hints[name], subselection(paths, name) or None)
+            if convert is None:
+                values.append((name, variables[name]))
+            else:
+                namespace[f"c{index}"] = convert
+                values.append((name, f"c{index}({variables[name]})"))
+        elif field.default_factory is list:
+            values.append((name, "[]"))
+        elif field.default_factory is dict:
+            values.append((name, "{}"))
+        elif field.default_factory is not dataclasses.MISSING:
+            namespace[f"f{index}"] = field.default_factory
+            values.append((name, f"f{index}()"))
+        elif field.default is not dataclasses.MISSING:
+            namespace[f"d{index}"] = field.default
+            values.append((name, f"d{index}"))
+        else:
+            values.append((name, "None"))
+
+    lines = [
+        "def decode(data):",
+        f"    if len(data) != {len(top_level)}:",
+        "        return generic(data)",
+        "    try:",
+    ]
+    lines += [f"        {variables[name]} = data[{name!r}]" for name in selected]
+    lines += ["    except KeyError:", "        return generic(data)"]
+    bypass_init = (
+        not hasattr(data_class, "__post_init__")
+        and not data_class.__dataclass_params__.frozen
+        and data_class.__dictoffset__ != 0
+    )
+    if bypass_init:
+        # Same attribute dict the generated __init__ would build, in field order.
+        lines.append("    obj = new(cls)")
+        lines.append("    obj.__dict__ = {" + ", ".join(f"{name!r}: {value}" for name, value in values) + "}")
+        lines.append("    return obj")
+    else:
+        lines.append("    return cls(" + ", ".join(f"{name}={value}" for name, value in values) + ")")
+
+    exec("\n".join(lines), namespace)
+    return namespace["decode"]
+
+
+def _selection_decoder(data_class: type, paths: Tuple[str, ...]) -> Decoder:
+    key = (data_class, paths)
+    decoder = _selection_decoders.get(key)
+    if decoder is not None:
+        _selection_decoders.move_to_end(key)
+        return decoder
+    decoder = _compile_selection(data_class, paths)
+    _selection_decoders[key] = decoder
+    if len(_selection_decoders) > MAX_SELECTION_DECODERS:
+        _selection_decoders.popitem(last=False)
+    return decoder
+
+
+def get_decoder(data_class: Type[T], fields: Optional[str] = None) -> Callable[[Mapping], T]:
+    """
+    Return the compiled decoder for `data_class`, compiling it on first use.
+
+    Args:
+        data_class: The dataclass to build.
+        fields: The `fields` selection string of the query the data comes
+            from. When given, a decoder specialised to exactly that selection
+            is returned (cached per class and normalised selection). The
+            top-level `id` is always expected, as the API returns it whether
+            selected or not. A selection that cannot be parsed gets the
+            generic decoder.
+    """
+    if fields:
+        try:
+            paths = parse_fields(fields)
+        except InvalidRequestError:
+            paths = None
+        if paths:
+            if "id" not in paths:
+                paths = tuple(sorted(paths + ("id",)))
+            return _selection_decoder(data_class, paths)
+
+    try:
+        return _decoders[data_class]
+    except KeyError:
+        pass
+
+    if any(not field.init for field in dataclasses.fields(data_class)):
+        # Not worth specialising; keep dacite's handling of non-init fields.
+        def fallback(data: Mapping) -> T:
+            return from_dict(data_class=data_class, data=data, config=dacite_config)
+        _decoders[data_class] = fallback
+        return fallback
+
+    # Register a trampoline first so self-referencing types (VN.relations ->
+    # VNRelation(VN)) resolve to this decoder while it is being compiled.
+    cell: list = []
+
+    def trampoline(data: Mapping) -> T:
+        return cell[0](data)
+
+    _decoders[data_class] = trampoline
+    try:
+        _compile(data_class, cell)
+    except Exception:
+        del _decoders[data_class]
+        raise
+    _decoders[data_class] = cell[0]
+    return cell[0]
+
+
+def decode(data_class: Type[T], data: Mapping) -> T:
+    """Decode a single API result dict into `data_class`."""
+    return get_decoder(data_class)(data)
+
+
+def precompile(*data_classes: type) -> None:
+    """Compile the decoders for `data_classes` ahead of the first request."""
+    for data_class in data_classes:
+        get_decoder(data_class)
@@ -0,0 +1,240 @@
+# src/veedb/entity_cache.py
+"""
+Identity map of entities seen in query results.
+
+Every entity is kept once per endpoint and VNDBID as the union of all the
+fields fetched for it so far, together with when each field was fetched.
+By-ID lookups are answered from it when every requested field is known and
+fresh; otherwise only the missing fields are requested and merged in.
+Optionally backed by a `LocalMirror` on disk.
+"""
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .apitypes.common import VNDBID
+from .fields import selection_tree
+
+if TYPE_CHECKING:
+    from .mirror import LocalMirror
+
+DEFAULT_ENTITY_TTL = 3600.0
+DEFAULT_MAX_ENTITIES = 10000
+
+_CANNOT_MERGE = object()
+
+
+def _merge(old: Any, new: Any) -> Any:
+    """
+    Merge two values of the same field fetched with different selections.
+    Objects are merged key by key, lists of objects element by element as
+    long as both lists hold the same entities; anything else cannot be merged.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        merged = dict(old)
+        for key, value in new.items():
+            merged[key] = value if key not in old else _merge(old[key], value)
+            if merged[key] is _CANNOT_MERGE:
+                return _CANNOT_MERGE
+        return merged
+    if isinstance(old, list) and isinstance(new, list):
+        if len(old) != len(new):
+            return _CANNOT_MERGE
+        merged_list = []
+        for old_item, new_item in zip(old, new):
+            if isinstance(old_item, dict) and isinstance(new_item, dict):
+                if "id" in old_item and "id" in new_item and old_item["id"] != new_item["id"]:
+                    return _CANNOT_MERGE
+                merged_item = _merge(old_item, new_item)
+                if merged_item is _CANNOT_MERGE:
+                    return _CANNOT_MERGE
+                merged_list.append(merged_item)
+            elif old_item == new_item:
+                merged_list.append(new_item)
+            else:
+                return _CANNOT_MERGE
+        return merged_list
+    if old is None or new is None or isinstance(old, (dict, list)) or isinstance(new, (dict, list)):
+        # e.g. image was null and now is an object: the newer value is complete for its selection only
+        return new if old == new else _CANNOT_MERGE
+    return new
+
+
+def merge_fields(
+    data: Dict[str, Any], fetched: Dict[str, float], paths: Tuple[str, ...], item: Dict[str, Any], now: float
+) -> None:
+    """
+    Merge one result dict, fetched with the selection `paths` at `now`, into
+    an entity's `data` and per-leaf-path `fetched` times, in place.
+    """
+    tree = selection_tree(paths)
+    for name, value in item.items():
+        if name not in tree:
+            continue  # not asked for, so we cannot tell what it covers
+        prefix = name + "."
+        if name in data:
+            merged = _merge(data[name], value)
+            if merged is _CANNOT_MERGE:
+                # The value changed shape; only what was just fetched is known now.
+                for path in [path for path in fetched if path == name or path.startswith(prefix)]:
+                    del fetched[path]
+                merged = value
+            data[name] = merged
+        else:
+            data[name] = value
+        for path in paths:
+            if path == name or path.startswith(prefix):
+                fetched[path] = now
+    if "id" in item:
+        data["id"] = item["id"]
+
+
+def _project(value: Any, tree: Optional[dict]) -> Any:
+    """`value` restricted to the selection `tree` (`None` selects everything)."""
+    if tree is None or value is None:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+class _Entity:
+    __slots__ = ("data", "fetched")
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Any] = {}
+        self.fetched: Dict[str, float] = {}  # leaf path -> fetch time (time.time())
+
+
+class EntityCache:
+    """
+    Field-merging entity cache keyed by (endpoint, VNDBID), bounded to
+    `max_entities` in LRU order. A field is fresh for `ttl` seconds after it
+    was last fetched.
+
+    With a `mirror`, entities missing from memory are read from it and every
+    stored result is written through, so the cache survives restarts and
+    is not limited to `max_entities`.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_ENTITY_TTL,
+        max_entities: int = DEFAULT_MAX_ENTITIES,
+        mirror: Optional["LocalMirror"] = None,
+    ):
+        if max_entities < 1:
+            raise ValueError("max_entities must be at least 1")
+        self.ttl = ttl
+        self.max_entities = max_entities
+        self.mirror = mirror
+        self._entities: "OrderedDict[Tuple[str, VNDBID], _Entity]" = OrderedDict()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, key: Tuple[str, VNDBID]) -> bool:
+        return key in self._entities
+
+    def stats(self) -> Dict[str, int]:
+        return {"entities": len(self), "hits": self.hits, "partial_hits": self.partial_hits, "misses": self.misses}
+
+    def _get(self, endpoint: str, vndb_id: VNDBID) -> Optional[_Entity]:
+        key = (endpoint, vndb_id)
+        entity = self._entities.get(key)
+        if entity is None and self.mirror is not None:
+            stored = self.mirror.read(endpoint, vndb_id)
+            if stored is not None:
+                entity = self._add(key)
+                entity.data, entity.fetched = stored
+        return entity
+
+    def _add(self, key: Tuple[str, VNDBID]) -> _Entity:
+        entity = self._entities[key] = _Entity()
+        if len(self._entities) > self.max_entities:
+            self._entities.popitem(last=False)
+        return entity
+
+    def missing(self, endpoint: str, vndb_id: VNDBID, paths: Iterable[str]) -> List[str]:
+        """The requested leaf paths that are unknown or stale for this entity."""
+        entity = self._get(endpoint, vndb_id)
+        if entity is None:
+            return [path for path in paths if path != "id"]
+        oldest = time.time() - self.ttl
+        return [path for path in paths if path != "id" and entity.fetched.get(path, oldest) <= oldest]
+
+    def lookup(self, endpoint: str, vndb_id: VNDBID, paths: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """
+        The entity restricted to `paths` if all of them are known and fresh,
+        otherwise `None`. Also counts the hit, partial hit or miss.
+        """
+        entity = self._get(endpoint, vndb_id)
+        if entity is None:
+            self.misses += 1
+            return None
+        if self.missing(endpoint, vndb_id, paths):
+            self.partial_hits += 1
+            return None
+        self._entities.move_to_end((endpoint, vndb_id))
+        self.hits += 1
+        return self.project(endpoint, vndb_id, paths)
+
+    def project(self, endpoint: str, vndb_id: VNDBID, paths: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        """A new dict with the requested fields of the entity, known or not."""
+        entity = self._get(endpoint, vndb_id)
+        if entity is None:
+            return None
+        tree = selection_tree(tuple(paths) + ("id",))
+        return {key: _project(entity.data[key], subtree) for key, subtree in tree.items() if key in entity.data}
+
+    def entities(self, endpoint: str) -> Iterator[Dict[str, Any]]:
+        """
+        The data of every entity held for `endpoint`: the mirror's rows if
+        there is one (memory only holds a subset of them), else the ones in
+        memory.
+        """
+        if self.mirror is not None:
+            return self.mirror.iter_data(endpoint)
+        return iter([entity.data for key, entity in self._entities.items() if key[0] == endpoint])
+
+    def store(self, endpoint: str, paths: Tuple[str, ...], item: Dict[str, Any]) -> None:
+        """Merge one result dict, fetched with the selection `paths`, into the cache."""
+        self.store_many(endpoint, paths, (item,))
+
+    def store_many(self, endpoint: str, paths: Tuple[str, ...], items: Iterable[Dict[str, Any]]) -> None:
+        now = time.time()
+        touched = []
+        for item in items:
+            if not isinstance(item, dict) or item.get("id") is None:
+                continue
+            key = (endpoint, item["id"])
+            entity = self._get(*key)
+            if entity is None:
+                entity = self._add(key)
+            else:
+                self._entities.move_to_end(key)
+            merge_fields(entity.data, entity.fetched, paths, item, now)
+            touched.append(entity)
+        if self.mirror is not None and touched:
+            self.mirror.write_many(endpoint, [(entity.data["id"], entity.data, entity.fetched) for entity in touched])
+
+    def invalidate(self, endpoint: Optional[str] = None, vndb_id: Optional[VNDBID] = None) -> None:
+        """Forget one entity, every entity of an endpoint, or everything."""
+        if self.mirror is not None:
+            self.mirror.delete(endpoint, vndb_id)
+        if endpoint is not None and vndb_id is not None:
+            self._entities.pop((endpoint, vndb_id), None)
+        elif endpoint is not None:
+            for key in [key for key in self._entities if key[0] == endpoint]:
+                del self._entities[key]
+        else:
+            self._entities.clear()
+
+    def __repr__(self) -> str:
+        return f"EntityCache(entities={len(self)}, hits={self.hits}, misses={self.misses})"
@@ -53,8 +53,11 @@ class RateLimitError(VNDBAPIError):
         self,
         message: str = "API request limit reached. Please wait before trying again.",
         status_code: int = 429,
+        retry_after: float = None,
     ):
         super().__init__(message, status_code)
+        # Seconds to wait as advertised by the `Retry-After` header, if any.
+        self.retry_after = retry_after
 
 
 class ServerError(VNDBAPIError):
@@ -64,8 +67,32 @@ class ServerError(VNDBAPIError):
         self,
         message: str = "An unexpected server error occurred.",
         status_code: int = 500,
+        retry_after: float = None,
     ):
         super().__init__(message, status_code)
+        # Seconds to wait as advertised by the `Retry-After` header, if any.
+        self.retry_after = retry_after
+
+
+class RequestTimeoutError(VNDBAPIError):
+    """The request did not complete within the client-side timeout."""
+
+    def __init__(self, message: str = "Request timed out.", status_code: int = None):
+        super().__init__(message, status_code)
+
+
+class NetworkError(VNDBAPIError):
+    """The connection to the API could not be established or was lost."""
+
+    def __init__(self, message: str = "Connection error.", status_code: int = None):
+        super().__init__(message, status_code)
+
+
+class LocalQueryError(VNDBAPIError):
+    """A query cannot be answered from locally held entities."""
+
+    def __init__(self, message: str = "Query cannot be answered from local data.", status_code: int = None):
+        super().__init__(message, status_code)
 
 
 # You could also add more specific errors if needed, e.g., for "Too much data selected"
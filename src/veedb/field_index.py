@@ -0,0 +1,123 @@
+# src/veedb/field_index.py
+"""
+Lookup structures over the dotted field paths of one endpoint.
+
+`FilterValidator` checks every predicate of a filter against the fields of
+its endpoint and suggests corrections for unknown ones. A `FieldIndex`
+answers membership from a hash set and keeps a prefix trie of path
+segments. Suggestions correct a misspelled segment among its siblings in
+the trie; paths the trie cannot repair (a missing dot, several broken
+segments) are matched with `difflib.get_close_matches` over the fields
+a bigram index finds similar enough.
+"""
+from difflib import get_close_matches
+from typing import Dict, Iterable, List, Optional, Set
+
+# Trie nodes map a path segment to the child node; this key marks a complete path.
+_END = None
+
+# Suggestion candidates need at least this Dice coefficient of bigrams with the
+# misspelled field. Close matches of typical typos (up to three edits) score
+# 0.3 and more, well clear of the fields difflib would reject.
+MIN_BIGRAM_SIMILARITY = 0.25
+
+
+def _bigrams(text: str) -> Set[str]:
+    padded = f"^{text}$"  # the first and last characters count as bigrams of their own
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+class FieldIndex:
+    """
+    Set, trie and bigram index over a collection of dotted field paths.
+
+    Built once per endpoint and schema version; read-only afterwards.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields: List[str] = sorted(set(fields))
+        self._set = frozenset(self.fields)
+        self._trie: Dict = {}
+        self._grams: Dict[str, List[int]] = {}
+        self._gram_counts: List[int] = []
+        for number, path in enumerate(self.fields):
+            node = self._trie
+            for segment in path.split("."):
+                node = node.setdefault(segment, {})
+            node[_END] = True
+            grams = _bigrams(path)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._grams.setdefault(gram, []).append(number)
+
+    def __contains__(self, path: object) -> bool:
+        return isinstance(path, str) and path in self._set
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def _node(self, path: str) -> Optional[Dict]:
+        node = self._trie
+        for segment in path.split("."):
+            node = node.get(segment)
+            if node is None:
+                return None
+        return node
+
+    def has_prefix(self, path: str) -> bool:
+        """Whether `path` is a field or the parent of nested fields."""
+        return self._node(path) is not None
+
+    def children(self, path: str = "") -> List[str]:
+        """The sorted names of the fields directly below `path` ("" for the top level)."""
+        node = self._trie if not path else self._node(path)
+        if node is None:
+            return []
+        return sorted(segment for segment in node if segment is not _END)
+
+    def suggest(self, field: str, n: int = 3, cutoff: float = 0.7) -> List[str]:
+        """
+        Up to `n` existing fields close to a misspelled one.
+
+        The path is walked segment by segment through the trie; a segment
+        that does not exist is replaced by its close matches among the
+        siblings, so only the names at one level are compared. If that
+        yields nothing, the whole path is matched against the fields whose
+        bigrams overlap enough with it (see `MIN_BIGRAM_SIMILARITY`).
+        """
+        found: List[str] = []
+        self._correct(self._trie, field.split("."), "", n, cutoff, found)
+        if found:
+            return found
+        grams = _bigrams(field)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for number in self._grams.get(gram, ()):
+                shared[number] = shared.get(number, 0) + 1
+        gram_counts = self._gram_counts
+        candidates = [
+            self.fields[number] for number, count in shared.items()
+            if 2 * count >= MIN_BIGRAM_SIMILARITY * (len(grams) + gram_counts[number])
+        ]
+        return get_close_matches(field, candidates, n=n, cutoff=cutoff)
+
+    def _correct(self, node: Dict, segments: List[str], prefix: str, n: int, cutoff: float, found: List[str]) -> None:
+        if not segments:
+            if _END in node:
+                found.append(prefix)
+            return
+        segment = segments[0]
+        if segment in node:
+            names = [segment]
+        else:
+            names = get_close_matches(segment, [name for name in node if name is not _END], n=n, cutoff=cutoff)
+        for name in names:
+            if len(found) >= n:
+                return
+            self._correct(node[name], segments[1:], f"{prefix}.{name}" if prefix else name, n, cutoff, found)
+
+    def __repr__(self) -> str:
+        return f"FieldIndex(fields={len(self.fields)})"
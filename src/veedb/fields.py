@@ -0,0 +1,136 @@
+# src/veedb/fields.py
+"""
+Parsing of the `fields` selection string of a `QueryRequest`.
+
+The kana API accepts a comma-separated list of fields where nested fields
+are written with dots (``image.url``) or grouped with braces
+(``image{url,dims}``, ``vns{title,developers{name}}``). Both spellings
+select the same data, so everything here works on the expanded, sorted
+list of dotted leaf paths.
+"""
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from .exceptions import InvalidRequestError
+
+SelectionTree = Dict[str, Optional["SelectionTree"]]
+
+
+class _FieldsParser:
+    def __init__(self, text: str):
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str) -> InvalidRequestError:
+        return InvalidRequestError(f"Invalid fields selection {self.text!r} at position {self.pos}: {message}")
+
+    def skip_spaces(self) -> None:
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self) -> str:
+        self.skip_spaces()
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def name(self) -> str:
+        self.skip_spaces()
+        start = self.pos
+        while self.pos < len(self.text) and (self.text[self.pos].isalnum() or self.text[self.pos] == "_"):
+            self.pos += 1
+        if start == self.pos:
+            raise self.error("expected a field name")
+        return self.text[start:self.pos]
+
+    def selection(self, prefix: str, paths: list) -> None:
+        while True:
+            path = prefix + self.name()
+            while self.peek() == ".":
+                self.pos += 1
+                path += "." + self.name()
+            if self.peek() == "{":
+                self.pos += 1
+                self.selection(path + ".", paths)
+                if self.peek() != "}":
+                    raise self.error("expected '}'")
+                self.pos += 1
+            else:
+                paths.append(path)
+            if self.peek() != ",":
+                return
+            self.pos += 1
+            # Tolerate a trailing comma, e.g. "id, title,"
+            if self.peek() in ("", "}"):
+                return
+
+
+@lru_cache(maxsize=1024)
+def parse_fields(fields: str) -> Tuple[str, ...]:
+    """
+    Expand a `fields` selection into sorted, de-duplicated dotted leaf paths.
+
+    >>> parse_fields("title, image{url, dims}, id")
+    ('id', 'image.dims', 'image.url', 'title')
+
+    Raises:
+        InvalidRequestError: If the selection is syntactically invalid.
+    """
+    parser = _FieldsParser(fields)
+    paths: list = []
+    if parser.peek():
+        parser.selection("", paths)
+    if parser.peek():
+        raise parser.error(f"unexpected {parser.peek()!r}")
+    return tuple(sorted(set(paths)))
+
+
+def selection_tree(paths: Tuple[str, ...]) -> SelectionTree:
+    """Group dotted leaf paths into a nested dict; leaves map to `None`."""
+    tree: SelectionTree = {}
+    for path in paths:
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is None:
+                child = node[part] = {}
+            node = child
+        node.setdefault(parts[-1], None)
+    return tree
+
+
+def _format_tree(tree: SelectionTree) -> str:
+    parts = []
+    for name in sorted(tree):
+        subtree = tree[name]
+        if subtree:
+            inner = _format_tree(subtree)
+            parts.append(f"{name}.{inner}" if len(subtree) == 1 and "{" not in inner and "." not in inner else f"{name}{{{inner}}}")
+        else:
+            parts.append(name)
+    return ",".join(parts)
+
+
+def format_fields(paths: Tuple[str, ...]) -> str:
+    """The `fields` selection string for a set of dotted leaf paths."""
+    return _format_tree(selection_tree(paths))
+
+
+@lru_cache(maxsize=1024)
+def normalize_fields(fields: str) -> str:
+    """
+    Canonical spelling of a `fields` selection, so that equivalent selections
+    compare equal: ``"title, id, image.url"`` and ``"id,image{url},title"``
+    both become ``"id,image.url,title"``.
+    """
+    return format_fields(parse_fields(fields))
+
+
+def subselection(paths: Tuple[str, ...], name: str) -> Tuple[str, ...]:
+    """Leaf paths below the top-level field `name`, relative to it."""
+    prefix = name + "."
+    return tuple(path[len(prefix):] for path in paths if path.startswith(prefix))
+
+
+def top_level_fields(paths: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Sorted top-level field names touched by the selection."""
+    return tuple(sorted({path.split(".", 1)[0] for path in paths}))
@@ -0,0 +1,133 @@
+# src/veedb/loader.py
+"""
+DataLoader-style batching of by-ID lookups.
+
+Lookups of single entities made by many coroutines at about the same time
+(within one event-loop tick, or within `window` seconds) are merged into one
+`get_many()` call per endpoint and field selection, i.e. a single
+OR-filtered POST per 100 IDs, and every caller gets its own entity back.
+"""
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from .apitypes.common import VNDBID
+from .decoders import get_decoder
+from .exceptions import InvalidRequestError
+from .fields import normalize_fields
+from .methods.singleflight import _copy
+
+if TYPE_CHECKING:
+    from .client import _BaseEntityClient
+
+MAX_BATCH_SIZE = 100
+
+
+class _Batch:
+    def __init__(self, entity_client: "_BaseEntityClient", fields: str, raw: bool):
+        self.entity_client = entity_client
+        self.fields = fields
+        self.raw = raw
+        self.waiters: Dict[VNDBID, List[asyncio.Future]] = {}
+        self.handle: Optional[asyncio.Handle] = None
+
+
+class BatchLoader:
+    """
+    Collects by-ID lookups and resolves them with one request per batch.
+
+    A batch is keyed by entity client, normalised `fields` selection and raw
+    mode. It is sent on the next loop iteration when `window` is 0, or
+    `window` seconds after its first lookup otherwise, and as soon as it
+    holds `max_batch_size` distinct IDs.
+    """
+
+    def __init__(self, window: float = 0.0, max_batch_size: int = MAX_BATCH_SIZE):
+        """
+        Args:
+            window: Seconds to wait for more lookups before sending a batch.
+                0 batches the lookups made within one event-loop tick.
+            max_batch_size: Distinct IDs after which a batch is sent at once.
+        """
+        if window < 0:
+            raise ValueError("window must not be negative")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Tuple[Any, str, bool], _Batch] = {}
+        self._dispatching: Set[asyncio.Future] = set()
+
+        self.lookups = 0
+        self.batches = 0
+
+    @property
+    def requests_saved(self) -> int:
+        """Lookups that did not need a request of their own."""
+        return self.lookups - self.batches
+
+    def stats(self) -> Dict[str, int]:
+        return {"lookups": self.lookups, "batches": self.batches, "requests_saved": self.requests_saved}
+
+    async def load(
+        self, entity_client: "_BaseEntityClient", vndb_id: VNDBID, fields: str = "id", raw: bool = False
+    ) -> Any:
+        """Look up one entity, batched with concurrent lookups. Returns `None` if it does not exist."""
+        try:
+            fields_key = normalize_fields(fields or "id")
+        except InvalidRequestError:
+            fields_key = fields  # let the server report the bad selection
+        key = (entity_client, fields_key, bool(raw))
+        loop = asyncio.get_running_loop()
+
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = _Batch(entity_client, fields or "id", bool(raw))
+            if self.window > 0:
+                batch.handle = loop.call_later(self.window, self._flush, key)
+            else:
+                batch.handle = loop.call_soon(self._flush, key)
+
+        future = loop.create_future()
+        batch.waiters.setdefault(vndb_id, []).append(future)
+        self.lookups += 1
+        if len(batch.waiters) >= self.max_batch_size:
+            batch.handle.cancel()
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[Any, str, bool]) -> None:
+        batch = self._pending.pop(key, None)
+        if batch is None:
+            return
+        self.batches += 1
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._dispatching.add(task)
+        task.add_done_callback(self._dispatching.discard)
+
+    async def _dispatch(self, batch: _Batch) -> None:
+        entity_client = batch.entity_client
+        try:
+            # Fetched as dicts so that every waiter can get an entity of its own.
+            found = await entity_client.get_many(list(batch.waiters), batch.fields, raw=True)
+        except BaseException as e:
+            for futures in batch.waiters.values():
+                for future in futures:
+                    if not future.done():
+                        if isinstance(e, asyncio.CancelledError):
+                            future.cancel()
+                        else:
+                            future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        decode = None if batch.raw else get_decoder(entity_client.query_item_dataclass, batch.fields)
+        for vndb_id, futures in batch.waiters.items():
+            data = found.get(vndb_id)
+            for index, future in enumerate(futures):
+                if future.done():
+                    continue
+                item = data if index == 0 or data is None else _copy(data)
+                future.set_result(item if decode is None or item is None else decode(item))
+
+    def __repr__(self) -> str:
+        return f"BatchLoader(window={self.window}, lookups={self.lookups}, batches={self.batches})"
@@ -0,0 +1,320 @@
+# src/veedb/local_query.py
+"""
+Evaluation of queries against locally held entities.
+
+`run_query` answers a `QueryRequest` from result dicts (or entity
+dataclasses) already at hand, such as the contents of an `EntityCache` or
+`LocalMirror`: it filters them with the same filter lists the API accepts,
+then sorts, pages and projects them to the requested `fields` like the
+server does.
+
+Filters are mapped to the fields they test (``lang`` on /vn tests
+``languages``); predicates on a multi-valued field hold if any value
+matches, and ``!=`` is the negation of ``=``. Entity filters
+(``["developer", "=", [...]]``) run the nested filter against the related
+objects. Differences from the server:
+
+- ``tag`` and ``trait`` only match directly applied tags and traits, not
+  their parents (the tag tree is not available locally);
+- ``search`` (and the local-only ``~`` operator) is a case-insensitive
+  substring match on the titles and names, and ``searchrank`` cannot be
+  sorted on;
+- a filter or selection on a field the data does not hold raises
+  `LocalQueryError`, so the caller can fall back to the API.
+"""
+import dataclasses
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .apitypes.common import QueryRequest, QueryResponse
+from .entity_cache import _project
+from .exceptions import InvalidRequestError, LocalQueryError
+from .fields import parse_fields, selection_tree
+
+OPERATORS = ("=", "!=", ">=", ">", "<=", "<", "~")
+
+# How a filter tests its field: compare the values, test for a non-empty
+# value, match tags/traits (``[id, max spoiler, min level]``), or run a nested
+# filter of another endpoint against the related objects.
+_VALUE, _PRESENCE, _TAG, _NESTED = "value", "presence", "tag", "nested"
+
+# Filters whose field or semantics differ from a plain comparison of the
+# same-named field: name -> (kind, field path, endpoint of nested filters).
+FILTER_FIELDS: Dict[str, Dict[str, Tuple[str, str, Optional[str]]]] = {
+    "/vn": {
+        "lang": (_VALUE, "languages", None),
+        "platform": (_VALUE, "platforms", None),
+        "has_description": (_PRESENCE, "description", None),
+        "has_screenshot": (_PRESENCE, "screenshots", None),
+        "tag": (_TAG, "tags", None),
+        "dtag": (_TAG, "tags", None),
+        "developer": (_NESTED, "developers", "/producer"),
+        "staff": (_NESTED, "staff", "/staff"),
+    },
+    "/release": {
+        "lang": (_VALUE, "languages.lang", None),
+        "platform": (_VALUE, "platforms", None),
+        "medium": (_VALUE, "media.medium", None),
+        "rtype": (_VALUE, "vns.rtype", None),
+        "vn": (_NESTED, "vns", "/vn"),
+        "producer": (_NESTED, "producers", "/producer"),
+    },
+    "/character": {
+        "role": (_VALUE, "vns.role", None),
+        "trait": (_TAG, "traits", None),
+        "dtrait": (_TAG, "traits", None),
+        "vn": (_NESTED, "vns", "/vn"),
+    },
+    "/staff": {
+        "aid": (_VALUE, "aliases.aid", None),
+    },
+    "/ulist": {
+        "label": (_VALUE, "labels.id", None),
+        "vn": (_NESTED, "vn", "/vn"),
+    },
+}
+
+# Fields `search` matches against.
+SEARCH_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "/vn": ("title", "alttitle", "aliases", "titles.title", "titles.latin"),
+    "/release": ("title", "alttitle", "titles.title", "titles.latin"),
+    "/producer": ("name", "original", "aliases"),
+    "/character": ("name", "original", "aliases"),
+    "/staff": ("name", "original", "aliases.name", "aliases.latin"),
+    "/tag": ("name", "aliases"),
+    "/trait": ("name", "aliases"),
+    "/quote": ("quote",),
+    "/ulist": ("vn.title", "vn.alttitle", "vn.aliases", "vn.titles.title", "vn.titles.latin"),
+}
+
+# Sort keys of /ulist that are fields of the listed VN.
+_ULIST_SORT_FIELDS = {"title": "vn.title", "released": "vn.released", "rating": "vn.rating", "votecount": "vn.votecount"}
+
+_MISSING = object()
+
+
+def _id_number(vndb_id: Any) -> Any:
+    """The numeric part of a VNDBID (`v17` -> 17) for ordering; other values unchanged."""
+    if isinstance(vndb_id, str):
+        digits = vndb_id.lstrip("abcdefghijklmnopqrstuvwxyz")
+        if digits.isdigit() and digits != vndb_id:
+            return int(digits)
+    return vndb_id
+
+
+def _as_dict(item: Any) -> Dict[str, Any]:
+    if dataclasses.is_dataclass(item) and not isinstance(item, type):
+        return dataclasses.asdict(item)
+    return item
+
+
+def _unavailable(item: Dict[str, Any], path: str) -> LocalQueryError:
+    return LocalQueryError(f"Field '{path}' of {item.get('id', 'an entity')} is not available locally.")
+
+
+def _values(item: Dict[str, Any], path: str, flatten: bool = True) -> List[Any]:
+    """
+    The values at a dotted `path`, descending into lists of objects. With
+    `flatten`, list values at the end of the path yield their elements.
+    """
+    current: List[Any] = [item]
+    for segment in path.split("."):
+        found = []
+        for value in current:
+            if isinstance(value, list):
+                value_list = value
+            else:
+                value_list = [value]
+            for element in value_list:
+                if element is None:
+                    continue
+                if not isinstance(element, dict):
+                    raise InvalidRequestError(f"Field '{path}' has no subfield '{segment}'.")
+                child = element.get(segment, _MISSING)
+                if child is _MISSING:
+                    raise _unavailable(item, path)
+                found.append(child)
+        current = found
+    result: List[Any] = []
+    for value in current:
+        if isinstance(value, list) and flatten:
+            result.extend(value)
+        elif value is not None:
+            result.append(value)
+    return result
+
+
+def _compare(value: Any, operator: str, expected: Any) -> bool:
+    if operator == "~":
+        return isinstance(value, str) and str(expected).casefold() in value.casefold()
+    if operator == "=":
+        return value == expected
+    value, expected = _id_number(value), _id_number(expected)
+    try:
+        if operator == ">=":
+            return value >= expected
+        if operator == ">":
+            return value > expected
+        if operator == "<=":
+            return value <= expected
+        return value < expected
+    except TypeError:
+        return False
+
+
+def _tag_matches(item: Dict[str, Any], path: str, operator: str, expected: Any) -> bool:
+    if operator != "=":
+        raise InvalidRequestError(f"Operator '{operator}' is not supported for tags and traits.")
+    if isinstance(expected, list):
+        tag_id, max_spoiler, min_level = (list(expected) + [0, 0])[:3]
+    else:
+        tag_id, max_spoiler, min_level = expected, 0, 0
+    for applied in _values(item, path):
+        if not isinstance(applied, dict) or "id" not in applied:
+            raise _unavailable(item, f"{path}.id")
+        if applied["id"] != tag_id:
+            continue
+        if "spoiler" not in applied or (min_level and "rating" not in applied):
+            raise _unavailable(item, f"{path}.{'spoiler' if 'spoiler' not in applied else 'rating'}")
+        if applied["spoiler"] <= max_spoiler and (not min_level or applied["rating"] >= min_level):
+            return True
+    return False
+
+
+def _predicate(item: Dict[str, Any], endpoint: str, name: str, operator: str, expected: Any,
+               schema: Optional[Dict[str, Any]]) -> bool:
+    """Whether the predicate with operator `=` (or a comparison) holds."""
+    if name == "search":
+        names: List[Any] = []
+        paths = SEARCH_FIELDS.get(endpoint, ("title", "name"))
+        for path in paths:
+            try:
+                names.extend(_values(item, path))
+            except LocalQueryError:
+                continue  # matching on the titles that were fetched is the best we can do
+        if not names and not any(path.split(".")[0] in item for path in paths):
+            raise _unavailable(item, paths[0])
+        return any(_compare(value, "~", expected) for value in names)
+    kind, path, nested = FILTER_FIELDS.get(endpoint, {}).get(name, (_VALUE, name, None))
+    if kind == _NESTED:
+        nested = _nested_endpoint(schema, endpoint, path) or nested
+        if not isinstance(expected, list):
+            raise InvalidRequestError(f"Filter '{name}' expects a nested filter.")
+        return any(matches(related, expected, nested, schema) for related in _values(item, path))
+    if kind == _PRESENCE:
+        return any(_values(item, path)) == bool(expected)
+    if kind == _TAG:
+        return _tag_matches(item, path, operator, expected)
+    if operator in ("=", "~") or not isinstance(expected, list):
+        values = _values(item, path, flatten=not isinstance(expected, list))
+        return any(_compare(value, operator, expected) for value in values)
+    raise InvalidRequestError(f"Operator '{operator}' cannot compare '{name}' with an array.")
+
+
+def _nested_endpoint(schema: Optional[Dict[str, Any]], endpoint: str, path: str) -> Optional[str]:
+    """The endpoint `path` of `endpoint` inherits its fields from, per the schema."""
+    if schema is None:
+        return None
+    node: Any = schema.get("api_fields", {}).get(endpoint)
+    for segment in path.split("."):
+        if not isinstance(node, dict) or not isinstance(node.get(segment), dict):
+            raise InvalidRequestError(f"The schema has no related entities at '{path}' of '{endpoint}'.")
+        node = node[segment]
+    return node.get("_inherit")
+
+
+def matches(item: Any, filters: Any, endpoint: str, schema: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Whether one entity (a result dict or an entity dataclass) of `endpoint`
+    satisfies `filters`.
+
+    Args:
+        schema: The API schema; when given, entity filters are followed to
+            the endpoint the schema says the related objects belong to.
+
+    Raises:
+        InvalidRequestError: For malformed filters.
+        LocalQueryError: When a tested field is not held by the entity.
+    """
+    if not filters:
+        return True
+    item = _as_dict(item)
+    if not isinstance(filters, list) or not isinstance(filters[0], str):
+        raise InvalidRequestError(f"Invalid filter format: {filters}")
+    operator = filters[0].lower()
+    if operator in ("and", "or"):
+        if len(filters) < 3:
+            raise InvalidRequestError(f"'{operator}' filter requires at least two sub-filters.")
+        operands = (matches(item, sub_filter, endpoint, schema) for sub_filter in filters[1:])
+        return all(operands) if operator == "and" else any(operands)
+    if len(filters) != 3 or filters[1] not in OPERATORS:
+        raise InvalidRequestError(f"Invalid filter predicate: {filters}")
+    name, predicate_operator, expected = filters
+    if predicate_operator == "!=":
+        return not _predicate(item, endpoint, name, "=", expected, schema)
+    return _predicate(item, endpoint, name, predicate_operator, expected, schema)
+
+
+def _sort_key(item: Dict[str, Any], endpoint: str, sort: str) -> Any:
+    if sort == "searchrank":
+        raise LocalQueryError("Sorting by 'searchrank' needs the server.")
+    path = _ULIST_SORT_FIELDS.get(sort, sort) if endpoint == "/ulist" else sort
+    values = _values(item, path, flatten=False)
+    if not values:
+        return None
+    value = values[0]
+    return _id_number(value) if path == "id" else value
+
+
+def _check_selected(item: Dict[str, Any], paths: Iterable[str]) -> None:
+    for path in paths:
+        _values(item, path)
+
+
+def run_query(
+    items: Iterable[Any],
+    query_options: QueryRequest,
+    endpoint: str,
+    schema: Optional[Dict[str, Any]] = None,
+) -> QueryResponse[Dict[str, Any]]:
+    """
+    Answer `query_options` from `items` instead of the API.
+
+    Items are filtered with `matches`, sorted by `sort` (ties, and items
+    without a value, by id; items without a value come last either way),
+    and the `results`-sized `page` is returned as result dicts restricted
+    to `fields`, with `more` and, if asked for, `count` as the API sets them.
+
+    Raises:
+        InvalidRequestError: For malformed filters, or filters given as a
+            compact string.
+        LocalQueryError: When a filter, sort or selected field is not held
+            by the items.
+    """
+    filters = query_options.filters
+    if isinstance(filters, str):
+        raise InvalidRequestError("Local queries need filters given as a list, not a compact filter string.")
+    paths = parse_fields(query_options.fields or "id")
+    found = [item for item in map(_as_dict, items) if matches(item, filters, endpoint, schema)]
+
+    keyed = [(_sort_key(item, endpoint, query_options.sort or "id"), _id_number(item.get("id")), item) for item in found]
+    with_value = [entry for entry in keyed if entry[0] is not None]
+    without_value = [entry for entry in keyed if entry[0] is None]
+    try:
+        with_value.sort(key=lambda entry: entry[:2], reverse=query_options.reverse)
+    except TypeError:
+        raise InvalidRequestError(f"Cannot sort on '{query_options.sort}'.") from None
+    without_value.sort(key=lambda entry: entry[1], reverse=query_options.reverse)
+    ordered = [entry[2] for entry in with_value + without_value]
+
+    start = (query_options.page - 1) * query_options.results
+    page = ordered[start:start + query_options.results]
+    tree = selection_tree(tuple(paths) + ("id",))
+    results = []
+    for item in page:
+        _check_selected(item, paths)
+        results.append({key: _project(item[key], subtree) for key, subtree in tree.items() if key in item})
+    return QueryResponse(
+        results=results,
+        more=len(ordered) > start + len(page),
+        count=len(ordered) if query_options.count else None,
+    )
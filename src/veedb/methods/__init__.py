@@ -1,4 +1,8 @@
 # src/veedb/methods/__init__.py
 from .fetch import _fetch_api
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .stream import ItemStream
+from .singleflight import SingleFlight
 
-__all__ = ["_fetch_api"]
+__all__ = ["_fetch_api", "RateLimiter", "RetryPolicy", "ItemStream", "SingleFlight"]
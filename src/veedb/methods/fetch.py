@@ -1,6 +1,9 @@
 # src/veedb/methods/fetch.py
 import aiohttp
 import asyncio
+import time
+import orjson
+from email.utils import parsedate_to_datetime
 from typing import Optional, Dict, Any
 
 # Import exceptions from the main package level (src/veedb/exceptions.py)
@@ -12,6 +15,8 @@ from ..exceptions import (
     NotFoundError,
     ServerError,
     TooMuchDataSelectedError,
+    RequestTimeoutError,
+    NetworkError,
 )
 
 # Default timeout for requests. VNDB server might abort long requests sooner (e.g., >3s).
@@ -20,6 +25,28 @@ CLIENT_TIMEOUT_SECONDS = 30
 VNDB_TIMEOUT = aiohttp.ClientTimeout(total=CLIENT_TIMEOUT_SECONDS)
 
 
+def _decode_text(resp: aiohttp.ClientResponse, body: bytes) -> str:
+    """Decode a response body as text using the charset the server declared."""
+    try:
+        return body.decode(resp.charset or "utf-8", errors="replace")
+    except LookupError:  # Unknown charset
+        return body.decode("utf-8", errors="replace")
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a `Retry-After` header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
 async def _fetch_api(
     session: aiohttp.ClientSession,
     method: str,
@@ -27,9 +54,13 @@ async def _fetch_api(
     token: Optional[str] = None,
     json_payload: Optional[Dict[str, Any]] = None,
     params: Optional[Dict[str, Any]] = None,
+    raw: bool = False,
 ) -> Any:
     """
     Internal function to make API requests to VNDB and handle responses.
+
+    With `raw=True` a successful response body is returned as undecoded
+    bytes; error responses are still parsed and raised as usual.
     """
     headers = {"Content-Type": "application/json"}
     if token:
@@ -50,20 +81,19 @@ async def _fetch_api(
             if resp.status == 204:
                 return None
 
-            # Attempt to parse JSON, but prepare for plain text errors or HTML error pages
-            response_text = await resp.text()
+            # Read the body once as bytes and parse it with orjson directly;
+            # the text decode is only needed for non-JSON bodies and errors.
+            body = await resp.read()
+            if raw and 200 <= resp.status < 300:
+                return body
             try:
                 # VNDB usually returns JSON, even for errors (e.g., {"id": "error", "msg": "..."})
-                # or {"detail": "Not found."}
-                data = await resp.json(
-                    content_type=None
-                )  # Allow any content type if server misreports
-            except aiohttp.ContentTypeError:
+                # or {"detail": "Not found."}. The content type is not checked
+                # in case the server misreports it.
+                data = orjson.loads(body) if body else None
+            except orjson.JSONDecodeError:
                 # If it's not JSON, it's likely an HTML error page or a plain text error.
-                # We'll use the raw text for the error message.
                 data = None  # No structured JSON data
-            except Exception:  # Includes json.JSONDecodeError
-                data = None
 
             if 200 <= resp.status < 300:
                 if data is not None:
@@ -71,12 +101,12 @@ async def _fetch_api(
                 # If status is 2xx but no JSON data and not 204, it's unusual.
                 # However, for VNDB, successful GET/POST should return JSON.
                 # If it's a 200 with non-JSON text, it might be an issue, but we pass text.
-                return response_text
+                return _decode_text(resp, body)
 
             # Error Handling based on status code
             # Extract error message preferentially from JSON `detail` or `msg` field,
             # then from `id` and `msg` (older error format), otherwise use raw text.
-            error_message = response_text  # Default to raw text
+            error_message = _decode_text(resp, body)  # Default to raw text
             if isinstance(data, dict):
                 if "detail" in data:
                     error_message = str(data["detail"])
@@ -96,20 +126,28 @@ async def _fetch_api(
             elif resp.status == 404:
                 raise NotFoundError(error_message, resp.status)
             elif resp.status == 429:
-                raise RateLimitError(error_message, resp.status)
+                raise RateLimitError(
+                    error_message,
+                    resp.status,
+                    retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+                )
             elif resp.status >= 500:
-                raise ServerError(f"Server error: {error_message}", resp.status)
+                raise ServerError(
+                    f"Server error: {error_message}",
+                    resp.status,
+                    retry_after=_parse_retry_after(resp.headers.get("Retry-After")),
+                )
             else:
                 # For other client-side errors not specifically handled
                 raise VNDBAPIError(f"API request failed: {error_message}", resp.status)
 
     except asyncio.TimeoutError:
-        raise VNDBAPIError(
+        raise RequestTimeoutError(
             f"Request to {url} timed out after {CLIENT_TIMEOUT_SECONDS} seconds.",
             status_code=None,
         )
     except aiohttp.ClientConnectionError as e:
-        raise VNDBAPIError(f"Connection error to {url}: {e}", status_code=None)
+        raise NetworkError(f"Connection error to {url}: {e}", status_code=None)
     except aiohttp.ClientError as e:  # Catch other aiohttp client errors
         raise VNDBAPIError(
             f"AIOHTTP client error during request to {url}: {e}", status_code=None
@@ -0,0 +1,169 @@
+# src/veedb/methods/ratelimit.py
+import asyncio
+import time
+from typing import Optional
+
+# Upstream budget documented for the kana API: 200 requests per 5 minutes.
+DEFAULT_RATE_LIMIT_REQUESTS = 200
+DEFAULT_RATE_LIMIT_WINDOW = 300.0
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter that paces outgoing requests to the VNDB budget.
+
+    The bucket holds at most `burst` tokens and every request consumes one.
+    Tokens are refilled continuously at `(requests - burst) / window` per
+    second, so that no sliding window of `window` seconds ever sees more than
+    `requests` calls. Independently of the bucket, at most `max_concurrency`
+    requests may be in flight at the same time.
+
+    A single instance can be shared between several `VNDB` clients to make
+    them draw from the same budget.
+    """
+
+    def __init__(
+        self,
+        requests: Optional[int] = DEFAULT_RATE_LIMIT_REQUESTS,
+        window: float = DEFAULT_RATE_LIMIT_WINDOW,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    ):
+        """
+        Args:
+            requests: Number of requests allowed per `window`. `None` disables
+                pacing and only the concurrency cap applies.
+            window: Length of the budget window in seconds.
+            burst: Bucket capacity, i.e. how many requests may be sent back to
+                back after an idle period. Defaults to 5% of `requests`
+                (at least 1, at most 10).
+            max_concurrency: Cap on concurrently in-flight requests. `None`
+                disables the cap.
+        """
+        if requests is not None and requests < 1:
+            raise ValueError("requests must be a positive integer or None.")
+        if window <= 0:
+            raise ValueError("window must be positive.")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer or None.")
+
+        self.requests = requests
+        self.window = float(window)
+        self.max_concurrency = max_concurrency
+
+        if requests is None:
+            self.burst = 0
+            self._rate = 0.0
+        else:
+            if burst is None:
+                burst = max(1, min(10, requests // 20))
+            if burst < 1:
+                raise ValueError("burst must be at least 1.")
+            self.burst = min(burst, requests)
+            # Keep burst + refill within the window budget.
+            self._rate = max(requests - self.burst, 1) / self.window
+
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._waiting = 0
+        # Created lazily so the limiter can be built outside a running loop.
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether request pacing is active."""
+        return self.requests is not None
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available in the bucket."""
+        self._refill()
+        return self._tokens
+
+    @property
+    def fill_level(self) -> float:
+        """Bucket fill level between 0.0 (empty) and 1.0 (full). Always 1.0 when pacing is disabled."""
+        if not self.enabled:
+            return 1.0
+        # pause() drives the token count below zero; that is still an empty bucket.
+        return min(1.0, max(0.0, self.tokens / self.burst))
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers currently waiting for a token or a slot."""
+        return self._waiting
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empty the bucket so that no request is released for `seconds`.
+        Used when the server reports throttling despite local pacing.
+        """
+        if not self.enabled or seconds <= 0:
+            return
+        self._refill()
+        self._tokens = min(self._tokens, -seconds * self._rate)
+
+    async def _take_token(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock keeps waiters in FIFO order so nobody starves under load.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate)
+
+    async def acquire(self) -> None:
+        """Wait for a concurrency slot and a token."""
+        if self.max_concurrency is not None and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._waiting += 1
+        try:
+            if self._semaphore is not None:
+                await self._semaphore.acquire()
+            try:
+                if self.enabled:
+                    await self._take_token()
+            except BaseException:
+                if self._semaphore is not None:
+                    self._semaphore.release()
+                raise
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+
+    def release(self) -> None:
+        """Give back the concurrency slot taken by `acquire`."""
+        self._in_flight -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+    def __repr__(self) -> str:
+        return (
+            f"RateLimiter(requests={self.requests}, window={self.window}, burst={self.burst}, "
+            f"max_concurrency={self.max_concurrency}, fill_level={self.fill_level:.2f}, "
+            f"in_flight={self._in_flight})"
+        )
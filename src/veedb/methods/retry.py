@@ -0,0 +1,194 @@
+# src/veedb/methods/retry.py
+import asyncio
+import random
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple, TypeVar
+from urllib.parse import urlsplit
+
+from ..exceptions import VNDBAPIError, RequestTimeoutError, NetworkError
+
+T = TypeVar("T")
+
+DEFAULT_RETRY_STATUSES: FrozenSet[int] = frozenset({429, 500, 502, 503, 504})
+
+# Which requests may safely be sent more than once. `None` means every path
+# for that method; otherwise the request path must contain one of the given
+# segments. All POST endpoints of the kana API are read-only queries, and
+# PATCH/DELETE on list entries set absolute state, so repeating them is harmless.
+DEFAULT_IDEMPOTENT_REQUESTS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "GET": None,
+    "HEAD": None,
+    "OPTIONS": None,
+    "POST": None,
+    "PATCH": ("/ulist/", "/rlist/"),
+    "DELETE": ("/ulist/", "/rlist/"),
+}
+
+JITTER_MODES = ("full", "equal", "none")
+
+
+class RetryPolicy:
+    """
+    Retries throttled, failing and timed out requests with exponential backoff.
+
+    The delay before retry `n` (1-based) is `backoff_base * backoff_factor ** (n - 1)`,
+    capped at `backoff_max`, then randomised according to `jitter` so that
+    concurrent callers do not retry in lockstep:
+
+    - ``"full"``: uniform in ``[0, delay]``
+    - ``"equal"``: uniform in ``[delay / 2, delay]``
+    - ``"none"``: exactly ``delay``
+
+    When the server sends a `Retry-After` header the wait is at least that long.
+
+    Counters are kept on the policy so retry amplification can be monitored;
+    share one instance between clients to aggregate them.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_factor: float = 2.0,
+        backoff_max: float = 30.0,
+        jitter: str = "full",
+        respect_retry_after: bool = True,
+        max_retry_after: float = 300.0,
+        retry_statuses: Iterable[int] = DEFAULT_RETRY_STATUSES,
+        retry_on_timeout: bool = True,
+        retry_on_connection_error: bool = True,
+        idempotent_requests: Optional[Mapping[str, Optional[Tuple[str, ...]]]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Args:
+            max_attempts: Total attempts per request, including the first one.
+                `1` disables retries.
+            backoff_base: Delay in seconds before the first retry.
+            backoff_factor: Multiplier applied to the delay after every retry.
+            backoff_max: Upper bound for a single backoff delay.
+            jitter: One of ``"full"``, ``"equal"`` or ``"none"``.
+            respect_retry_after: Wait at least as long as the `Retry-After` header asks.
+            max_retry_after: Give up instead of waiting when `Retry-After` asks for longer.
+            retry_statuses: HTTP status codes that are retried.
+            retry_on_timeout: Retry client-side timeouts.
+            retry_on_connection_error: Retry connection failures.
+            idempotent_requests: Per-method rules for which requests may be
+                repeated, see `DEFAULT_IDEMPOTENT_REQUESTS`.
+            rng: Random generator used for jitter.
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        if jitter not in JITTER_MODES:
+            raise ValueError(f"jitter must be one of {JITTER_MODES}, got {jitter!r}.")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_on_timeout = retry_on_timeout
+        self.retry_on_connection_error = retry_on_connection_error
+        self.idempotent_requests = dict(
+            DEFAULT_IDEMPOTENT_REQUESTS if idempotent_requests is None else idempotent_requests
+        )
+        self._rng = rng or random.Random()
+
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.retries_by_reason: Dict[str, int] = {}
+
+    @property
+    def amplification(self) -> float:
+        """Average number of attempts per call (1.0 means no retries happened)."""
+        return self.attempts / self.calls if self.calls else 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the retry counters."""
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "amplification": self.amplification,
+            "retries_by_reason": dict(self.retries_by_reason),
+        }
+
+    def reset_stats(self) -> None:
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.retries_by_reason = {}
+
+    def is_idempotent(self, method: str, url: str) -> bool:
+        """Whether the request may be sent again after a failure."""
+        method = method.upper()
+        if method not in self.idempotent_requests:
+            return False
+        paths = self.idempotent_requests[method]
+        if paths is None:
+            return True
+        path = urlsplit(url).path.rstrip("/") + "/"
+        return any(segment in path for segment in paths)
+
+    def _retry_reason(self, error: VNDBAPIError) -> Optional[str]:
+        if isinstance(error, RequestTimeoutError):
+            return "timeout" if self.retry_on_timeout else None
+        if isinstance(error, NetworkError):
+            return "connection" if self.retry_on_connection_error else None
+        if error.status_code in self.retry_statuses:
+            return str(error.status_code)
+        return None
+
+    def backoff(self, retry_number: int) -> float:
+        """Jittered backoff delay before retry `retry_number` (1-based)."""
+        delay = min(self.backoff_max, self.backoff_base * self.backoff_factor ** (retry_number - 1))
+        if self.jitter == "full":
+            return self._rng.uniform(0.0, delay)
+        if self.jitter == "equal":
+            return self._rng.uniform(delay / 2, delay)
+        return delay
+
+    async def run(self, method: str, url: str, send: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call `send` until it succeeds, the error is not retryable, or attempts run out.
+        """
+        idempotent = self.is_idempotent(method, url)
+        self.calls += 1
+        attempt = 1
+        while True:
+            self.attempts += 1
+            try:
+                return await send()
+            except VNDBAPIError as error:
+                reason = self._retry_reason(error) if idempotent else None
+                if reason is None:
+                    raise
+                if attempt >= self.max_attempts:
+                    self.gave_up += 1
+                    raise
+
+                delay = self.backoff(attempt)
+                retry_after = getattr(error, "retry_after", None)
+                if self.respect_retry_after and retry_after is not None:
+                    if retry_after > self.max_retry_after:
+                        self.gave_up += 1
+                        raise
+                    delay = max(delay, retry_after)
+
+                self.retries += 1
+                self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    def __repr__(self) -> str:
+        return (
+            f"RetryPolicy(max_attempts={self.max_attempts}, backoff_base={self.backoff_base}, "
+            f"backoff_factor={self.backoff_factor}, backoff_max={self.backoff_max}, jitter={self.jitter!r}, "
+            f"retries={self.retries})"
+        )
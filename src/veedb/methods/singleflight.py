@@ -0,0 +1,108 @@
+# src/veedb/methods/singleflight.py
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import orjson
+
+DEFAULT_COALESCED_METHODS = ("GET", "POST")
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight requests.
+
+    While a request is in flight, identical calls (same method, URL,
+    canonicalised payload and params, and token) wait for it instead of
+    sending their own, and all of them receive its result or its exception.
+    The shared request only runs in the background: cancelling one caller
+    does not affect the others, and it is cancelled once no caller is left.
+
+    The caller that started the request receives its result; every caller
+    that joined it receives a private copy (bytes are shared, being
+    immutable), so mutating a `raw=True` result never affects another caller.
+    """
+
+    def __init__(self, methods: Tuple[str, ...] = DEFAULT_COALESCED_METHODS):
+        """
+        Args:
+            methods: HTTP methods eligible for coalescing. Only read-only
+                requests should be listed; VNDB uses POST for queries.
+        """
+        self.methods = tuple(method.upper() for method in methods)
+        self._in_flight: Dict[Hashable, List[Any]] = {}  # key -> [task, waiters]
+
+        self.calls = 0
+        self.saved = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "saved": self.saved, "in_flight": self.in_flight}
+
+    def reset_stats(self) -> None:
+        self.calls = 0
+        self.saved = 0
+
+    def key(
+        self,
+        method: str,
+        url: str,
+        json_payload: Optional[Dict[str, Any]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        token: Optional[str] = None,
+        *extra: Hashable,
+    ) -> Optional[Hashable]:
+        """The coalescing key of a request, or `None` if it must not be coalesced."""
+        if method.upper() not in self.methods:
+            return None
+        try:
+            payload = orjson.dumps(json_payload, option=orjson.OPT_SORT_KEYS) if json_payload is not None else None
+            query = orjson.dumps(params, option=orjson.OPT_SORT_KEYS) if params else None
+        except TypeError:  # Not JSON serialisable; send it as is.
+            return None
+        return (method.upper(), url, payload, query, token) + extra
+
+    async def do(self, key: Optional[Hashable], call: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `call`, or join the identical call already in flight under `key`."""
+        self.calls += 1
+        if key is None:
+            return await call()
+
+        entry = self._in_flight.get(key)
+        joined = entry is not None
+        if entry is None:
+            task = asyncio.ensure_future(call())
+            entry = self._in_flight[key] = [task, 0]
+
+            def forget(_: asyncio.Future) -> None:
+                if self._in_flight.get(key) is entry:
+                    del self._in_flight[key]
+
+            task.add_done_callback(forget)
+        else:
+            self.saved += 1
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                task.cancel()
+        return _copy(result) if joined else result
+
+    def __repr__(self) -> str:
+        return f"SingleFlight(calls={self.calls}, saved={self.saved}, in_flight={self.in_flight})"
+
+
+def _copy(result: Any) -> Any:
+    if result is None or isinstance(result, (bytes, str, int, float)):
+        return result
+    try:
+        return orjson.loads(orjson.dumps(result))
+    except TypeError:
+        return copy.deepcopy(result)
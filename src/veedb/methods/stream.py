@@ -0,0 +1,108 @@
+# src/veedb/methods/stream.py
+import asyncio
+from typing import Any, AsyncIterator, Callable, Generic, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def _page_results(page: Any) -> Iterable[Any]:
+    return page.results
+
+
+class ItemStream(Generic[T]):
+    """
+    Async iterator over the items of a paginated query that keeps up to
+    `prefetch` pages fetched ahead in a background task, so the next
+    request is in flight while the consumer works through the current page.
+
+    The buffer is bounded: once `prefetch` pages are waiting, fetching pauses
+    until the consumer catches up. Leaving an `async with` block (or calling
+    `aclose()`) cancels the background fetch and closes the page iterator.
+
+        async with client.vn.aiter_items(query, prefetch=2) as items:
+            async for vn in items:
+                ...
+    """
+
+    def __init__(
+        self,
+        pages: AsyncIterator[Any],
+        prefetch: int = 1,
+        items: Callable[[Any], Iterable[T]] = _page_results,
+    ):
+        """
+        Args:
+            pages: Async iterator of pages, e.g. a `query_paginated()` generator.
+            prefetch: Maximum number of fetched pages buffered ahead of the consumer.
+            items: Extracts the items from a page.
+        """
+        if prefetch < 1:
+            raise ValueError("prefetch must be at least 1")
+        self._pages = pages
+        self._prefetch = prefetch
+        self._items = items
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Future] = None
+        self._current: Iterator[T] = iter(())
+        self._closed = False
+        self.pages_fetched = 0
+
+    @property
+    def buffered_pages(self) -> int:
+        """Pages fetched but not yet handed to the consumer."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _produce(self) -> None:
+        try:
+            async for page in self._pages:
+                self.pages_fetched += 1
+                await self._queue.put((list(self._items(page)), None))
+            await self._queue.put((None, None))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._queue.put((None, e))
+        finally:
+            aclose = getattr(self._pages, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def __aiter__(self) -> "ItemStream[T]":
+        return self
+
+    async def __anext__(self) -> T:
+        while True:
+            for item in self._current:
+                return item
+            if self._closed:
+                raise StopAsyncIteration
+            if self._task is None:
+                self._queue = asyncio.Queue(maxsize=self._prefetch)
+                self._task = asyncio.ensure_future(self._produce())
+            items, error = await self._queue.get()
+            if error is not None:
+                await self.aclose()
+                raise error
+            if items is None:
+                self._closed = True
+                raise StopAsyncIteration
+            self._current = iter(items)
+
+    async def aclose(self) -> None:
+        """Stop prefetching and release the underlying page iterator."""
+        self._closed = True
+        self._current = iter(())
+        if self._task is None:
+            aclose = getattr(self._pages, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            return
+        if not self._task.done():
+            self._task.cancel()
+            await asyncio.wait([self._task])
+
+    async def __aenter__(self) -> "ItemStream[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
@@ -0,0 +1,290 @@
+# src/veedb/mirror.py
+"""
+Persistent local mirror of entities in a SQLite database (stdlib `sqlite3`).
+
+Each row holds the merged JSON of one entity, which fields it covers and
+when each of them was fetched. Attached to an `EntityCache`, the mirror is
+read through on cache misses and written through on every stored result,
+so a restarted process warms from disk instead of the network. `sync()`
+refreshes stale rows through the bulk by-ID path and picks up new entities
+with a keyset scan, resumed from where the last completed scan with the
+same filters ended.
+
+    python -m veedb.mirror sync vndb.sqlite /vn --fields "title, released, rating"
+"""
+import argparse
+import asyncio
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import orjson
+
+from .apitypes.common import QueryRequest, VNDBID
+from .entity_cache import merge_fields
+from .fields import parse_fields
+
+if TYPE_CHECKING:
+    from .client import _BaseEntityClient
+
+SYNC_CHUNK = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    endpoint   TEXT    NOT NULL,
+    id         TEXT    NOT NULL,
+    num        INTEGER NOT NULL,
+    data       BLOB    NOT NULL,
+    fetched    BLOB    NOT NULL,
+    updated_at REAL    NOT NULL,
+    PRIMARY KEY (endpoint, id)
+);
+CREATE INDEX IF NOT EXISTS entities_num ON entities (endpoint, num);
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    endpoint TEXT NOT NULL,
+    filters  BLOB NOT NULL,
+    last_id  TEXT NOT NULL,
+    PRIMARY KEY (endpoint, filters)
+);
+"""
+
+
+def _filters_key(filters: Optional[list]) -> bytes:
+    return orjson.dumps(filters or [], option=orjson.OPT_SORT_KEYS)
+
+
+def _id_number(vndb_id: VNDBID) -> int:
+    """Numeric part of a VNDBID (`v17` -> 17), the order the API sorts ids in."""
+    digits = vndb_id.lstrip("abcdefghijklmnopqrstuvwxyz")
+    return int(digits) if digits.isdigit() else 0
+
+
+class LocalMirror:
+    """
+    SQLite store of entities with their field coverage and fetch times.
+
+    Reads and writes are single indexed statements (writes are batched per
+    response page), cheap enough to run on the event loop.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: The SQLite database file; created if missing. ":memory:"
+                keeps it in memory.
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "LocalMirror":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def read(self, endpoint: str, vndb_id: VNDBID) -> Optional[Tuple[Dict[str, Any], Dict[str, float]]]:
+        """The stored entity and its field fetch times (wall clock), or `None`."""
+        row = self._conn.execute(
+            "SELECT data, fetched FROM entities WHERE endpoint = ? AND id = ?", (endpoint, vndb_id)
+        ).fetchone()
+        if row is None:
+            return None
+        return orjson.loads(row[0]), orjson.loads(row[1])
+
+    def write_many(self, endpoint: str, rows: Iterable[Tuple[VNDBID, Dict[str, Any], Dict[str, float]]]) -> None:
+        """Insert or replace `(id, data, fetched)` rows in one transaction."""
+        now = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entities (endpoint, id, num, data, fetched, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (endpoint, vndb_id, _id_number(vndb_id), orjson.dumps(data), orjson.dumps(fetched), now)
+                    for vndb_id, data, fetched in rows
+                ],
+            )
+
+    def delete(self, endpoint: Optional[str] = None, vndb_id: Optional[VNDBID] = None) -> None:
+        """Delete one entity, every entity of an endpoint, or everything."""
+        with self._conn:
+            if endpoint is not None and vndb_id is not None:
+                self._conn.execute("DELETE FROM entities WHERE endpoint = ? AND id = ?", (endpoint, vndb_id))
+            elif endpoint is not None:
+                self._conn.execute("DELETE FROM entities WHERE endpoint = ?", (endpoint,))
+                self._conn.execute("DELETE FROM sync_cursors WHERE endpoint = ?", (endpoint,))
+            else:
+                self._conn.execute("DELETE FROM entities")
+                self._conn.execute("DELETE FROM sync_cursors")
+
+    def count(self, endpoint: Optional[str] = None) -> int:
+        if endpoint is None:
+            return self._conn.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM entities WHERE endpoint = ?", (endpoint,)).fetchone()[0]
+
+    def last_id(self, endpoint: str) -> Optional[VNDBID]:
+        """The highest id stored for `endpoint`."""
+        row = self._conn.execute(
+            "SELECT id FROM entities WHERE endpoint = ? ORDER BY num DESC LIMIT 1", (endpoint,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def sync_cursor(self, endpoint: str, filters: Optional[list] = None) -> Optional[VNDBID]:
+        """
+        The last id seen by a completed `sync()` scan of `endpoint` with
+        `filters`, or `None` before the first one. Rows written by ad hoc
+        lookups do not move it, so it is not `last_id()`.
+        """
+        row = self._conn.execute(
+            "SELECT last_id FROM sync_cursors WHERE endpoint = ? AND filters = ?", (endpoint, _filters_key(filters))
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_sync_cursor(self, endpoint: str, filters: Optional[list], last_id: VNDBID) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_cursors (endpoint, filters, last_id) VALUES (?, ?, ?)",
+                (endpoint, _filters_key(filters), last_id),
+            )
+
+    def _ids(self, endpoint: str) -> Set[VNDBID]:
+        return {vndb_id for (vndb_id,) in self._conn.execute("SELECT id FROM entities WHERE endpoint = ?", (endpoint,))}
+
+    def iter_fetched(self, endpoint: str) -> Iterator[Tuple[VNDBID, Dict[str, float]]]:
+        for vndb_id, fetched in self._conn.execute(
+            "SELECT id, fetched FROM entities WHERE endpoint = ? ORDER BY num", (endpoint,)
+        ):
+            yield vndb_id, orjson.loads(fetched)
+
+    def iter_data(self, endpoint: str) -> Iterator[Dict[str, Any]]:
+        """Every stored entity of `endpoint`, in id order."""
+        for (data,) in self._conn.execute(
+            "SELECT data FROM entities WHERE endpoint = ? ORDER BY num", (endpoint,)
+        ):
+            yield orjson.loads(data)
+
+    def stale_ids(self, endpoint: str, paths: Tuple[str, ...], max_age: float) -> List[VNDBID]:
+        """Ids whose fields in `paths` are missing or older than `max_age` seconds."""
+        oldest = time.time() - max_age
+        return [
+            vndb_id for vndb_id, fetched in self.iter_fetched(endpoint)
+            if any(path != "id" and fetched.get(path, oldest) <= oldest for path in paths)
+        ]
+
+    async def sync(
+        self,
+        entity_client: "_BaseEntityClient",
+        fields: str = "id",
+        max_age: float = 24 * 3600,
+        filters: Optional[list] = None,
+        refresh: bool = True,
+        discover: bool = True,
+    ) -> Dict[str, int]:
+        """
+        Bring the mirror of one endpoint up to date.
+
+        Stored entities whose `fields` are missing or older than `max_age`
+        are re-fetched in bulk by id (entities the server no longer returns
+        are deleted), then new entities are added with a keyset scan. The
+        scan resumes after the last id the previous completed scan with the
+        same `filters` reached (`sync_cursor`); the first one covers every
+        id, since rows stored by ad hoc lookups say nothing about the ids
+        in between.
+
+        Args:
+            entity_client: The endpoint to mirror, e.g. `client.vn`.
+            fields: The fields to keep for every entity.
+            max_age: Seconds after which a stored field is refreshed.
+            filters: Restrict the keyset scan for new entities.
+            refresh: Re-fetch stale rows.
+            discover: Scan for entities not seen by the previous scan.
+
+        Returns:
+            Counts of refreshed, removed and added entities.
+        """
+        endpoint = entity_client._endpoint_path
+        paths = parse_fields(fields)
+        if "id" not in paths:
+            paths = tuple(sorted(paths + ("id",)))
+        report = {"refreshed": 0, "removed": 0, "added": 0}
+        # A client whose entity cache is backed by this mirror already writes every result here.
+        entity_cache = entity_client._client.entity_cache
+        written_through = entity_cache is not None and entity_cache.mirror is self
+
+        if refresh:
+            stale = self.stale_ids(endpoint, paths, max_age)
+            for start in range(0, len(stale), SYNC_CHUNK):
+                chunk = stale[start:start + SYNC_CHUNK]
+                found = await entity_client._fetch_by_ids(chunk, fields, True, 100, None)
+                if not written_through:
+                    self.store(endpoint, paths, found.values())
+                gone = [vndb_id for vndb_id in chunk if vndb_id not in found]
+                for vndb_id in gone:
+                    self.delete(endpoint, vndb_id)
+                report["refreshed"] += len(found)
+                report["removed"] += len(gone)
+
+        if discover:
+            query = QueryRequest(filters=filters or [], fields=fields, results=100)
+            stored = self._ids(endpoint)
+            last_id = self.sync_cursor(endpoint, filters)
+            async for page in entity_client._keyset_pages(query, True, after=last_id):
+                if not written_through:
+                    self.store(endpoint, paths, page.results)
+                report["added"] += sum(1 for item in page.results if item["id"] not in stored)
+                if page.results:
+                    last_id = page.results[-1]["id"]
+            if last_id is not None:
+                self._set_sync_cursor(endpoint, filters, last_id)  # only once the scan has completed
+        return report
+
+    def store(self, endpoint: str, paths: Tuple[str, ...], items: Iterable[Dict[str, Any]]) -> None:
+        """Merge result dicts fetched with the selection `paths` into the stored rows."""
+        now = time.time()
+        rows = []
+        for item in items:
+            vndb_id = item.get("id")
+            if vndb_id is None:
+                continue
+            stored = self.read(endpoint, vndb_id)
+            data, fetched = stored if stored is not None else ({}, {})
+            merge_fields(data, fetched, paths, item, now)
+            rows.append((vndb_id, data, fetched))
+        if rows:
+            self.write_many(endpoint, rows)
+
+    def __repr__(self) -> str:
+        return f"LocalMirror({self.path!r})"
+
+
+async def _main(argv: Optional[List[str]] = None) -> None:
+    from .client import VNDB
+
+    parser = argparse.ArgumentParser(prog="python -m veedb.mirror", description="Maintain a local VNDB mirror.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    sync = commands.add_parser("sync", help="refresh stale rows and add new entities")
+    sync.add_argument("database", help="SQLite database file")
+    sync.add_argument("endpoint", help="endpoint to mirror, e.g. /vn")
+    sync.add_argument("--fields", default="id", help="fields to keep for every entity")
+    sync.add_argument("--max-age", type=float, default=24.0, help="hours after which a row is refreshed")
+    sync.add_argument("--base-url", default=None, help="kana API endpoint")
+    args = parser.parse_args(argv)
+
+    attribute = args.endpoint.strip("/")
+    with LocalMirror(args.database) as mirror:
+        async with VNDB(base_url=args.base_url) as client:
+            entity_client = getattr(client, attribute, None)
+            if entity_client is None or not hasattr(entity_client, "_keyset_pages"):
+                parser.error(f"unknown endpoint {args.endpoint!r}")
+            report = await mirror.sync(entity_client, fields=args.fields, max_age=args.max_age * 3600)
+    print(f"{args.endpoint}: {report['refreshed']} refreshed, {report['removed']} removed, {report['added']} added")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
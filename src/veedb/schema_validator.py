@@ -1,14 +1,20 @@
 import asyncio
+import hashlib
+import marshal
 import orjson # Added for faster JSON processing
+import struct
+import sys
 import time
 import os
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, Any, List, Optional, Union, Set, Tuple
 from difflib import get_close_matches
 import aiohttp
 
 from .exceptions import InvalidRequestError, VNDBAPIError
-from .methods.fetch import _fetch_api # Ensure this import is present
+from .field_index import FieldIndex
+from .selection import check_selection
 
 # Forward declaration for type hinting
 if "VNDB" not in globals():
@@ -16,12 +22,130 @@ if "VNDB" not in globals():
     if TYPE_CHECKING:
         from .client import VNDB
 
+# Validation verdicts kept per (endpoint, filter shape, schema version). Off by
+# default: computing a shape costs about as much as validating against the
+# FieldIndex, so the memo only pays off for filters with many invalid fields.
+DEFAULT_VALIDATION_MEMO_SIZE = 0
+
+# Binary snapshot of each schema file, kept in the cache directory: a header,
+# then the marshalled parsed schema and its flattened per-endpoint field lists.
+SNAPSHOT_MAGIC = b"VEEDBSCH"
+SNAPSHOT_FORMAT = 2
+# magic, format, Python major/minor and marshal version that wrote it,
+# sha256 of the schema file, size and mtime_ns of the schema file
+_SNAPSHOT_HEADER = struct.Struct(">8sHBBB32sqq")
+_SNAPSHOT_WRITER = (sys.version_info[0], sys.version_info[1], marshal.version)
+
+
+def extract_fields(schema: Dict[str, Any], endpoint: str) -> List[str]:
+    """Recursively extract all valid field names for an endpoint, including nested ones."""
+    all_fields: Set[str] = set()
+    
+    def recurse(obj: Dict[str, Any], prefix: str, full_schema: Dict[str, Any], visited_endpoints: Set[str]):
+        if "_inherit" in obj:
+            inherited_endpoint = obj["_inherit"]
+            if inherited_endpoint in visited_endpoints:
+                return  # Break recursion
+            
+            if inherited_endpoint in full_schema["api_fields"]:
+                new_visited = visited_endpoints | {inherited_endpoint}
+                recurse(full_schema["api_fields"][inherited_endpoint], prefix, full_schema, new_visited)
+
+        for key, value in obj.items():
+            if key == "_inherit":
+                continue
+            
+            new_prefix = f"{prefix}.{key}" if prefix else key
+            all_fields.add(new_prefix)
+
+            if isinstance(value, dict):
+                # Pass the original visited_endpoints set for parallel branches
+                recurse(value, new_prefix, full_schema, visited_endpoints)
+
+    api_fields = schema.get("api_fields", {})
+    if endpoint in api_fields:
+        initial_visited = {endpoint}
+        recurse(api_fields[endpoint], "", schema, initial_visited)
+
+    return sorted(list(all_fields))
+
+
+def filter_shape(filters: Any) -> Any:
+    """
+    Hashable form of a filter with the values of its predicates stripped:
+    ``["and", ["lang", "=", "en"], ["rating", ">", 70]]`` and the same tree
+    with other values share a shape. Nodes that are not well-formed keep
+    their full text, since validation errors quote them.
+    """
+    if not isinstance(filters, list) or len(filters) < 1:
+        return ("!", repr(filters))
+    operator = filters[0].lower()
+    if operator in ("and", "or"):
+        return (operator,) + tuple(filter_shape(sub_filter) for sub_filter in filters[1:])
+    if len(filters) != 3:
+        return ("!", repr(filters))
+    field_name, predicate_operator = filters[0], filters[1]
+    return ("=", field_name, predicate_operator if isinstance(predicate_operator, str) else repr(predicate_operator))
+
+
+def _unpack_snapshot(data: bytes) -> Optional[Tuple[Dict[str, Any], Dict[str, List[str]]]]:
+    """The schema and field lists in a snapshot's payload, or None if it cannot be used."""
+    try:
+        payload = marshal.loads(data[_SNAPSHOT_HEADER.size:])
+        schema, fields = payload["schema"], payload["fields"]
+    except Exception:  # truncated or corrupt: the JSON file is the source of truth
+        return None
+    if not isinstance(schema, dict) or not isinstance(fields, dict):
+        return None
+    return schema, fields
+
+
+def _atomic_write(target_path: str, data: bytes) -> None:
+    """
+    Write a temp file next to the target and rename it over the target, so
+    other processes only ever see the old or the new file, never a partial one.
+
+    Symlinks are followed, so the file they point to is replaced, not the
+    link. The new file keeps the target's permission bits; a new target
+    gets the usual ones for the process umask.
+    """
+    target_path = os.path.realpath(target_path)
+    directory, name = os.path.split(target_path)
+    try:
+        mode: Optional[int] = os.stat(target_path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+        try:
+            # Created like open() would (0666 less the umask), unlike mkstemp's 0600.
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
 class SchemaCache:
     """
     Manages the download, caching, and retrieval of the VNDB API schema.
+
+    With `stale_grace_hours`, an expired schema keeps being served for that
+    long past its TTL while a single background download refreshes it.
     """
     
-    def __init__(self, cache_dir: str = ".veedb_cache", cache_filename: str = "schema.json", ttl_hours: float = 24.0, local_schema_path: Optional[str] = None):
+    def __init__(self, cache_dir: str = ".veedb_cache", cache_filename: str = "schema.json", ttl_hours: float = 24.0, local_schema_path: Optional[str] = None, stale_grace_hours: float = 0.0):
         # Use string paths initially to avoid any Path recursion issues
         self._cache_dir_str = str(cache_dir) if cache_dir else ".veedb_cache"
         self._cache_filename_str = str(cache_filename) if cache_filename else "schema.json"
@@ -33,7 +157,30 @@ class SchemaCache:
         self._local_schema_path = None
         
         self.ttl_seconds = ttl_hours * 3600
+        self.stale_grace_seconds = stale_grace_hours * 3600
         self._schema_data: Optional[Dict[str, Any]] = None
+        self._fields: Dict[str, List[str]] = {}  # endpoint -> flattened field names of _schema_data
+        self._indexes: Dict[str, FieldIndex] = {}  # endpoint -> index over those names
+        # sha256 (hex) of the schema file, identifying the schema version; None if unknown.
+        self.schema_hash: Optional[str] = None
+        # Bumped whenever _schema_data is replaced; identifies the schema version when there is no hash.
+        self.schema_version = 0
+        # time.monotonic() until which _schema_data is served without touching the disk.
+        self._fresh_until = 0.0
+        # Past _fresh_until, _schema_data may still be served from memory until then while a refresh is in flight.
+        self._stale_until = 0.0
+        self._refresh_task: Optional["asyncio.Task[None]"] = None
+        # The one in-flight download and disk load; concurrent callers await them instead of starting their own.
+        self._download_task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+        self._load_task: Optional["asyncio.Future[Any]"] = None
+
+        # Metrics: served fresh, served stale, downloaded while the caller waited, background refreshes.
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.last_refresh_error: Optional[BaseException] = None
 
     @property
     def cache_dir(self) -> Path:
@@ -106,8 +253,31 @@ class SchemaCache:
             return False # Local schema is not subject to TTL expiration, only manual updates
         return self.get_cache_age() > self.ttl_seconds
 
+    @property
+    def loaded_schema(self) -> Optional[Dict[str, Any]]:
+        """The schema held in memory, if one has been loaded; never touches the disk."""
+        return self._schema_data
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
     def save_schema(self, schema_data: Dict[str, Any], to_local_path: bool = False):
         """Save the schema data to the cache file or the specified local_schema_path."""
+        fields, digest = self._write_schema(schema_data, to_local_path)
+        self._remember(schema_data, age=0.0, fields=fields, digest=digest) # Update in-memory cache as well
+
+    def _write_schema(self, schema_data: Dict[str, Any], to_local_path: bool) -> Tuple[Optional[Dict[str, List[str]]], bytes]:
+        """
+        Write the schema file and its snapshot; returns the field lists and
+        the file's sha256. Blocking and free of in-memory state, so it can
+        run in a worker thread.
+        """
         target_path = self.local_schema_path if to_local_path and self.local_schema_path else self.cache_file
         if not target_path:
             # This case should ideally not be hit if logic is correct, but as a fallback:
@@ -116,11 +286,117 @@ class SchemaCache:
         target_dir = target_path.parent
         target_dir.mkdir(parents=True, exist_ok=True)
         
-        # Use orjson for writing
-        with open(target_path, 'wb') as f: # Open in binary mode for orjson
-            f.write(orjson.dumps(schema_data, option=orjson.OPT_INDENT_2))
-        self._schema_data = schema_data # Update in-memory cache as well
-        
+        # Later starts load from the snapshot, so the file stays human-readable.
+        body = orjson.dumps(schema_data, option=orjson.OPT_INDENT_2)
+        _atomic_write(str(target_path), body)
+        digest = hashlib.sha256(body).digest()
+        fields = self._write_snapshot(str(target_path), schema_data, digest)
+        return fields, digest
+
+    def _remember(self, schema_data: Dict[str, Any], age: float, fields: Optional[Dict[str, List[str]]] = None, digest: Optional[bytes] = None) -> None:
+        """Keep `schema_data`, `age` seconds old, as the in-memory snapshot for the rest of its TTL."""
+        self._schema_data = schema_data
+        self.schema_version += 1
+        self._fields = dict(fields) if fields else {}
+        self._indexes = {}
+        self.schema_hash = digest.hex() if digest else None
+        self._fresh_until = time.monotonic() + self.ttl_seconds - age
+        self._stale_until = self._fresh_until + self.stale_grace_seconds
+
+    def endpoint_fields(self, schema: Dict[str, Any], endpoint: str) -> List[str]:
+        """
+        The flattened field names of `endpoint`. For the current schema they
+        come precomputed from the snapshot, or are extracted once and kept.
+        """
+        if schema is not self._schema_data:
+            return extract_fields(schema, endpoint)
+        fields = self._fields.get(endpoint)
+        if fields is None:
+            fields = self._fields[endpoint] = extract_fields(schema, endpoint)
+        return fields
+
+    def field_index(self, schema: Dict[str, Any], endpoint: str) -> FieldIndex:
+        """A `FieldIndex` over `endpoint_fields()`, built once per endpoint for the current schema."""
+        if schema is not self._schema_data:
+            return FieldIndex(extract_fields(schema, endpoint))
+        index = self._indexes.get(endpoint)
+        if index is None:
+            index = self._indexes[endpoint] = FieldIndex(self.endpoint_fields(schema, endpoint))
+        return index
+
+    def _snapshot_path(self, schema_path: str) -> str:
+        """
+        Where the snapshot of the schema file at `schema_path` lives: in the
+        cache directory, never next to a user-provided file, named after the
+        source's absolute path so different sources do not collide.
+        """
+        source = os.path.abspath(schema_path)
+        stem = os.path.splitext(os.path.basename(source))[0]
+        key = hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+        return os.path.join(self._cache_dir_str, f"{stem}-{key}.snapshot")
+
+    def _write_snapshot(self, schema_path: str, schema_data: Dict[str, Any], digest: bytes, fields: Optional[Dict[str, List[str]]] = None) -> Optional[Dict[str, List[str]]]:
+        """
+        Write the binary snapshot of the schema file at `schema_path`, with
+        every endpoint's field list precomputed. Best effort: the snapshot
+        only speeds up loading, so failures leave it missing or stale.
+        """
+        try:
+            if fields is None:
+                fields = {endpoint: extract_fields(schema_data, endpoint) for endpoint in schema_data.get("api_fields", {})}
+            stat = os.stat(schema_path)
+            header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, *_SNAPSHOT_WRITER, digest, stat.st_size, stat.st_mtime_ns)
+            os.makedirs(self._cache_dir_str, exist_ok=True)
+            _atomic_write(self._snapshot_path(schema_path), header + marshal.dumps({"schema": schema_data, "fields": fields}))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+        return fields
+
+    def _load_source(self, schema_path: str) -> Optional[Tuple[Dict[str, Any], Optional[Dict[str, List[str]]], bytes]]:
+        """
+        The schema stored at `schema_path`, its field lists and its sha256.
+
+        The snapshot is used as is while the schema file has the size and
+        mtime recorded in it. Otherwise the file is read and hashed; if the
+        hash still matches, the snapshot's parsed schema is reused, else the
+        JSON is parsed and the snapshot rewritten. A snapshot written by
+        another Python version, or one that does not unmarshal, is ignored.
+        """
+        snapshot = None
+        try:
+            with open(self._snapshot_path(schema_path), 'rb') as f:
+                data = f.read()
+            magic, version, major, minor, marshal_version, digest, size, mtime_ns = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic == SNAPSHOT_MAGIC and version == SNAPSHOT_FORMAT and (major, minor, marshal_version) == _SNAPSHOT_WRITER:
+                snapshot = (digest, size, mtime_ns, data)
+        except (OSError, struct.error):
+            pass
+
+        try:
+            stat = os.stat(schema_path)
+            if snapshot and (snapshot[1], snapshot[2]) == (stat.st_size, stat.st_mtime_ns):
+                unpacked = _unpack_snapshot(snapshot[3])
+                if unpacked is not None:
+                    return unpacked[0], unpacked[1], snapshot[0]
+            with open(schema_path, 'rb') as f: # Open in binary mode for orjson
+                body = f.read()
+        except OSError:
+            return None
+        digest = hashlib.sha256(body).digest()
+        unpacked = _unpack_snapshot(snapshot[3]) if snapshot and snapshot[0] == digest else None
+        if unpacked is not None:
+            schema, fields = unpacked
+        else:
+            fields = None
+            try:
+                schema = orjson.loads(body)
+            except ValueError:
+                return None
+            if not isinstance(schema, dict):
+                return None
+        fields = self._write_snapshot(schema_path, schema, digest, fields)
+        return schema, fields, digest
+
     def load_schema(self) -> Optional[Dict[str, Any]]:
         """Load the schema data from the local_schema_path (if provided) or the cache file."""
         if self._local_schema_path_str and os.path.isfile(self._local_schema_path_str):
@@ -152,39 +428,116 @@ class SchemaCache:
     def invalidate_cache(self):
         """Remove the cache file. Does not remove user-provided local_schema_path."""
         self._schema_data = None
-        try:
-            cache_path = os.path.join(self._cache_dir_str, self._cache_filename_str)
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
-        except FileNotFoundError:
-            pass
+        self._fields = {}
+        self._indexes = {}
+        self.schema_hash = None
+        self._fresh_until = 0.0
+        self._stale_until = 0.0
+        cache_path = os.path.join(self._cache_dir_str, self._cache_filename_str)
+        for path in (cache_path, self._snapshot_path(cache_path)):
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
 
     async def get_schema(self, client: 'VNDB', force_download: bool = False) -> Dict[str, Any]:
         """
         Get the schema. Prioritizes local_schema_path, then cache, then download.
         If force_download is True, it will download and update the primary schema location.
+
+        Once loaded, the schema is served from memory, checked against a
+        monotonic deadline only, until its TTL runs out or `invalidate_cache()`
+        is called; only then is the disk (or the API) consulted again.
         """
         if force_download:
-            schema = await self._download_schema(client)
-            # Save to local_schema_path if it's configured, otherwise to default cache file
-            self.save_schema(schema, to_local_path=bool(self.local_schema_path))
-            return schema
-        
-        if self._schema_data and not self.is_cache_expired() and not (self.local_schema_path and self.local_schema_path.is_file()):
-            # Use in-memory if not expired AND not primarily using a local file (which would be loaded directly)
-            return self._schema_data
+            return await self._shared_download(client)
+
+        if self._schema_data is not None:
+            now = time.monotonic()
+            if now < self._fresh_until:
+                self.hits += 1
+                return self._schema_data
+            if now < self._stale_until and self._refresh_task is not None and not self._refresh_task.done():
+                # Already revalidating; keep answering from memory until the refresh lands.
+                self.stale_hits += 1
+                return self._schema_data
             
-        loaded_schema = self.load_schema() # Tries local_schema_path first, then cache_file
-        if loaded_schema and not self.is_cache_expired(): # is_cache_expired is aware of local_schema_path
-            self._schema_data = loaded_schema
+        loaded_schema, age, fields, digest = await self._shared_load()
+        if loaded_schema and age <= self.ttl_seconds: # same check as is_cache_expired()
+            self._remember(loaded_schema, age=age, fields=fields, digest=digest)
+            self.hits += 1
+            return loaded_schema
+
+        if loaded_schema and self.stale_grace_seconds > 0 and age <= self.ttl_seconds + self.stale_grace_seconds:
+            # Stale-while-revalidate: answer now, refresh in the background.
+            self._remember(loaded_schema, age=age, fields=fields, digest=digest)  # already past its deadline
+            self.stale_hits += 1
+            self._revalidate(client)
             return loaded_schema
 
         # If local schema was specified but not found or failed to load, or cache expired/not found
+        self.misses += 1
+        return await self._shared_download(client)
+
+    async def warm_up(self, client: 'VNDB') -> None:
+        """Load (or download) the schema ahead of the first validation, e.g. at startup."""
+        await self.get_schema(client)
+
+    def _read_from_disk(self) -> Tuple[Optional[Dict[str, Any]], float, Optional[Dict[str, List[str]]], Optional[bytes]]:
+        """
+        The schema on disk, its age in seconds, its field lists and hash.
+        Tries local_schema_path first, then the cache file. Blocking; runs in a worker thread.
+        """
+        sources = [self._local_schema_path_str] if self._local_schema_path_str and os.path.isfile(self._local_schema_path_str) else []
+        sources.append(os.path.join(self._cache_dir_str, self._cache_filename_str))
+        for source in sources:
+            loaded = self._load_source(source)
+            if loaded is not None:
+                schema, fields, digest = loaded
+                return schema, self.get_cache_age(), fields, digest
+        return None, float('inf'), None, None  # unreadable or not a schema object; treat as missing
+
+    def _shared_load(self) -> "asyncio.Future[Tuple[Optional[Dict[str, Any]], float, Optional[Dict[str, List[str]]], Optional[bytes]]]":
+        """
+        Read and parse the schema file in the default executor, keeping file
+        I/O off the event loop. Overlapping callers share one read.
+        """
+        if self._load_task is None or self._load_task.done():
+            loop = asyncio.get_running_loop()
+            self._load_task = asyncio.ensure_future(loop.run_in_executor(None, self._read_from_disk))
+        return asyncio.shield(self._load_task)
+
+    def _shared_download(self, client: 'VNDB') -> "asyncio.Future[Dict[str, Any]]":
+        """
+        Download and save the schema, or join the download already in flight,
+        so concurrent cold callers cause exactly one request and one write.
+        Shielded: a cancelled caller does not cancel the download for the others.
+        """
+        if self._download_task is None or self._download_task.done():
+            self._download_task = asyncio.ensure_future(self._download_and_save(client))
+        return asyncio.shield(self._download_task)
+
+    async def _download_and_save(self, client: 'VNDB') -> Dict[str, Any]:
         schema = await self._download_schema(client)
         # Save to local_schema_path if it's configured, otherwise to default cache file
-        self.save_schema(schema, to_local_path=bool(self.local_schema_path))
+        fields, digest = await asyncio.get_running_loop().run_in_executor(None, self._write_schema, schema, bool(self.local_schema_path))
+        self._remember(schema, age=0.0, fields=fields, digest=digest)  # on the loop, never from the worker thread
         return schema
 
+    def _revalidate(self, client: 'VNDB') -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(client))
+
+    async def _refresh(self, client: 'VNDB') -> None:
+        try:
+            await self._shared_download(client)
+            self.refreshes += 1
+        except Exception as e:
+            # The stale schema keeps being served until the grace period ends.
+            self.refresh_failures += 1
+            self.last_refresh_error = e
+
     async def update_local_schema_from_api(self, client: 'VNDB') -> Dict[str, Any]:
         """Forces a download of the schema and saves it to local_schema_path if configured, else to cache."""
         if not self.local_schema_path:
@@ -199,12 +552,10 @@ class SchemaCache:
         try:
             # Call the API directly to avoid recursion - do NOT call client.get_schema()
             url = f"{client.base_url}/schema"
-            session = client._get_session()
             
-            # Use the imported _fetch_api
+            # Go through the client so the request is rate limited like any other.
             # The schema endpoint typically does not require a token.
-            response_data = await _fetch_api(
-                session=session,
+            response_data = await client._request(
                 method="GET",
                 url=url,
                 token=None # Explicitly None for public schema endpoint
@@ -232,12 +583,10 @@ class SchemaCache:
         try:
             # Call the API directly to avoid recursion - do NOT call client.get_schema()
             url = f"{client.base_url}/schema"
-            session = client._get_session()
             
-            # Use the imported _fetch_api
+            # Go through the client so the request is rate limited like any other.
             # The schema endpoint typically does not require a token.
-            response_data = await _fetch_api(
-                session=session,
+            response_data = await client._request(
                 method="GET",
                 url=url,
                 token=None # Explicitly None for public schema endpoint
@@ -255,49 +604,29 @@ class FilterValidator:
     """
     Validates filter expressions against the VNDB API schema.
     """
-    def __init__(self, schema_cache: Optional[SchemaCache] = None, local_schema_path: Optional[str] = None):
+    def __init__(self, schema_cache: Optional[SchemaCache] = None, local_schema_path: Optional[str] = None, memo_size: int = DEFAULT_VALIDATION_MEMO_SIZE):
         self.schema_cache = schema_cache or SchemaCache(local_schema_path=local_schema_path)
-        self._field_cache: Dict[str, List[str]] = {}
+        # Verdicts only depend on the fields and structure of a filter, not on its values,
+        # so they can be memoised per filter shape; memo_size > 0 enables the memo.
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[Tuple[str, Any, Any], Tuple[bool, Tuple[str, ...], Tuple[str, ...]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._memo), "hits": self.hits, "misses": self.misses}
+
+    def clear_memo(self) -> None:
+        self._memo.clear()
 
     def _extract_fields(self, schema: Dict[str, Any], endpoint: str) -> List[str]:
-        """Recursively extract all valid field names for an endpoint, including nested ones."""
-        if endpoint in self._field_cache:
-            return self._field_cache[endpoint]
+        """All valid field names for an endpoint, including nested ones (precomputed per schema by the cache)."""
+        return self.schema_cache.endpoint_fields(schema, endpoint)
 
-        all_fields: Set[str] = set()
-        
-        def recurse(obj: Dict[str, Any], prefix: str, full_schema: Dict[str, Any], visited_endpoints: Set[str]):
-            if "_inherit" in obj:
-                inherited_endpoint = obj["_inherit"]
-                if inherited_endpoint in visited_endpoints:
-                    return  # Break recursion
-                
-                if inherited_endpoint in full_schema["api_fields"]:
-                    new_visited = visited_endpoints | {inherited_endpoint}
-                    recurse(full_schema["api_fields"][inherited_endpoint], prefix, full_schema, new_visited)
-
-            for key, value in obj.items():
-                if key == "_inherit":
-                    continue
-                
-                new_prefix = f"{prefix}.{key}" if prefix else key
-                all_fields.add(new_prefix)
-
-                if isinstance(value, dict):
-                    # Pass the original visited_endpoints set for parallel branches
-                    recurse(value, new_prefix, full_schema, visited_endpoints)
-
-        api_fields = schema.get("api_fields", {})
-        if endpoint in api_fields:
-            initial_visited = {endpoint}
-            recurse(api_fields[endpoint], "", schema, initial_visited)
-
-        field_list = sorted(list(all_fields))
-        self._field_cache[endpoint] = field_list
-        return field_list
-
-    def suggest_fields(self, field: str, available_fields: List[str]) -> List[str]:
+    def suggest_fields(self, field: str, available_fields: Union[List[str], FieldIndex]) -> List[str]:
         """Suggest corrections for a misspelled field name."""
+        if isinstance(available_fields, FieldIndex):
+            return available_fields.suggest(field, n=3, cutoff=0.7)
         return get_close_matches(field, available_fields, n=3, cutoff=0.7)
 
     async def get_available_fields(self, endpoint: str, client: 'VNDB') -> List[str]:
@@ -305,6 +634,23 @@ class FilterValidator:
         schema = await self.schema_cache.get_schema(client) # Removed force_download=False, get_schema handles logic
         return self._extract_fields(schema, endpoint)
 
+    async def get_field_index(self, endpoint: str, client: 'VNDB') -> FieldIndex:
+        """The `FieldIndex` over the fields of `endpoint`."""
+        schema = await self.schema_cache.get_schema(client)
+        return self.schema_cache.field_index(schema, endpoint)
+
+    async def validate_fields(self, endpoint: str, fields: str, client: 'VNDB') -> Dict[str, Any]:
+        """
+        Validate a `fields` selection for a given endpoint, including nested
+        (``a.b{c,d}``) and inherited fields.
+
+        Returns:
+            A dictionary with `valid`, `errors`, `suggestions` and the
+            estimated relative `weight` of one result (see `veedb.selection`).
+        """
+        schema = await self.schema_cache.get_schema(client)
+        return check_selection(schema, endpoint, fields)
+
     async def list_endpoints(self, client: 'VNDB') -> List[str]:
         """List all available API endpoints from the schema."""
         schema = await self.schema_cache.get_schema(client) # Removed force_download=False
@@ -314,13 +660,33 @@ class FilterValidator:
         """
         Validate a filter expression for a given endpoint.
 
+        With `memo_size` set, verdicts are memoised per endpoint, schema
+        version and filter shape (see `filter_shape`), so revalidating a
+        filter that only differs in its values is a dictionary lookup.
+
         Returns:
             A dictionary containing the validation result.
         """
         if not filters:
             return {'valid': True, 'errors': [], 'suggestions': [], 'available_fields': []}
             
-        available_fields = await self.get_available_fields(endpoint, client)
+        schema = await self.schema_cache.get_schema(client)
+        index = self.schema_cache.field_index(schema, endpoint)
+        key = None
+        if self.memo_size > 0:
+            key = (endpoint, filter_shape(filters), self.schema_cache.schema_hash or self.schema_cache.schema_version)
+            verdict = self._memo.get(key)
+            if verdict is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return {
+                    'valid': verdict[0],
+                    'errors': list(verdict[1]),
+                    'suggestions': list(verdict[2]),
+                    'available_fields': index.fields
+                }
+            self.misses += 1
+
         errors: List[str] = []
         suggestions: Set[str] = set()
 
@@ -342,17 +708,22 @@ class FilterValidator:
                     return
 
                 field_name = current_filter[0]
-                if field_name not in available_fields:
+                if field_name not in index:
                     errors.append(f"Invalid field '{field_name}' for endpoint '{endpoint}'.")
-                    field_suggestions = self.suggest_fields(field_name, available_fields)
+                    field_suggestions = self.suggest_fields(field_name, index)
                     if field_suggestions:
                         suggestions.update(field_suggestions)
 
         _validate_recursive(filters)
 
+        if key is not None:
+            self._memo[key] = (not errors, tuple(errors), tuple(sorted(suggestions)))
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
         return {
             'valid': not errors,
             'errors': errors,
             'suggestions': sorted(list(suggestions)),
-            'available_fields': available_fields
+            'available_fields': index.fields
         }
\ No newline at end of file
@@ -0,0 +1,97 @@
+# src/veedb/selection.py
+"""
+Pre-flight checks of a `fields` selection against the API schema.
+
+`schema["api_fields"]` describes every endpoint as nested objects whose
+leaves are `None`; an ``"_inherit": "/endpoint"`` key pulls in all fields of
+another endpoint (``developers`` on /vn selects /producer fields). Paths of
+the parsed selection are resolved segment by segment through that tree, so
+recursive inheritance such as ``relations.relations.title`` needs no
+flattening.
+
+The weight of a selection is a rough, relative estimate of the response
+size per result: every selected leaf counts 1, multiplied by an assumed
+fan-out for each nested level it sits under.
+"""
+from difflib import get_close_matches
+from typing import Any, Dict, List, Set
+
+from .exceptions import InvalidRequestError
+from .fields import parse_fields
+
+# Assumed number of items behind one nested level, for the weight estimate.
+ENTITY_FANOUT = 10.0  # objects with `_inherit` are usually lists of entities (tags, staff, relations)
+OBJECT_FANOUT = 2.0  # other objects are single values (image) or short lists (titles)
+
+
+def _members(api_fields: Dict[str, Any], node: Dict[str, Any], seen: tuple = ()) -> Dict[str, Any]:
+    """The fields of an object, its own ones overriding the inherited ones."""
+    target = node.get("_inherit")
+    if target is None:
+        return node
+    members: Dict[str, Any] = {}
+    if target in api_fields and target not in seen:
+        members.update(_members(api_fields, api_fields[target], seen + (target,)))
+    members.update((name, value) for name, value in node.items() if name != "_inherit")
+    return members
+
+
+def check_selection(schema: Dict[str, Any], endpoint: str, fields: str) -> Dict[str, Any]:
+    """
+    Validate a `fields` selection for `endpoint` against `schema`.
+
+    Returns:
+        A dictionary like `FilterValidator.validate_filters` returns, with
+        `valid`, `errors` and `suggestions`, plus `weight`, the estimated
+        relative size of one result with this selection.
+    """
+    api_fields = schema.get("api_fields", {})
+    if endpoint not in api_fields:
+        return {'valid': False, 'errors': [f"Unknown endpoint '{endpoint}'."], 'suggestions': [], 'weight': 0.0}
+    try:
+        paths = parse_fields(fields)
+    except InvalidRequestError as e:
+        return {'valid': False, 'errors': [str(e)], 'suggestions': [], 'weight': 0.0}
+
+    errors: List[str] = []
+    suggestions: Set[str] = set()
+    weight = 0.0
+    resolved: Dict[int, Dict[str, Any]] = {}  # id(object) -> its members, per call
+    reported: Set[str] = set()  # bad prefixes already reported, e.g. once for every leaf of 'editions{eid,name}'
+
+    for path in paths:
+        node: Any = api_fields[endpoint]
+        factor = 1.0
+        prefix = ""
+        for depth, segment in enumerate(path.split(".")):
+            if not isinstance(node, dict):
+                if prefix not in reported:
+                    reported.add(prefix)
+                    errors.append(f"Field '{prefix[:-1]}' of endpoint '{endpoint}' has no subfields (selected '{path}').")
+                break
+            members = resolved.get(id(node))
+            if members is None:
+                members = resolved[id(node)] = _members(api_fields, node)
+            if segment not in members:
+                if prefix + segment not in reported:
+                    reported.add(prefix + segment)
+                    errors.append(f"Unknown field '{prefix}{segment}' for endpoint '{endpoint}'.")
+                    suggestions.update(prefix + name for name in get_close_matches(segment, list(members), n=3, cutoff=0.7))
+                break
+            if depth:
+                factor *= ENTITY_FANOUT if "_inherit" in node else OBJECT_FANOUT
+            node = members[segment]
+            prefix += segment + "."
+        else:
+            if isinstance(node, dict):
+                example = next(iter(_members(api_fields, node)), "id")
+                errors.append(f"Field '{path}' of endpoint '{endpoint}' is an object; select its subfields, e.g. '{path}.{example}'.")
+            else:
+                weight += factor
+
+    return {
+        'valid': not errors,
+        'errors': errors,
+        'suggestions': sorted(suggestions),
+        'weight': weight,
+    }
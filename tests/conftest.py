@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures: a fake VNDB API installed in place of `veedb.client._fetch_api`.
+"""
+
+import inspect
+from typing import Any, Callable, List, NamedTuple, Optional
+
+import orjson
+import pytest
+
+import veedb.client
+
+
+class Call(NamedTuple):
+    method: str
+    url: str
+    payload: Optional[dict]
+    token: Optional[str]
+    raw: bool
+
+
+class FakeAPI:
+    """
+    Records every request and answers it with `handler(call)`, which may be
+    a coroutine function and may raise. Responses are returned as fresh
+    objects per call, or as bytes when the client asks for the raw body.
+    """
+
+    def __init__(self, handler: Callable[[Call], Any]):
+        self.handler = handler
+        self.calls: List[Call] = []
+        self.in_flight = 0
+        self.peak = 0
+
+    @property
+    def payloads(self) -> List[Optional[dict]]:
+        return [call.payload for call in self.calls]
+
+    async def __call__(self, session, method, url, token=None, json_payload=None, params=None, raw=False):
+        call = Call(method, url, json_payload, token, raw)
+        self.calls.append(call)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            data = self.handler(call)
+            if inspect.isawaitable(data):
+                data = await data
+        finally:
+            self.in_flight -= 1
+        body = data if isinstance(data, bytes) else orjson.dumps(data)
+        return body if raw else orjson.loads(body)
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    """`fake_api(handler)` installs a `FakeAPI` answering with `handler` and returns it."""
+    def install(handler: Callable[[Call], Any]) -> FakeAPI:
+        api = FakeAPI(handler)
+        monkeypatch.setattr(veedb.client, "_fetch_api", api)
+        return api
+
+    return install
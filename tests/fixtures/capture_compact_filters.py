@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Capture the compact form the live API gives a few filters, for
+`test_compact.test_captured_server_forms`.
+
+    PYTHONPATH=src python tests/fixtures/capture_compact_filters.py
+
+Writes `compact_filters.json` next to this file: a list of
+``{"endpoint", "filters", "compact"}`` objects. `VEEDB_BASE_URL` selects the
+server as it does for the client.
+"""
+import asyncio
+import os
+
+import orjson
+
+from veedb import VNDB, QueryRequest
+
+# Together these use every feature of the format: each integer width, negative
+# numbers, escaped string characters, arrays, nested queries and both groups.
+FILTERS = [
+    ("/vn", ["lang", "=", "en"]),
+    ("/vn", ["id", ">=", "v12000"]),
+    ("/vn", ["or"] + [["id", "=", f"v{n}"] for n in (1, 17, 90, 4500, 70000)]),
+    ("/vn", ["and", ["olang", "!=", "ja"], ["tag", "=", ["g505", 2, 0]], ["platform", "=", "win"]]),
+    ("/vn", ["release", "=", ["and", ["platform", "!=", "lin"], ["released", "<", "2010-01-01"]]]),
+    ("/vn", ["search", "=", "Fate/stay night: Réalta Nua — 2"]),
+    ("/release", ["and", ["vn", "=", ["id", "=", "v17"]], ["minage", "<", 18]]),
+    ("/character", ["and", ["height", ">", 150], ["birthday", "=", [12, 25]]]),
+]
+
+OUTPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compact_filters.json")
+
+
+async def main() -> None:
+    captured = []
+    async with VNDB() as client:
+        for endpoint, filters in FILTERS:
+            entity_client = getattr(client, endpoint.strip("/"))
+            response = await entity_client.query(
+                QueryRequest(filters=filters, results=0, compact_filters=True), raw=True
+            )
+            captured.append({"endpoint": endpoint, "filters": filters, "compact": response.compact_filters})
+    with open(OUTPUT, "wb") as f:
+        f.write(orjson.dumps(captured, option=orjson.OPT_INDENT_2) + b"\n")
+    print(f"{len(captured)} compact filters written to {OUTPUT}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for fetching entities by ID with `get_many`.
+"""
+
+import asyncio
+
+import pytest
+
+from veedb import VNDB
+from veedb.apitypes.entities import Release, VN
+
+
+def _ids_in(filters):
+    if filters[0] == "or":
+        return [part[2] for part in filters[1:]]
+    assert filters[:2] == ["id", "="]
+    return [filters[2]]
+
+
+def _handler(existing):
+    async def handle(call):
+        await asyncio.sleep(0.001)
+        ids = _ids_in(call.payload["filters"])
+        assert len(ids) <= call.payload["results"] <= 100
+        results = [{"id": vndb_id, "title": f"T{vndb_id}"} for vndb_id in ids if vndb_id in existing]
+        return {"results": results, "more": False}
+
+    return handle
+
+
+@pytest.fixture
+async def client():
+    client = VNDB(rate_limit_requests=None)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_many_chunks_and_marks_missing(fake_api, client):
+    wanted = [f"v{n}" for n in range(1, 251)]
+    api = fake_api(_handler({f"v{n}" for n in range(1, 251) if n % 7}))
+    result = await client.vn.get_many(wanted + wanted[:10], fields="title")
+
+    assert list(result) == wanted
+    assert all(isinstance(vn, VN) and vn.title == f"T{vn.id}" for vn in result.values() if vn)
+    assert [vndb_id for vndb_id, vn in result.items() if vn is None] == [f"v{n}" for n in range(7, 251, 7)]
+    assert sorted(len(_ids_in(payload["filters"])) for payload in api.payloads) == [50, 100, 100]
+    assert all(payload["fields"] == "id, title" for payload in api.payloads)
+    assert api.peak == 3
+
+
+@pytest.mark.asyncio
+async def test_get_many_single_id_raw_and_concurrency(fake_api, client):
+    api = fake_api(_handler({"r1"}))
+    assert await client.release.get_many(["r1"], raw=True) == {"r1": {"id": "r1", "title": "Tr1"}}
+    assert api.payloads[0]["filters"] == ["id", "=", "r1"]
+
+    result = await client.release.get_many([f"r{n}" for n in range(1, 41)], chunk_size=5, concurrency=2)
+    assert isinstance(result["r1"], Release) and result["r2"] is None
+    assert api.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_get_many_edge_cases(fake_api, client):
+    api = fake_api(_handler(set()))
+    assert await client.character.get_many([]) == {}
+    assert api.payloads == []
+    with pytest.raises(ValueError):
+        await client.staff.get_many(["s1"], chunk_size=101)
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Tests for the query result cache.
+"""
+
+import asyncio
+import hashlib
+import sys
+
+import orjson
+import pytest
+
+from veedb import VNDB, CacheBackend, MemoryCacheBackend, QueryCache, QueryRequest, SchemaCache
+from veedb.cache import canonical_filters
+from veedb.exceptions import ServerError
+
+
+def _one_vn(call):
+    return {"results": [{"id": "v1", "title": "One", "aliases": ["a"]}], "more": False}
+
+
+@pytest.mark.asyncio
+async def test_equivalent_queries_hit_the_cache(fake_api):
+    api = fake_api(_one_vn)
+    async with VNDB(rate_limit_requests=None, query_cache=True) as client:
+        first = await client.vn.query(QueryRequest(
+            filters=["and", ["lang", "=", "en"], ["or", ["olang", "=", "ja"], ["olang", "=", "en"]]],
+            fields="title, id, aliases",
+        ))
+        second = await client.vn.query(QueryRequest(
+            filters=["and", ["or", ["olang", "=", "en"], ["olang", "=", "ja"]], ["and", ["lang", "=", "en"]]],
+            fields="id,aliases,title",
+        ))
+        raw = await client.vn.query(QueryRequest(filters=["lang", "=", "en"], fields="id"), raw="bytes")
+        await client.vn.query(QueryRequest(filters=["lang", "=", "en"], fields="id"), raw=True)
+
+    assert len(api.calls) == 2
+    assert client.query_cache.stats() == {
+        "hits": 2, "stale_hits": 0, "misses": 2, "hit_ratio": 0.5, "refreshes": 0, "refresh_failures": 0,
+    }
+    assert first == second
+    first.results[0].aliases.append("b")
+    assert second.results[0].aliases == ["a"]
+    assert isinstance(raw, bytes)
+
+
+@pytest.mark.asyncio
+async def test_different_queries_and_tokens_do_not_collide(fake_api):
+    api = fake_api(_one_vn)
+    cache = QueryCache()
+    async with VNDB(rate_limit_requests=None, query_cache=cache) as client:
+        await client.vn.query(QueryRequest(fields="id", page=1))
+        await client.vn.query(QueryRequest(fields="id", page=2))
+        await client.release.query(QueryRequest(fields="id", page=1))
+    async with VNDB(rate_limit_requests=None, query_cache=cache, api_token="t") as client:
+        await client.vn.query(QueryRequest(fields="id", page=1))
+    assert len(api.calls) == 4 and cache.hits == 0
+
+
+@pytest.mark.asyncio
+async def test_endpoint_ttls(fake_api):
+    api = fake_api(_one_vn)
+    cache = QueryCache(ttl=0.05, endpoint_ttls={"/release": 0})
+    async with VNDB(rate_limit_requests=None, query_cache=cache) as client:
+        for _ in range(2):
+            await client.vn.query(QueryRequest(fields="id"))
+            await client.release.query(QueryRequest(fields="id"))
+            await client.ulist.query("u1", QueryRequest(fields="id"))
+        assert len(api.calls) == 5  # only /vn was served from the cache
+        await asyncio.sleep(0.06)
+        await client.vn.query(QueryRequest(fields="id"))
+        assert len(api.calls) == 6
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_is_an_lru():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("a", b"1", 60)
+    await backend.set("b", b"2", 60)
+    assert await backend.get("a") == b"1"
+    await backend.set("c", b"3", 60)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1" and await backend.get("c") == b"3"
+    await backend.set("d", b"4", 0)
+    assert await backend.get("d") is None
+    await backend.clear()
+    assert len(backend) == 0
+
+
+@pytest.mark.asyncio
+async def test_custom_backend(fake_api):
+    class DictBackend(CacheBackend):
+        def __init__(self):
+            self.data = {}
+
+        async def get(self, key):
+            return self.data.get(key)
+
+        async def set(self, key, value, ttl):
+            self.data[key] = value
+
+    with pytest.raises(TypeError):
+        DictBackend()  # delete() and clear() are missing
+
+    class FullDictBackend(DictBackend):
+        async def delete(self, key):
+            self.data.pop(key, None)
+
+        async def clear(self):
+            self.data.clear()
+
+    api = fake_api(_one_vn)
+    backend = FullDictBackend()
+    async with VNDB(rate_limit_requests=None, query_cache=QueryCache(backend=backend)) as client:
+        await client.vn.query(QueryRequest(fields="id"))
+        await client.vn.query(QueryRequest(fields="id"))
+    assert len(api.calls) == 1
+    assert [key.split(":")[1] for key in backend.data] == ["/vn"]
+
+
+def test_canonical_filters():
+    assert canonical_filters(["and", ["b", "=", 1], ["a", "=", 1]]) == canonical_filters(
+        ["and", ["a", "=", 1], ["and", ["b", "=", 1]]]
+    )
+    assert canonical_filters(["or", ["a", "=", 1], ["a", "=", 1]]) == ["a", "=", 1]
+    assert canonical_filters(["and", ["or", ["a", "=", 1], ["b", "=", 1]], ["c", "=", 1]]) == [
+        "and", ["c", "=", 1], ["or", ["a", "=", 1], ["b", "=", 1]]
+    ]
+    assert canonical_filters("03132gja2wzw") == "03132gja2wzw"
+
+
+def _versioned(fail=lambda call: False):
+    """Answers with "Version <n>" for the n-th request; raises for the ones `fail` picks."""
+    count = 0
+
+    def handle(call):
+        nonlocal count
+        count += 1
+        if fail(count):
+            raise ServerError("down")
+        return {"results": [{"id": "v1", "title": f"Version {count}"}], "more": False}
+
+    return handle
+
+
+@pytest.mark.asyncio
+async def test_stale_responses_are_served_while_one_refresh_runs(fake_api):
+    api = fake_api(_versioned())
+    cache = QueryCache(ttl=0.05, grace=60)
+    async with VNDB(rate_limit_requests=None, query_cache=cache) as client:
+        query = QueryRequest(fields="title")
+        assert (await client.vn.query(query)).results[0].title == "Version 1"
+        await asyncio.sleep(0.06)
+        stale = await asyncio.gather(*(client.vn.query(query) for _ in range(3)))
+        assert [response.results[0].title for response in stale] == ["Version 1"] * 3
+        await asyncio.sleep(0.01)  # let the background refresh finish
+        assert len(api.calls) == 2
+        assert (await client.vn.query(query)).results[0].title == "Version 2"
+    assert cache.stats() == {
+        "hits": 1, "stale_hits": 3, "misses": 1, "hit_ratio": 0.8, "refreshes": 1, "refresh_failures": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_the_stale_response(fake_api):
+    from veedb import RetryPolicy
+
+    api = fake_api(_versioned(fail=lambda call: call == 2))
+    cache = QueryCache(ttl=0.05, grace=60)
+    async with VNDB(rate_limit_requests=None, query_cache=cache, retry_policy=RetryPolicy(max_attempts=1)) as client:
+        await client.vn.query(QueryRequest(fields="title"))
+        await asyncio.sleep(0.06)
+        assert (await client.vn.query(QueryRequest(fields="title"))).results[0].title == "Version 1"
+        await asyncio.sleep(0.01)
+        assert cache.refresh_failures == 1 and isinstance(cache.last_refresh_error, ServerError)
+        assert (await client.vn.query(QueryRequest(fields="title"))).results[0].title == "Version 1"
+        await asyncio.sleep(0.01)
+    assert len(api.calls) == 3 and cache.refreshes == 1
+
+
+@pytest.mark.asyncio
+async def test_responses_past_the_grace_period_are_fetched(fake_api):
+    api = fake_api(_versioned())
+    async with VNDB(rate_limit_requests=None, query_cache=QueryCache(ttl=0.02, grace=0.02)) as client:
+        await client.vn.query(QueryRequest(fields="title"))
+        await asyncio.sleep(0.05)
+        assert (await client.vn.query(QueryRequest(fields="title"))).results[0].title == "Version 2"
+    assert client.query_cache.stale_hits == 0 and client.query_cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_schema_is_served_while_it_is_refreshed(tmp_path):
+    import os
+    import time
+
+    class Client:
+        base_url = "https://example.invalid"
+        downloads = 0
+
+        async def _request(self, method, url, token=None, **kwargs):
+            self.downloads += 1
+            await asyncio.sleep(0.01)
+            return {"version": self.downloads}
+
+    SchemaCache(cache_dir=str(tmp_path)).save_schema({"version": 0})
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl_hours=1, stale_grace_hours=24)
+    two_hours_ago = time.time() - 7200
+    os.utime(cache.cache_file, (two_hours_ago, two_hours_ago))
+
+    reads = []
+    read_from_disk = cache._read_from_disk
+    cache._read_from_disk = lambda: reads.append(1) or read_from_disk()
+
+    client = Client()
+    assert await cache.get_schema(client) == {"version": 0}
+    assert await cache.get_schema(client) == {"version": 0}
+    assert len(reads) == 1  # the stale schema is served from memory while the refresh runs
+    await asyncio.sleep(0.02)
+    assert client.downloads == 1
+    assert await cache.get_schema(client) == {"version": 1}
+    assert cache.stats() == {"hits": 1, "stale_hits": 2, "misses": 0, "refreshes": 1, "refresh_failures": 0}
+
+    os.utime(cache.cache_file, (0, 0))  # past the grace period: the caller waits for the download
+    cache = SchemaCache(cache_dir=str(tmp_path), ttl_hours=1, stale_grace_hours=24)
+    assert await cache.get_schema(client) == {"version": 2}
+    assert cache.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_schema_in_memory_is_served_without_io(tmp_path, monkeypatch):
+    import builtins
+    import os
+
+    local = tmp_path / "local.json"
+    local.write_bytes(orjson.dumps({"version": 0}))
+    cache = SchemaCache(cache_dir=str(tmp_path), local_schema_path=str(local))
+    assert await cache.get_schema(None) == {"version": 0}
+
+    def no_io(*args, **kwargs):
+        raise AssertionError("filesystem accessed")
+
+    with monkeypatch.context() as patched:
+        for module, name in ((os, "stat"), (os.path, "isfile"), (os.path, "getmtime"), (builtins, "open")):
+            patched.setattr(module, name, no_io)
+        for _ in range(3):
+            assert await cache.get_schema(None) == {"version": 0}
+    assert cache.hits == 4
+
+    local.write_bytes(orjson.dumps({"version": 1}))
+    assert await cache.get_schema(None) == {"version": 0}
+    cache.invalidate_cache()  # the local schema file is re-read, not removed
+    assert await cache.get_schema(None) == {"version": 1}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cold_schema_loads_share_one_download(tmp_path, monkeypatch):
+    import os
+
+    from veedb.exceptions import VNDBAPIError
+
+    class Client:
+        base_url = "https://example.invalid"
+        downloads = 0
+        fail = True
+
+        async def _request(self, method, url, token=None, **kwargs):
+            self.downloads += 1
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise ServerError("down")
+            return {"version": self.downloads}
+
+    import threading
+
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    writes = []
+    replace = os.replace
+    monkeypatch.setattr(os, "replace", lambda src, dst: (writes.append(dst), replace(src, dst)))
+    remembered_on = []
+    remember = cache._remember
+    monkeypatch.setattr(cache, "_remember", lambda *args, **kwargs: (remembered_on.append(threading.get_ident()), remember(*args, **kwargs)))
+    client = Client()
+
+    results = await asyncio.gather(*(cache.get_schema(client) for _ in range(50)), return_exceptions=True)
+    assert client.downloads == 1 and writes == []
+    assert all(isinstance(result, VNDBAPIError) for result in results)
+
+    client.fail = False
+    results = await asyncio.gather(*(cache.get_schema(client) for _ in range(50)))
+    snapshot = os.path.basename(cache._snapshot_path(str(cache.cache_file)))
+    assert client.downloads == 2 and [os.path.basename(path) for path in writes] == ["schema.json", snapshot]
+    assert results == [{"version": 2}] * 50
+    assert remembered_on == [threading.get_ident()]  # in-memory state is only touched on the event loop
+    assert sorted(os.listdir(tmp_path)) == sorted(["schema.json", snapshot])  # no temp files left behind
+
+
+@pytest.mark.asyncio
+async def test_schema_is_read_off_the_event_loop_once(tmp_path, monkeypatch):
+    import threading
+
+    SchemaCache(cache_dir=str(tmp_path)).save_schema({"version": 0})
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    reads = []
+    read_from_disk = cache._read_from_disk
+
+    def tracked_read_from_disk():
+        reads.append(threading.current_thread() is threading.main_thread())
+        return read_from_disk()
+
+    monkeypatch.setattr(cache, "_read_from_disk", tracked_read_from_disk)
+    results = await asyncio.gather(*(cache.get_schema(None) for _ in range(20)))
+    assert results == [{"version": 0}] * 20
+    assert reads == [False]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_preloads_the_schema(tmp_path):
+    SchemaCache(cache_dir=str(tmp_path)).save_schema({"version": 0})
+    async with VNDB(rate_limit_requests=None, schema_cache_dir=str(tmp_path)) as client:
+        await client.warm_up()
+        assert client._schema_cache_instance._schema_data == {"version": 0}
+
+
+SCHEMA = {"api_fields": {
+    "/vn": {"id": None, "title": None, "image": {"url": None}},
+    "/ulist": {"_inherit": "/vn", "vote": None},
+}}
+
+
+def test_schema_snapshot_is_loaded_without_parsing_or_extraction(tmp_path, monkeypatch):
+    import os
+
+    import veedb.schema_validator as schema_validator
+
+    writer = SchemaCache(cache_dir=str(tmp_path))
+    writer.save_schema(SCHEMA)
+    assert os.path.exists(writer._snapshot_path(str(tmp_path / "schema.json")))
+    assert (tmp_path / "schema.json").read_bytes() == orjson.dumps(SCHEMA, option=orjson.OPT_INDENT_2)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("snapshot not used")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(schema_validator.orjson, "loads", fail)
+        patched.setattr(schema_validator, "extract_fields", fail)
+        cache = SchemaCache(cache_dir=str(tmp_path))
+        schema, age, fields, digest = cache._read_from_disk()
+        cache._remember(schema, age, fields, digest)
+        assert schema == SCHEMA
+        assert cache.endpoint_fields(schema, "/ulist") == ["id", "image", "image.url", "title", "vote"]
+    assert cache.schema_hash == hashlib.sha256((tmp_path / "schema.json").read_bytes()).hexdigest()
+
+
+def test_schema_snapshot_follows_the_schema_file(tmp_path):
+    import os
+
+    SchemaCache(cache_dir=str(tmp_path)).save_schema(SCHEMA)
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    os.utime(tmp_path / "schema.json", (0, 0))  # same content, new mtime: the snapshot is reused and re-stamped
+    assert cache._read_from_disk()[0] == SCHEMA
+    (tmp_path / "schema.json").write_bytes(orjson.dumps({"api_fields": {"/vn": {"id": None}}}))
+    schema, _, fields, _ = cache._read_from_disk()
+    assert fields == {"/vn": ["id"]} and schema == {"api_fields": {"/vn": {"id": None}}}
+    snapshot = cache._snapshot_path(str(tmp_path / "schema.json"))
+    with open(snapshot, "wb") as f:
+        f.write(b"garbage")
+    assert cache._read_from_disk()[0] == schema
+
+
+@pytest.mark.parametrize("damage", ["body", "python"])
+def test_unusable_schema_snapshot_falls_back_to_json(tmp_path, damage):
+    import marshal
+    import os
+
+    from veedb.schema_validator import _SNAPSHOT_HEADER
+
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    cache.save_schema(SCHEMA)
+    path = cache._snapshot_path(str(cache.cache_file))
+    with open(path, "rb") as f:
+        data = f.read()
+    header = list(_SNAPSHOT_HEADER.unpack_from(data))
+    if damage == "body":  # the header still matches the schema file
+        data = data[:_SNAPSHOT_HEADER.size] + b"\x00garbage"
+    else:  # written by another Python version
+        header[3] += 1
+        data = _SNAPSHOT_HEADER.pack(*header) + marshal.dumps({"schema": {"api_fields": {}}, "fields": {}})
+    with open(path, "wb") as f:
+        f.write(data)
+    schema, _, fields, _ = SchemaCache(cache_dir=str(tmp_path))._read_from_disk()
+    assert schema == SCHEMA and fields["/ulist"] == ["id", "image", "image.url", "title", "vote"]
+
+
+def test_schema_snapshot_of_a_local_file_lives_in_the_cache_dir(tmp_path):
+    import os
+
+    source = tmp_path / "mine" / "schema.json"
+    source.parent.mkdir()
+    source.write_bytes(orjson.dumps(SCHEMA))
+    cache = SchemaCache(cache_dir=str(tmp_path / "cache"), local_schema_path=str(source))
+    assert cache._read_from_disk()[0] == SCHEMA
+    assert os.listdir(source.parent) == ["schema.json"]
+    snapshots = os.listdir(tmp_path / "cache")
+    assert len(snapshots) == 1 and snapshots[0].startswith("schema-") and snapshots[0].endswith(".snapshot")
+    other = SchemaCache(cache_dir=str(tmp_path / "cache"))
+    assert other._snapshot_path(str(other.cache_file)) != cache._snapshot_path(str(source))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions and symlinks")
+def test_saving_keeps_permissions_and_symlinks(tmp_path):
+    import os
+    import stat
+
+    real = tmp_path / "real.json"
+    real.write_bytes(b"{}")
+    os.chmod(real, 0o640)
+    link = tmp_path / "schema.json"
+    link.symlink_to(real)
+    cache = SchemaCache(cache_dir=str(tmp_path / "cache"), local_schema_path=str(link))
+    cache.save_schema(SCHEMA, to_local_path=True)
+    assert link.is_symlink() and orjson.loads(real.read_bytes()) == SCHEMA
+    assert stat.S_IMODE(real.stat().st_mode) == 0o640
+
+    umask = os.umask(0o022)
+    os.umask(umask)
+    cache.save_schema(SCHEMA)  # a new file
+    assert stat.S_IMODE(cache.cache_file.stat().st_mode) == 0o666 & ~umask
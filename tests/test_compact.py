@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact filter encoder and decoder.
+"""
+
+import os
+
+import orjson
+import pytest
+
+from veedb import VNDB, FilterCodec, QueryRequest
+from veedb.compact import _Reader, _encode_int
+from veedb.exceptions import InvalidRequestError
+
+# Filter ids as a server would assign them; the codec has no built-in table.
+IDS = {
+    "/vn": {"lang": 2, "olang": 3, "platform": 4, "tag": 8, "search": 11, "release": 50, "id": 80},
+    "/vn.release": {"platform": 4, "released": 7, "id": 80},
+}
+
+# Filters and the `compact_filters` the live API returned for them; see
+# fixtures/capture_compact_filters.py.
+with open(os.path.join(os.path.dirname(__file__), "fixtures", "compact_filters.json"), "rb") as f:
+    CAPTURED = orjson.loads(f.read())
+
+FILTERS = [
+    ["lang", "=", "en"],
+    ["id", ">=", "v12000"],
+    ["or"] + [["id", "=", f"v{n}"] for n in (1, 17, 90, 4500, 70000)],
+    ["and", ["olang", "!=", "ja"], ["tag", "=", ["g505", 2, 0]], ["platform", "=", "win"]],
+    ["release", "=", ["and", ["platform", "!=", "lin"], ["released", "<", 20100101]]],
+    ["search", "=", "Fate/stay night: Réalta Nua — 2"],
+    ["and", ["search", "=", ""], ["tag", "<", -5]],
+]
+
+
+@pytest.mark.parametrize("number", [0, 48, 49, 688, 689, 12976, 12977, 64 ** 4 + 12976, 64 ** 4 + 12977, 10 ** 10])
+def test_integer_tiers_round_trip(number):
+    out = []
+    _encode_int(number, out)
+    reader = _Reader("".join(out))
+    assert reader.integer() == number and reader.pos == len(reader.text)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_round_trip(filters):
+    codec = FilterCodec(IDS)
+    compact = codec.encode("/vn", filters)
+    assert isinstance(compact, str) and compact.isascii()
+    assert codec.decode("/vn", compact) == filters
+
+
+def test_compact_form_is_smaller():
+    filters = ["or"] + [["id", "=", f"v{n}"] for n in range(1, 201)]
+    compact = FilterCodec(IDS).encode("/vn", filters)
+    assert len(compact) * 3 < len(orjson.dumps(filters))
+
+
+def test_errors():
+    codec = FilterCodec(IDS)
+    with pytest.raises(InvalidRequestError, match="No compact filter id"):
+        codec.encode("/vn", ["rating", ">", 70])
+    with pytest.raises(InvalidRequestError, match="No compact filter id"):
+        codec.encode("/release", ["platform", "=", "win"])  # ids are per endpoint
+    for value in (7.5, True, None):
+        assert not codec.can_encode("/vn", ["lang", "=", value])
+    with pytest.raises(InvalidRequestError, match="unknown filter id"):
+        codec.decode("/vn", "9gen-")
+    for broken in ("", "2g", "2gen", "2gen-x", "2!en-"):
+        with pytest.raises(InvalidRequestError):
+            codec.decode("/vn", broken)
+    with pytest.raises(ValueError):
+        FilterCodec({"/vn": {"lang": 1}})
+
+
+@pytest.mark.skipif(not CAPTURED, reason="no compact filters captured from the live API yet")
+@pytest.mark.parametrize("case", CAPTURED, ids=lambda case: orjson.dumps(case["filters"]).decode()[:40])
+def test_captured_server_forms(case):
+    codec = FilterCodec()
+    assert codec.learn(case["endpoint"], case["filters"], case["compact"])
+    assert codec.decode(case["endpoint"], case["compact"]) == case["filters"]
+    assert codec.encode(case["endpoint"], case["filters"]) == case["compact"]
+
+
+def test_learn_ids_from_server_form():
+    server = FilterCodec(IDS)
+    codec = FilterCodec()
+    filters = FILTERS[4]
+    assert codec.learn("/vn", filters, server.encode("/vn", filters))
+    assert codec.ids == {"/vn": {"release": 50}, "/vn.release": {"platform": 4, "released": 7}}
+    assert codec.encode("/vn", filters) == server.encode("/vn", filters)
+
+    # A compact form that does not describe the same filter teaches nothing.
+    assert not codec.learn("/vn", ["lang", "=", "en"], server.encode("/vn", ["lang", "=", "de"]))
+    assert not codec.learn("/vn", ["lang", "=", "en"], server.encode("/vn", ["olang", "=", "en"]) + "x")
+    assert not codec.learn("/vn", ["lang", "=", "en"], None)
+    # Nor one that contradicts ids already known.
+    assert not codec.learn("/vn", ["lang", "=", "en"], FilterCodec({"/vn": {"lang": 50}}).encode("/vn", ["lang", "=", "en"]))
+    assert "lang" not in codec.ids["/vn"]
+
+
+def test_prepare_only_compacts_verified_features():
+    server = FilterCodec(IDS)
+    codec = FilterCodec(IDS, min_size=0)  # every id known, but nothing of the format verified yet
+
+    def prepare(filters):
+        payload, learn = codec.prepare("/vn", {"filters": filters})
+        return payload["filters"] if isinstance(payload["filters"], str) else "json", learn
+
+    ids = ["or", ["id", "=", "v1"], ["id", "=", "v17"]]
+    assert prepare(ids) == ("json", True)
+    assert codec.learn("/vn", ids, server.encode("/vn", ids))
+    assert prepare(["or", ["id", "=", "v3"], ["id", "=", "v4"]])[0] == server.encode("/vn", ["or", ["id", "=", "v3"], ["id", "=", "v4"]])
+
+    # Each of these uses something the server has not shown yet.
+    for unverified in (
+        ["or", ["id", "=", "v1"], ["id", "=", "v70000"]],  # a wider integer
+        ["or", ["id", "=", "v1"], ["search", "=", "ab"]],  # a string
+        ["and", ["id", "=", "v1"], ["id", "=", "v2"]],  # an 'and' group
+        ["tag", "<", -5],  # a negative integer
+        ["tag", "=", ["g505", 2, 0]],  # an array
+        ["release", "=", ["platform", "=", "win"]],  # a nested query
+    ):
+        assert prepare(unverified) == ("json", True), unverified
+
+    plain = ["or", ["id", "=", "v1"], ["search", "=", "ab"]]
+    assert codec.learn("/vn", plain, server.encode("/vn", plain))
+    assert prepare(["or", ["id", "=", "v2"], ["search", "=", "xyz"]])[1] is False
+    escaped = ["or", ["id", "=", "v2"], ["search", "=", "x y"]]
+    assert prepare(escaped) == ("json", True)  # escapes are verified separately
+    assert codec.learn("/vn", escaped, server.encode("/vn", escaped))
+    assert prepare(["or", ["id", "=", "v5"], ["search", "=", "a b"]])[1] is False
+
+
+def test_prepare_only_asks_for_what_the_server_can_teach():
+    codec = FilterCodec({"/vn": {"lang": 2}}, min_size=0)
+    unknown = ["or", ["lang", "=", "en"], ["rating", ">", 70]]
+    payload, learn = codec.prepare("/vn", {"filters": unknown})
+    assert payload == {"filters": unknown, "compact_filters": True} and learn
+
+    # No answer would let these be encoded, so the server is not asked.
+    for value in (7.5, True, None):
+        for filters in (["lang", "=", value], ["or", ["lang", "=", "en"], ["rating", ">", value]]):
+            assert codec.prepare("/vn", {"filters": filters}) == ({"filters": filters}, False), filters
+    assert codec.prepare("/vn", {"filters": ["lang"]}) == ({"filters": ["lang"]}, False)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw", [False, "bytes"])
+async def test_client_sends_large_filters_compact(fake_api, raw):
+    server = FilterCodec(IDS)
+
+    def serve(call):
+        response = {"results": [], "more": False}
+        if call.payload.get("compact_filters"):
+            response["compact_filters"] = server.encode("/vn", call.payload["filters"])
+        return response
+
+    api = fake_api(serve)
+    big = ["or"] + [["id", "=", f"v{n}"] for n in range(1, 30)]
+    async with VNDB(rate_limit_requests=None, filter_codec=FilterCodec(min_size=100)) as client:
+        await client.vn.query(QueryRequest(filters=["lang", "=", "en"]), raw=raw)
+        await client.vn.query(QueryRequest(filters=big), raw=raw)
+        await client.vn.query(QueryRequest(filters=big[:-1]), raw=raw)
+
+    assert api.payloads[0]["filters"] == ["lang", "=", "en"] and not api.payloads[0]["compact_filters"]
+    assert api.payloads[1]["filters"] == big and api.payloads[1]["compact_filters"]
+    assert api.payloads[2]["filters"] == server.encode("/vn", big[:-1]) and not api.payloads[2]["compact_filters"]
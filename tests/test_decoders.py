@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests that the compiled decoders produce exactly what dacite produces.
+"""
+
+import pytest
+from dacite import MissingValueError, from_dict
+
+from veedb.apitypes.entities import (
+    VN,
+    Release,
+    Producer,
+    Character,
+    Staff,
+    Tag,
+    Trait,
+    Quote,
+    User,
+    AuthInfo,
+    UserStats,
+    UlistItem,
+    UlistLabel,
+)
+from veedb.decoders import dacite_config, decode, get_decoder
+
+IMAGE = {"id": "cv1", "url": "https://t.vndb.org/cv/01/1.jpg", "dims": [256, 362], "sexual": 0.0,
+         "violence": 0.0, "votecount": 10, "thumbnail": "https://t.vndb.org/cv.t/01/1.jpg"}
+
+SAMPLES = [
+    (VN, {"id": "v17"}),
+    (VN, {"id": "v17", "title": "Ever17", "rating": 86.5, "released": "2002-08-29", "unknown_key": 1}),
+    (VN, {
+        "id": "v17",
+        "titles": [{"lang": "ja", "title": "Ever17", "latin": None, "official": True, "main": True}],
+        "aliases": ["E17"],
+        "languages": ["ja", "en"],
+        "image": IMAGE,
+        "screenshots": [dict(IMAGE, id="sf1", release={"id": "r1", "title": "Ever17", "platforms": ["win"]})],
+        "tags": [{"id": "g7", "name": "Amnesia", "rating": 2.5, "spoiler": 0, "lie": False}],
+        "developers": [{"id": "p1", "name": "KID", "aliases": []}],
+        "editions": [{"eid": 0, "lang": "en", "name": "English", "official": True}],
+        "staff": [{"id": "s1", "name": "Uchikoshi", "role": "scenario", "note": None, "eid": None,
+                   "extlinks": [{"url": "https://x", "label": "X", "name": "x", "id": 12}]}],
+        "va": [{"note": None, "staff": {"id": "s2", "name": "VA"}, "character": {"id": "c1", "name": "Tsugumi"}}],
+        "relations": [{"id": "v18", "title": "Never7", "relation": "preq", "relation_official": True,
+                       "relations": [{"id": "v17", "relation": "seq"}]}],
+        "extlinks": [{"url": "https://example.com", "label": "Site", "name": "site"}],
+    }),
+    (VN, {"id": "v1", "titles": None, "image": None, "tags": [], "screenshots": None}),
+    (Release, {
+        "id": "r1", "resolution": [1280, 720], "voiced": 4,
+        "languages": [{"lang": "ja", "title": "T", "mtl": False, "main": True}],
+        "media": [{"medium": "dvd", "qty": 1}],
+        "vns": [{"id": "v1", "rtype": "complete"}],
+        "producers": [{"id": "p1", "developer": True}],
+        "images": [dict(IMAGE, type="pkgfront", photo=False, thumbnail_dims=[256, 362])],
+    }),
+    (Release, {"id": "r2", "resolution": "non-standard"}),
+    (Release, {"id": "r3", "resolution": None}),
+    (Producer, {"id": "p1", "name": "KID", "aliases": ["Kids"], "type": "co"}),
+    (Character, {"id": "c1", "name": "Tsugumi", "birthday": [3, 14], "sex": ["f", None], "gender": None,
+                 "image": IMAGE, "vns": [{"id": "v17", "role": "main", "release": {"id": "r1"}}],
+                 "traits": [{"id": "i1", "spoiler": 0, "lie": False}]}),
+    (Staff, {"id": "s1", "aliases": [{"aid": 1, "name": "N", "ismain": True}], "extlinks": []}),
+    (Tag, {"id": "g1", "name": "Amnesia", "aliases": [], "category": "cont"}),
+    (Trait, {"id": "i1", "name": "Ahoge"}),
+    (Quote, {"id": "q1", "quote": "Hello", "vn": {"id": "v17", "title": "Ever17"}, "character": None}),
+    (UlistItem, {"id": "v17", "vote": 90, "labels": [{"id": 2, "label": "Finished"}],
+                 "vn": {"id": "v17", "title": "Ever17"}, "releases": [{"id": "r1", "list_status": 2}]}),
+    (UlistLabel, {"id": 1, "label": "Playing", "private": False, "count": 3}),
+]
+
+
+@pytest.mark.parametrize("data_class, data", SAMPLES)
+def test_matches_dacite(data_class, data):
+    expected = from_dict(data_class=data_class, data=data, config=dacite_config)
+    assert decode(data_class, data) == expected
+
+
+def test_user_entities_match_dacite():
+    for data_class in (User, AuthInfo, UserStats):
+        fields = data_class.__dataclass_fields__
+        data = {name: None for name in fields}
+        data.update({name: [] for name, field in fields.items() if "List" in str(field.type)})
+        assert decode(data_class, data) == from_dict(data_class=data_class, data=data, config=dacite_config)
+
+
+def test_copies_lists():
+    data = {"id": "v1", "aliases": ["a", "b"], "titles": [{"lang": "ja", "title": "T"}]}
+    vn = decode(VN, data)
+    assert vn.aliases == data["aliases"] and vn.aliases is not data["aliases"]
+
+
+def test_default_containers_are_not_shared():
+    first, second = decode(VN, {"id": "v1"}), decode(VN, {"id": "v2"})
+    first.tags.append("x")
+    assert second.tags == []
+
+
+def test_missing_required_field():
+    with pytest.raises(MissingValueError):
+        decode(VN, {"title": "No id"})
+    with pytest.raises(MissingValueError):
+        from_dict(data_class=VN, data={"title": "No id"}, config=dacite_config)
+
+
+def test_decoder_is_compiled_once():
+    assert get_decoder(VN) is get_decoder(VN)
+
+
+SELECTIONS = [
+    (VN, "id, title, rating, released", {"id": "v17", "title": "Ever17", "rating": 86.5, "released": "2002-08-29"}),
+    (VN, "id, image{url, dims}", {"id": "v17", "image": {"url": IMAGE["url"], "dims": [256, 362]}}),
+    (VN, "id, image.url", {"id": "v17", "image": None}),
+    (VN, "id, developers{id, name}", {"id": "v17", "developers": [{"id": "p1", "name": "KID"}]}),
+    (VN, "id, title", {"id": "v17", "title": "Ever17", "unknown_key": 1}),
+    (VN, "id, title", {"id": "v17"}),
+    (VN, "title, rating", {"id": "v17", "title": "Ever17", "rating": 86.5}),
+    (Release, "id, resolution", {"id": "r2", "resolution": "non-standard"}),
+    (Release, "id, vns.rtype", {"id": "r1", "vns": [{"id": "v1", "rtype": "complete"}]}),
+    (UlistItem, "vote, vn.title", {"id": "v17", "vote": 90, "vn": {"id": "v17", "title": "Ever17"}}),
+]
+
+
+@pytest.mark.parametrize("data_class, fields, data", SELECTIONS)
+def test_selection_decoder_matches_dacite(data_class, fields, data):
+    expected = from_dict(data_class=data_class, data=data, config=dacite_config)
+    assert get_decoder(data_class, fields)(data) == expected
+
+
+def test_selection_decoder_is_shared_by_equivalent_selections():
+    assert get_decoder(VN, "title, id, image.url") is get_decoder(VN, "id,image{url},title")
+    assert get_decoder(VN, "id, title") is not get_decoder(VN)
+    # The API returns the id whether it was selected or not.
+    assert get_decoder(VN, "title, rating") is get_decoder(VN, "id, title, rating")
+    assert get_decoder(VN, "title, rating") is not get_decoder(VN)
+
+
+def test_selection_decoder_falls_back_on_unparseable_fields():
+    assert get_decoder(VN, "id, {title") is get_decoder(VN)
+
+
+def test_selection_default_containers_are_not_shared():
+    decode_selected = get_decoder(VN, "id, title")
+    first, second = decode_selected({"id": "v1", "title": "A"}), decode_selected({"id": "v2", "title": "B"})
+    first.tags.append("x")
+    first.aliases.append("y")
+    assert second.tags == [] and second.aliases == []
+    assert first.tags is not VN.__dataclass_fields__["tags"].default_factory()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the field-merging entity cache.
+"""
+
+import pytest
+
+from veedb import VNDB, EntityCache, QueryRequest
+from veedb.apitypes.entities import VN
+from veedb.fields import parse_fields, selection_tree
+
+DB = {
+    f"v{n}": {
+        "id": f"v{n}", "title": f"Title {n}", "rating": 50 + n, "released": "2020-01-01",
+        "image": {"url": f"https://x/{n}.jpg", "dims": [1, 2]},
+        "developers": [{"id": "p1", "name": "Dev", "aliases": ["D"]}],
+    }
+    for n in range(1, 6)
+}
+
+
+def _select(item, tree):
+    if isinstance(item, list):
+        return [_select(element, tree) for element in item]
+    return {key: item[key] if subtree is None else _select(item[key], subtree)
+            for key, subtree in tree.items() if key in item}
+
+
+def _serve(call):
+    filters = call.payload["filters"]
+    if filters and filters[0] == "or":
+        ids = [part[2] for part in filters[1:]]
+    elif filters and filters[0] == "id":
+        ids = [filters[2]]
+    else:
+        ids = list(DB)
+    tree = selection_tree(parse_fields(call.payload["fields"]))
+    tree["id"] = None  # the API always returns the id
+    return {"results": [_select(DB[i], tree) for i in ids if i in DB], "more": False}
+
+
+@pytest.fixture
+async def client():
+    client = VNDB(rate_limit_requests=None, entity_cache=True)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_fields_are_merged_and_only_missing_ones_fetched(fake_api, client):
+    api = fake_api(_serve)
+    await client.vn.query(QueryRequest(filters=["released", ">", "2000"], fields="title, image.url"))
+    assert len(client.entity_cache) == 5
+
+    vns = await client.vn.get_many(["v1", "v2", "v9"], fields="title, rating, image{url, dims}")
+    # v1 and v2 only miss two fields; v9 was never seen.
+    assert sorted((r["fields"], str(r["filters"])) for r in api.payloads[1:]) == [
+        ("id,image.dims,rating", str(["or", ["id", "=", "v1"], ["id", "=", "v2"]])),
+        ("id,image{dims,url},rating,title", str(["id", "=", "v9"])),
+    ]
+    assert vns["v9"] is None
+    assert isinstance(vns["v1"], VN)
+    assert (vns["v1"].title, vns["v1"].rating, vns["v1"].image.url, vns["v1"].image.dims) == (
+        "Title 1", 51, "https://x/1.jpg", [1, 2]
+    )
+
+    count = len(api.payloads)
+    vn = await client.vn.load("v2", fields="image.dims, title")
+    response = await client.vn.query(QueryRequest(filters=["id", "=", "v1"], fields="rating"))
+    assert len(api.payloads) == count
+    assert vn.image.dims == [1, 2] and response.results[0].rating == 51
+    assert client.entity_cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_nested_lists_merge(fake_api, client):
+    api = fake_api(_serve)
+    await client.vn.load("v3", fields="developers{id, name}")
+    vn = await client.vn.load("v3", fields="developers{id, name, aliases}")
+    assert api.payloads[-1]["fields"] == "developers.aliases,id"
+    assert vn.developers[0].name == "Dev" and vn.developers[0].aliases == ["D"]
+    assert await client.vn.load("v3", fields="developers{id, aliases}", raw=True) == {
+        "id": "v3", "developers": [{"id": "p1", "aliases": ["D"]}]
+    }
+
+
+@pytest.mark.asyncio
+async def test_raw_results_are_copies(fake_api, client):
+    fake_api(_serve)
+    first = await client.vn.load("v4", fields="title, image.url", raw=True)
+    first["image"]["url"] = "changed"
+    second = await client.vn.load("v4", fields="title, image.url", raw=True)
+    assert second["image"]["url"] == "https://x/4.jpg"
+
+
+@pytest.mark.asyncio
+async def test_stale_fields_are_refetched(fake_api):
+    api = fake_api(_serve)
+    async with VNDB(rate_limit_requests=None, entity_cache=EntityCache(ttl=0)) as client:
+        await client.vn.load("v1", fields="title")
+        await client.vn.load("v1", fields="title")
+    assert len(api.payloads) == 2
+
+
+def test_unmergeable_values_replace_the_old_coverage():
+    cache = EntityCache()
+    cache.store("/vn", parse_fields("id, developers{id, name}"), {"id": "v1", "developers": [{"id": "p1", "name": "A"}]})
+    cache.store("/vn", parse_fields("id, developers.aliases"), {"id": "v1", "developers": [{"aliases": []}, {"aliases": []}]})
+    assert cache.missing("/vn", "v1", parse_fields("developers{name, aliases}")) == ["developers.name"]
+    cache.invalidate("/vn")
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_many_larger_than_the_cache_returns_every_entity(fake_api):
+    db = {f"v{n}": {"id": f"v{n}", "title": f"Title {n}"} for n in range(1, 31)}
+
+    def serve(call):
+        ids = [part[2] for part in call.payload["filters"][1:]]
+        return {"results": [db[i] for i in ids], "more": False}
+
+    fake_api(serve)
+    async with VNDB(rate_limit_requests=None, entity_cache=EntityCache(max_entities=10)) as client:
+        client.entity_cache.store("/vn", ("id", "title"), {"id": "v1", "title": "Title 1"})
+        found = await client.vn.get_many(list(db), fields="title", raw=True)
+        assert found == db
+        assert len(client.entity_cache) == 10
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for response decoding and error mapping in `_fetch_api`.
+"""
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from veedb.exceptions import InvalidRequestError, NotFoundError, ServerError, TooMuchDataSelectedError
+from veedb.methods.fetch import _fetch_api
+
+
+async def _handler(request):
+    kind = request.match_info["kind"]
+    if kind == "json":
+        return web.json_response({"results": [{"id": "v17", "title": "Ever17 – 時"}], "more": False})
+    if kind == "misreported":
+        return web.Response(body='{"results": [], "more": false}', content_type="text/html")
+    if kind == "text":
+        return web.Response(text="plain ok")
+    if kind == "empty":
+        return web.Response(status=204)
+    if kind == "html-error":
+        return web.Response(text="<html>Bad Gateway</html>", status=502, content_type="text/html")
+    if kind == "detail":
+        return web.json_response({"detail": "No such endpoint."}, status=404)
+    if kind == "too-much":
+        return web.Response(text="Too much data selected", status=400)
+    if kind == "latin1":
+        return web.Response(body="café".encode("latin-1"), status=400, content_type="text/plain", charset="latin-1")
+    raise web.HTTPNotFound()
+
+
+@pytest.fixture
+async def server():
+    app = web.Application()
+    app.router.add_route("*", "/{kind}", _handler)
+    async with TestServer(app) as test_server:
+        yield test_server
+
+
+async def _get(server, kind):
+    async with aiohttp.ClientSession() as session:
+        return await _fetch_api(session, "GET", str(server.make_url(f"/{kind}")))
+
+
+@pytest.mark.asyncio
+async def test_json_body(server):
+    data = await _get(server, "json")
+    assert data == {"results": [{"id": "v17", "title": "Ever17 – 時"}], "more": False}
+
+
+@pytest.mark.asyncio
+async def test_misreported_content_type_is_still_parsed(server):
+    assert await _get(server, "misreported") == {"results": [], "more": False}
+
+
+@pytest.mark.asyncio
+async def test_non_json_success_returns_text(server):
+    assert await _get(server, "text") == "plain ok"
+
+
+@pytest.mark.asyncio
+async def test_no_content(server):
+    assert await _get(server, "empty") is None
+
+
+@pytest.mark.asyncio
+async def test_error_bodies(server):
+    with pytest.raises(ServerError) as info:
+        await _get(server, "html-error")
+    assert "<html>Bad Gateway</html>" in info.value.message
+
+    with pytest.raises(NotFoundError) as info:
+        await _get(server, "detail")
+    assert info.value.message == "No such endpoint."
+
+    with pytest.raises(TooMuchDataSelectedError):
+        await _get(server, "too-much")
+
+    with pytest.raises(InvalidRequestError) as info:
+        await _get(server, "latin1")
+    assert info.value.message == "café"
+
+
+@pytest.mark.asyncio
+async def test_raw_body(server):
+    async with aiohttp.ClientSession() as session:
+        body = await _fetch_api(session, "GET", str(server.make_url("/json")), raw=True)
+        assert isinstance(body, bytes) and b'"v17"' in body
+        with pytest.raises(NotFoundError):
+            await _fetch_api(session, "GET", str(server.make_url("/detail")), raw=True)
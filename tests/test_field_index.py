@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests for the field index behind filter validation.
+"""
+
+import random
+from difflib import get_close_matches
+from pathlib import Path
+
+import orjson
+import pytest
+
+from veedb.field_index import FieldIndex
+from veedb.schema_validator import FilterValidator, SchemaCache, extract_fields
+
+SCHEMA = orjson.loads((Path(__file__).parent.parent / "assets" / "schema.example.json").read_bytes())
+VN_FIELDS = extract_fields(SCHEMA, "/vn")
+
+
+def test_membership_and_trie():
+    index = FieldIndex(VN_FIELDS)
+    assert "title" in index and "image.url" in index
+    assert "image.nope" not in index and ["title"] not in index
+    assert index.has_prefix("image") and not index.has_prefix("imag")
+    assert index.children("image") == sorted({path.split(".")[1] for path in VN_FIELDS if path.startswith("image.")})
+    assert "title" in index.children() and index.children("nope") == []
+
+
+def test_suggestions_find_the_intended_field():
+    index = FieldIndex(VN_FIELDS)
+    rng = random.Random(7)
+    for field in VN_FIELDS:
+        chars = list(field)
+        position = rng.randrange(len(chars))
+        operation = rng.choice(("drop", "swap", "replace"))
+        if operation == "drop":
+            del chars[position]
+        elif operation == "swap" and position + 1 < len(chars):
+            chars[position], chars[position + 1] = chars[position + 1], chars[position]
+        else:
+            chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        typo = "".join(chars)
+        typo_segments, field_segments = typo.split("."), field.split(".")
+        if len(typo_segments) != len(field_segments) or sum(map(str.__ne__, typo_segments, field_segments)) > 1:
+            continue  # the typo moved or broke a dot; any close existing path will do
+        suggestions = index.suggest(typo)
+        assert len(suggestions) <= 3 and all(suggestion in index for suggestion in suggestions)
+        if typo in index:
+            assert suggestions == [typo]
+        elif field in get_close_matches(typo, VN_FIELDS, n=3, cutoff=0.7):
+            assert field in suggestions, typo
+
+
+def test_suggestions():
+    index = FieldIndex(VN_FIELDS)
+    assert index.suggest("titl")[0] == "title"
+    assert index.suggest("screenshots.release.freewae") == ["screenshots.release.freeware"]
+    assert index.suggest("screeshots.relase.freeware") == ["screenshots.release.freeware"]
+    # no close sibling for "xyzzy": the whole path is matched instead
+    assert index.suggest("image.xyzzy.url") == get_close_matches("image.xyzzy.url", VN_FIELDS, n=3, cutoff=0.7)
+    assert "image.url" in index.suggest("image.xyzzy.url")
+    assert index.suggest("xyz") == [] and index.suggest("") == []
+
+
+@pytest.mark.asyncio
+async def test_validate_filters_uses_the_index(tmp_path):
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    cache.save_schema(SCHEMA)
+    validator = FilterValidator(cache)
+    result = await validator.validate_filters(
+        "/vn", ["and", ["title", "~", "x"], ["or", ["olang", "=", "ja"], ["titel", "=", "y"]]], None
+    )
+    assert result["valid"] is False
+    assert result["errors"] == ["Invalid field 'titel' for endpoint '/vn'."]
+    assert "title" in result["suggestions"]
+    assert result["available_fields"] == VN_FIELDS
+    assert await validator.get_field_index("/vn", None) is await validator.get_field_index("/vn", None)
+
+
+@pytest.mark.asyncio
+async def test_validation_verdicts_are_memoised_per_shape(tmp_path):
+    from veedb.schema_validator import filter_shape
+
+    cache = SchemaCache(cache_dir=str(tmp_path))
+    cache.save_schema(SCHEMA)
+    validator = FilterValidator(cache, memo_size=2)
+    first = ["and", ["titel", "=", "a"], ["olang", "=", "ja"]]
+    same_shape = ["AND", ["titel", "=", "something else"], ["olang", "=", "en"]]
+    assert filter_shape(first) == filter_shape(same_shape)
+    assert filter_shape(first) != filter_shape(["and", ["titel", "!=", "a"], ["olang", "=", "ja"]])
+
+    result = await validator.validate_filters("/vn", first, None)
+    result["errors"].append("mutated by the caller")
+    assert await validator.validate_filters("/vn", same_shape, None) == {
+        "valid": False,
+        "errors": ["Invalid field 'titel' for endpoint '/vn'."],
+        "suggestions": result["suggestions"],
+        "available_fields": VN_FIELDS,
+    }
+    assert validator.stats() == {"entries": 1, "hits": 1, "misses": 1}
+
+    # Malformed nodes are quoted in the errors, so they are not value-free.
+    assert (await validator.validate_filters("/vn", ["title", "="], None))["errors"] != (
+        await validator.validate_filters("/vn", ["olang", "="], None))["errors"]
+    assert validator.stats() == {"entries": 2, "hits": 1, "misses": 3}
+
+    cache.save_schema({"api_fields": {"/vn": {"titel": None, "olang": None}}})  # a new schema version
+    assert (await validator.validate_filters("/vn", first, None))["valid"] is True
+    assert validator.misses == 4
+
+    # Without a file hash, the schema version counter still tells schemas apart.
+    cache._remember({"api_fields": {"/vn": {"olang": None}}}, age=0.0)
+    assert (await validator.validate_filters("/vn", first, None))["valid"] is False
+    assert validator.misses == 5
+
+    validator = FilterValidator(cache)  # memo off by default
+    await validator.validate_filters("/vn", first, None)
+    await validator.validate_filters("/vn", same_shape, None)
+    assert validator.stats() == {"entries": 0, "hits": 0, "misses": 0}
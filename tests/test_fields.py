@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Tests for parsing and normalising `fields` selection strings.
+"""
+
+import pytest
+
+from veedb.exceptions import InvalidRequestError
+from veedb.fields import normalize_fields, parse_fields, selection_tree, subselection, top_level_fields
+
+
+def test_parse_expands_braces_and_sorts():
+    assert parse_fields("title, image{url, dims}, id") == ("id", "image.dims", "image.url", "title")
+    assert parse_fields("vns{id, developers{name}}") == ("vns.developers.name", "vns.id")
+    assert parse_fields("id, id, title,") == ("id", "title")
+    assert parse_fields("") == ()
+
+
+def test_dotted_and_braced_spellings_are_equivalent():
+    assert parse_fields("image.url, image.dims") == parse_fields("image{dims,url}")
+    assert normalize_fields("title, id, image.url") == normalize_fields("id,image{url},title") == "id,image.url,title"
+    assert normalize_fields("id, image{url, dims}") == "id,image{dims,url}"
+
+
+@pytest.mark.parametrize("fields", ["id, {title", "image{url", "id title", "a..b", "id,}"])
+def test_invalid_selection(fields):
+    with pytest.raises(InvalidRequestError):
+        parse_fields(fields)
+
+
+def test_tree_helpers():
+    paths = parse_fields("id, image{url, dims}, vns.id")
+    assert selection_tree(paths) == {"id": None, "image": {"dims": None, "url": None}, "vns": {"id": None}}
+    assert subselection(paths, "image") == ("dims", "url")
+    assert subselection(paths, "id") == ()
+    assert top_level_fields(paths) == ("id", "image", "vns")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for batching concurrent by-ID lookups with `BatchLoader`.
+"""
+
+import asyncio
+
+import pytest
+
+import veedb
+from veedb import VNDB, BatchLoader, QueryRequest
+from veedb.exceptions import ServerError
+
+
+def _handler(existing, fail=False):
+    async def handle(call):
+        await asyncio.sleep(0.001)
+        if fail:
+            raise ServerError("Server error: boom", 500)
+        filters = call.payload["filters"]
+        ids = [part[2] for part in filters[1:]] if filters[0] == "or" else [filters[2]]
+        return {"results": [{"id": i, "title": f"T{i}"} for i in ids if i in existing], "more": False}
+
+    return handle
+
+
+async def _lookup(client, vndb_id, fields="id, title"):
+    return await client.vn.query(QueryRequest(filters=["id", "=", vndb_id], fields=fields))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_request(fake_api):
+    api = fake_api(_handler({f"v{n}" for n in range(1, 20)}))
+    async with VNDB(rate_limit_requests=None, batch_lookups=True) as client:
+        responses = await asyncio.gather(*(_lookup(client, f"v{n}") for n in range(1, 21)))
+        assert len(api.calls) == 1
+        assert [r.results[0].id for r in responses[:19]] == [f"v{n}" for n in range(1, 20)]
+        assert responses[19].results == [] and responses[19].more is False
+        assert client.loader.stats() == {"lookups": 20, "batches": 1, "requests_saved": 19}
+
+
+@pytest.mark.asyncio
+async def test_callers_of_the_same_id_get_their_own_entity(fake_api):
+    api = fake_api(_handler({"v1", "v2"}))
+    async with VNDB(rate_limit_requests=None, batch_lookups=True) as client:
+        first, second = await asyncio.gather(client.vn.load("v1", "title", raw=True), client.vn.load("v1", "title", raw=True))
+        assert first == second == {"id": "v1", "title": "Tv1"} and first is not second
+        one, other = await asyncio.gather(_lookup(client, "v2"), _lookup(client, "v2"))
+        assert one.results[0] == other.results[0] and one.results[0] is not other.results[0]
+    assert len(api.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_batches_per_endpoint_and_fields(fake_api):
+    api = fake_api(_handler({"v1", "v2", "r1"}))
+    async with VNDB(rate_limit_requests=None, batch_lookups=True) as client:
+        await asyncio.gather(
+            _lookup(client, "v1", "title, id"),
+            _lookup(client, "v2", "id,title"),
+            _lookup(client, "v1", "id"),
+            client.release.load("r1", fields="title"),
+            client.vn.load("v1", fields="id, title"),
+        )
+    assert sorted((url.rsplit("/", 1)[1], len(p["filters"])) for _, url, p, _, _ in api.calls) == [
+        ("release", 3), ("vn", 3), ("vn", 3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_window_and_max_batch_size(fake_api):
+    api = fake_api(_handler(set()))
+    loader = BatchLoader(window=0.02, max_batch_size=5)
+    async with VNDB(rate_limit_requests=None, batch_lookups=loader) as client:
+        async def late(vndb_id):
+            await asyncio.sleep(0.005)
+            return await client.vn.load(vndb_id)
+
+        await asyncio.gather(client.vn.load("v1"), late("v2"), late("v3"))
+        assert len(api.calls) == 1
+        await asyncio.gather(*(client.vn.load(f"v{n}") for n in range(10, 22)))
+        assert len(api.calls) == 4  # 5 + 5 sent when full, the last 2 after the window
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller(fake_api):
+    fake_api(_handler(set(), fail=True))
+    async with VNDB(rate_limit_requests=None, batch_lookups=True, retry_policy=veedb.RetryPolicy(max_attempts=1)) as client:
+        results = await asyncio.gather(_lookup(client, "v1"), _lookup(client, "v2"), return_exceptions=True)
+    assert all(isinstance(result, ServerError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_disabled_by_default_and_other_queries_untouched(fake_api):
+    api = fake_api(_handler({"v1"}))
+    async with VNDB(rate_limit_requests=None) as client:
+        assert client.loader is None
+        await asyncio.gather(_lookup(client, "v1"), _lookup(client, "v2"))
+        assert len(api.calls) == 2
+        assert await client.vn.load("v1", fields="title") is not None
+
+    async with VNDB(rate_limit_requests=None, batch_lookups=True) as client:
+        await client.vn.query(QueryRequest(filters=["id", "=", "v1"], count=True))
+        assert client.loader.lookups == 0
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for evaluating queries against locally held entities.
+"""
+
+import threading
+
+import pytest
+
+import veedb.client
+from veedb import VNDB, LocalMirror, LocalQueryError, QueryRequest
+from veedb.apitypes.entities import VN
+from veedb.exceptions import InvalidRequestError
+from veedb.local_query import matches, run_query
+
+VNS = [
+    {"id": "v1", "title": "Alpha", "alttitle": None, "aliases": [], "languages": ["en", "ja"], "olang": "ja",
+     "rating": 80.5, "released": "2004-01-30", "description": "A story.",
+     "tags": [{"id": "g1", "rating": 2.5, "spoiler": 0}, {"id": "g2", "rating": 1.0, "spoiler": 2}],
+     "developers": [{"id": "p1", "name": "Studio One", "type": "co"}]},
+    {"id": "v2", "title": "Beta", "alttitle": "ベータ", "aliases": ["B"], "languages": ["ja"], "olang": "ja",
+     "rating": None, "released": "2010-05-01", "description": None,
+     "tags": [{"id": "g2", "rating": 2.8, "spoiler": 0}],
+     "developers": [{"id": "p2", "name": "Doujin Circle", "type": "ng"}]},
+    {"id": "v10", "title": "Gamma Alpha", "alttitle": None, "aliases": [], "languages": ["en"], "olang": "en",
+     "rating": 70.0, "released": "2010-05-01", "description": "",
+     "tags": [],
+     "developers": [{"id": "p1", "name": "Studio One", "type": "co"}, {"id": "p2", "name": "Doujin Circle", "type": "ng"}]},
+]
+
+
+def ids(filters, endpoint="/vn"):
+    return [vn["id"] for vn in VNS if matches(vn, filters, endpoint)]
+
+
+def test_predicates():
+    assert ids(["lang", "=", "en"]) == ["v1", "v10"]
+    assert ids(["lang", "!=", "en"]) == ["v2"]
+    assert ids(["olang", "=", "ja"]) == ["v1", "v2"]
+    assert ids(["id", ">", "v2"]) == ["v10"]  # ids compare numerically
+    assert ids(["id", "<=", "v2"]) == ["v1", "v2"]
+    assert ids(["rating", ">=", 75]) == ["v1"]
+    assert ids(["rating", "<", 75]) == ["v10"]  # null never compares
+    assert ids(["released", ">=", "2010"]) == ["v2", "v10"]
+    assert ids(["has_description", "=", 1]) == ["v1"]
+    assert ids(["search", "=", "alpha"]) == ["v1", "v10"]
+    assert ids(["search", "=", "ベータ"]) == ["v2"]
+    assert ids(["title", "~", "ALP"]) == ["v1", "v10"]
+
+
+def test_and_or_tags_and_nested_filters():
+    assert ids(["and", ["lang", "=", "en"], ["or", ["rating", ">", 75], ["olang", "=", "en"]]]) == ["v1", "v10"]
+    assert ids(["tag", "=", "g2"]) == ["v2"]  # spoiler level 0 by default
+    assert ids(["tag", "=", ["g2", 2, 0]]) == ["v1", "v2"]
+    assert ids(["tag", "=", ["g2", 2, 2]]) == ["v2"]
+    assert ids(["developer", "=", ["type", "=", "co"]]) == ["v1", "v10"]
+    assert ids(["developer", "!=", ["id", "=", "p1"]]) == ["v2"]
+    assert ids(["developer", "=", ["and", ["search", "=", "studio"], ["id", "=", "p2"]]]) == []
+
+
+def test_dataclasses_and_errors():
+    vn = VN(id="v5", title="Delta", olang="en")
+    assert matches(vn, ["and", ["olang", "=", "en"], ["search", "=", "delta"]], "/vn")
+    with pytest.raises(LocalQueryError, match="'votecount' of v1"):
+        ids(["votecount", ">", 10])
+    with pytest.raises(InvalidRequestError):
+        ids(["lang", "=~", "en"])
+    with pytest.raises(InvalidRequestError):
+        ids(["and", ["lang", "=", "en"]])
+    with pytest.raises(InvalidRequestError):
+        run_query(VNS, QueryRequest(filters="2gen-"), "/vn")
+
+
+def test_sort_reverse_and_pages():
+    def page(**options):
+        response = run_query(VNS, QueryRequest(fields="title", **options), "/vn")
+        return [item["id"] for item in response.results], response.more, response.count
+
+    assert page() == (["v1", "v2", "v10"], False, None)
+    assert page(reverse=True) == (["v10", "v2", "v1"], False, None)
+    assert page(sort="rating") == (["v10", "v1", "v2"], False, None)  # nulls last
+    assert page(sort="rating", reverse=True) == (["v1", "v10", "v2"], False, None)
+    assert page(sort="released", reverse=True) == (["v10", "v2", "v1"], False, None)  # ties by id, reversed too
+    assert page(sort="title", results=2) == (["v1", "v2"], True, None)
+    assert page(sort="title", results=2, page=2, count=True) == (["v10"], False, 3)
+    assert page(filters=["lang", "=", "en"], results=0, count=True) == ([], True, 2)
+
+    response = run_query(VNS, QueryRequest(fields="title, developers.name", results=1), "/vn")
+    assert response.results == [{"id": "v1", "title": "Alpha", "developers": [{"name": "Studio One"}]}]
+    with pytest.raises(LocalQueryError):
+        run_query(VNS, QueryRequest(fields="votecount"), "/vn")
+    with pytest.raises(LocalQueryError):
+        run_query(VNS, QueryRequest(sort="searchrank"), "/vn")
+
+
+@pytest.mark.asyncio
+async def test_query_local_from_mirror_without_network(fake_api, tmp_path):
+    def no_network(call):
+        raise AssertionError("query_local must not send requests")
+
+    fake_api(no_network)
+    with LocalMirror(str(tmp_path / "vndb.sqlite")) as mirror:
+        mirror.store("/vn", ("id", "title", "languages", "rating"), VNS)
+        async with VNDB(rate_limit_requests=None, mirror=mirror) as client:
+            response = await client.vn.query_local(
+                QueryRequest(filters=["lang", "=", "en"], fields="title, rating", sort="rating", reverse=True)
+            )
+            assert [(vn.id, vn.title, vn.rating) for vn in response.results] == [("v1", "Alpha", 80.5), ("v10", "Gamma Alpha", 70.0)]
+            raw = await client.vn.query_local(QueryRequest(filters=["id", "=", "v2"], fields="title"), raw=True)
+            assert raw.results == [{"id": "v2", "title": "Beta"}]
+            with pytest.raises(LocalQueryError):
+                await client.vn.query_local(QueryRequest(filters=["olang", "=", "ja"]))
+
+    async with VNDB(rate_limit_requests=None) as client:
+        with pytest.raises(LocalQueryError):
+            await client.vn.query_local(QueryRequest())
+
+
+@pytest.mark.asyncio
+async def test_query_local_hands_out_copies_of_cached_entities():
+    async with VNDB(rate_limit_requests=None, entity_cache=True) as client:
+        client.entity_cache.store_many("/vn", ("id", "title", "aliases"), [dict(vn) for vn in VNS])
+        query = QueryRequest(filters=["id", "=", "v2"], fields="title, aliases")
+        first = await client.vn.query_local(query, raw=True)
+        first.results[0]["aliases"].append("changed")
+        first.results[0]["title"] = "changed"
+        assert (await client.vn.query_local(query, raw=True)).results == [{"id": "v2", "title": "Beta", "aliases": ["B"]}]
+
+
+@pytest.mark.asyncio
+async def test_query_local_scans_the_mirror_off_the_loop_with_the_loaded_schema(monkeypatch):
+    scanned_on = []
+    schemas = []
+    run = veedb.client.run_query
+
+    def spy(items, query_options, endpoint, schema=None):
+        scanned_on.append(threading.get_ident())
+        schemas.append(schema)
+        return run(items, query_options, endpoint, schema)
+
+    monkeypatch.setattr(veedb.client, "run_query", spy)
+    schema = {"api_fields": {"/vn": {"id": None, "title": None}}}
+    with LocalMirror(":memory:") as mirror:
+        mirror.store("/vn", ("id", "title"), VNS)
+        async with VNDB(rate_limit_requests=None, mirror=mirror) as client:
+            query = QueryRequest(filters=["id", "=", "v1"], fields="title")
+            assert (await client.vn.query_local(query, raw=True)).results == [{"id": "v1", "title": "Alpha"}]
+            client._schema_cache_instance._remember(schema, age=0.0)
+            await client.vn.query_local(query)
+    assert threading.get_ident() not in scanned_on
+    assert schemas == [None, schema]  # the schema is used once loaded, never loaded for this
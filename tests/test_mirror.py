@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite entity mirror.
+"""
+
+import time
+
+import pytest
+
+from veedb import VNDB, LocalMirror, QueryRequest
+from veedb.fields import parse_fields, selection_tree
+
+DB = {f"v{n}": {"id": f"v{n}", "title": f"Title {n}", "rating": 50 + n} for n in range(1, 8)}
+
+
+def _serve(db):
+    def matches(item, filters):
+        if not filters:
+            return True
+        if filters[0] in ("and", "or"):
+            parts = [matches(item, part) for part in filters[1:]]
+            return all(parts) if filters[0] == "and" else any(parts)
+        name, op, value = filters
+        number, other = int(item["id"][1:]), int(value[1:])
+        return {"=": number == other, ">": number > other, "<": number < other}[op]
+
+    def handle(call):
+        json_payload = call.payload
+        tree = selection_tree(parse_fields(json_payload["fields"]))
+        tree["id"] = None
+        found = sorted((item for item in db.values() if matches(item, json_payload["filters"])),
+                       key=lambda item: int(item["id"][1:]))
+        results = found[:json_payload.get("results", 10)]
+        return {"results": [{key: item[key] for key in tree if key in item} for item in results],
+                "more": len(found) > len(results)}
+
+    return handle
+
+
+@pytest.mark.asyncio
+async def test_restarted_client_warms_from_disk(fake_api, tmp_path):
+    api = fake_api(_serve(DB))
+    path = str(tmp_path / "vndb.sqlite")
+    async with VNDB(rate_limit_requests=None, mirror=path) as client:
+        await client.vn.get_many(["v1", "v2"], fields="title")
+        await client.vn.get_many(["v1"], fields="rating")
+        assert len(api.calls) == 2
+
+    async with VNDB(rate_limit_requests=None, mirror=path) as client:
+        vns = await client.vn.get_many(["v1", "v2"], fields="title")
+        vn = await client.vn.load("v1", fields="title, rating")
+    assert len(api.calls) == 2
+    assert (vns["v2"].title, vn.title, vn.rating) == ("Title 2", "Title 1", 51)
+
+
+def test_store_merges_fields_and_persists(tmp_path):
+    path = str(tmp_path / "vndb.sqlite")
+    with LocalMirror(path) as mirror:
+        mirror.store("/vn", ("id", "title"), [{"id": "v1", "title": "A"}, {"id": "v10", "title": "B"}])
+        mirror.store("/vn", ("id", "rating"), [{"id": "v1", "rating": 10}])
+    with LocalMirror(path) as mirror:
+        data, fetched = mirror.read("/vn", "v1")
+        assert data == {"id": "v1", "title": "A", "rating": 10}
+        assert set(fetched) == {"id", "title", "rating"}
+        assert mirror.count("/vn") == 2
+        assert mirror.last_id("/vn") == "v10"  # numeric, not lexicographic, order
+        assert mirror.read("/vn", "v2") is None
+
+
+@pytest.mark.asyncio
+async def test_sync_refreshes_stale_rows_and_adds_new_ones(fake_api):
+    db = {key: dict(value) for key, value in DB.items() if key != "v7"}
+    api = fake_api(_serve(db))
+    mirror = LocalMirror(":memory:")
+    old = time.time() - 7200
+    mirror.write_many("/vn", [
+        ("v1", {"id": "v1", "title": "Stale"}, {"id": old, "title": old}),
+        ("v2", {"id": "v2", "title": "Title 2"}, {"id": time.time(), "title": time.time()}),
+        ("v3", {"id": "v3", "title": "Deleted"}, {"id": old, "title": old}),
+    ])
+    del db["v3"]
+
+    async with VNDB(rate_limit_requests=None) as client:
+        report = await mirror.sync(client.vn, fields="title", max_age=3600)
+        assert report == {"refreshed": 1, "removed": 1, "added": 3}
+        assert api.payloads[0]["filters"] == ["or", ["id", "=", "v1"], ["id", "=", "v3"]]
+        assert api.payloads[1]["filters"] == []  # no scan has completed yet: a full pass
+        assert mirror.sync_cursor("/vn") == "v6"
+        assert mirror.read("/vn", "v1")[0]["title"] == "Title 1"
+        assert mirror.read("/vn", "v3") is None
+        assert mirror.last_id("/vn") == "v6"
+
+        db["v7"] = dict(DB["v7"])
+        count = len(api.calls)
+        assert await mirror.sync(client.vn, fields="title", max_age=3600) == {"refreshed": 0, "removed": 0, "added": 1}
+        assert [r["filters"] for r in api.payloads[count:]] == [["id", ">", "v6"]]
+    mirror.close()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_deletes_from_mirror(fake_api):
+    fake_api(_serve(DB))
+    mirror = LocalMirror(":memory:")
+    async with VNDB(rate_limit_requests=None, mirror=mirror) as client:
+        await client.vn.get_many(["v1", "v2"], fields="title")
+        assert mirror.count("/vn") == 2
+        client.entity_cache.invalidate("/vn", "v1")
+        assert mirror.count("/vn") == 1
+    mirror.close()  # not owned by the client
+
+
+@pytest.mark.asyncio
+async def test_sync_finds_entities_below_ids_stored_by_lookups(fake_api):
+    api = fake_api(_serve(DB))
+    with LocalMirror(":memory:") as mirror:
+        async with VNDB(rate_limit_requests=None, mirror=mirror) as client:
+            await client.vn.get_many(["v1", "v6"], fields="title")
+            assert mirror.last_id("/vn") == "v6" and mirror.sync_cursor("/vn") is None
+
+            recent = ["id", ">", "v4"]
+            assert await mirror.sync(client.vn, fields="title", filters=recent) == {"refreshed": 0, "removed": 0, "added": 2}
+            assert mirror.count("/vn") == 4 and mirror.sync_cursor("/vn", recent) == "v7"
+            # A cursor is kept per filter: the unfiltered scan still starts from the beginning.
+            assert await mirror.sync(client.vn, fields="title") == {"refreshed": 0, "removed": 0, "added": 3}
+            assert mirror.count("/vn") == 7
+            assert api.payloads[-1]["filters"] == []
+
+            count = len(api.calls)
+            assert await mirror.sync(client.vn, fields="title") == {"refreshed": 0, "removed": 0, "added": 0}
+            assert [p["filters"] for p in api.payloads[count:]] == [["id", ">", "v7"]]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent page fan-out in `query_all_pages`.
+"""
+
+import asyncio
+
+import orjson
+import pytest
+
+from veedb import VNDB, QueryRequest, RateLimiter
+
+
+def _paged(total, per_page=10, extra_pages=0):
+    """Fake /vn endpoint with `total` items; `extra_pages` appear after page 1 was counted."""
+    async def handle(call):
+        page = call.payload["page"]
+        # Later pages answer sooner, so ordering cannot come from completion order.
+        await asyncio.sleep(0.001 * (20 - page % 20))
+        available = total + (extra_pages * per_page if page > 1 else 0)
+        start = (page - 1) * per_page
+        ids = [f"v{n}" for n in range(start + 1, min(start + per_page, available) + 1)]
+        data = {"results": [{"id": vn_id} for vn_id in ids], "more": start + per_page < available}
+        if call.payload.get("count"):
+            data["count"] = total
+        return data
+
+    return handle
+
+
+def _pages(api):
+    return [(payload["page"], payload.get("count")) for payload in api.payloads]
+
+
+@pytest.fixture
+async def client():
+    client = VNDB(rate_limit_requests=None)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_keeps_order(fake_api, client):
+    api = fake_api(_paged(total=95))
+    results = await client.vn.query_all_pages(QueryRequest(results=10), concurrency=4)
+    assert [vn.id for vn in results] == [f"v{n}" for n in range(1, 96)]
+    assert _pages(api)[0] == (1, True)
+    assert sorted(page for page, _ in _pages(api)) == list(range(1, 11))
+    assert 1 < api.peak <= 4
+
+
+@pytest.mark.asyncio
+async def test_fan_out_matches_serial(fake_api, client):
+    fake_api(_paged(total=42))
+    serial = await client.vn.query_all_pages(QueryRequest(results=5), raw=True)
+    concurrent = await client.vn.query_all_pages(QueryRequest(results=5), raw=True, concurrency=3)
+    assert concurrent == serial
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_max_pages(fake_api, client):
+    api = fake_api(_paged(total=100))
+    results = await client.vn.query_all_pages(QueryRequest(results=10), max_pages=3, concurrency=8)
+    assert len(results) == 30
+    assert sorted(page for page, _ in _pages(api)) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_continues_when_data_grew(fake_api, client):
+    fake_api(_paged(total=30, extra_pages=2))
+    results = await client.vn.query_all_pages(QueryRequest(results=10), concurrency=4)
+    assert len(results) == 50
+
+
+@pytest.mark.asyncio
+async def test_fan_out_raw_bytes(fake_api, client):
+    fake_api(_paged(total=25))
+    bodies = await client.vn.query_all_pages(QueryRequest(results=10), raw="bytes", concurrency=2)
+    assert [len(orjson.loads(body)["results"]) for body in bodies] == [10, 10, 5]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_rate_limiter(fake_api):
+    api = fake_api(_paged(total=200))
+    client = VNDB(rate_limiter=RateLimiter(requests=None, max_concurrency=2))
+    await client.vn.query_all_pages(QueryRequest(results=10), concurrency=8)
+    await client.close()
+    assert api.peak <= 2
+
+
+@pytest.mark.asyncio
+async def test_fan_out_ulist(fake_api, client):
+    fake_api(_paged(total=23))
+    results = await client.ulist.query_all_pages("u1", QueryRequest(results=10), concurrency=3)
+    assert [item.id for item in results] == [f"v{n}" for n in range(1, 24)]
+
+
+def _keyset(ids, per_page=10, grow=False):
+    """Fake endpoint that sorts by numeric id and understands an id cursor predicate."""
+    requests = 0
+
+    def matches(filters, number):
+        if not filters:
+            return True
+        if filters[0] == "and":
+            return all(matches(part, number) for part in filters[1:])
+        if filters[0] == "id":
+            cursor = int(filters[2][1:])
+            return number > cursor if filters[1] == ">" else number < cursor
+        return True  # user filters are not evaluated here
+
+    def handle(call):
+        nonlocal requests
+        requests += 1
+        payload = call.payload
+        assert payload["sort"] == "id" and payload["page"] == 1
+        selected = sorted((n for n in ids if matches(payload["filters"], n)), reverse=payload["reverse"])
+        page = selected[:per_page]
+        data = {"results": [{"id": f"v{n}", "title": f"T{n}"} for n in page], "more": len(selected) > per_page}
+        if grow and requests == 1:
+            # Rows are added while we crawl: one behind the cursor, one ahead of it.
+            ids.insert(0, 0)
+            ids.append(99)
+        return data
+
+    return handle
+
+
+@pytest.mark.asyncio
+async def test_keyset_scan(fake_api, client):
+    ids = list(range(1, 36, 2)) + list(range(2, 30, 2))
+    api = fake_api(_keyset(ids, grow=True))
+    results = await client.vn.query_all_pages(
+        QueryRequest(filters=["lang", "=", "en"], fields="title"), keyset=True
+    )
+    numbers = [int(vn.id[1:]) for vn in results]
+    assert numbers == sorted(set(numbers))  # never skipped back or duplicated
+    assert numbers == sorted(n for n in ids if n > 0)  # nothing shifts onto or off the pages
+    assert numbers[-1] == 99
+    assert api.payloads[0]["filters"] == ["lang", "=", "en"]
+    assert api.payloads[1]["filters"] == ["and", ["lang", "=", "en"], ["id", ">", "v10"]]
+    assert api.payloads[0]["fields"] == "id, title"
+
+
+@pytest.mark.asyncio
+async def test_keyset_paginated_reverse_and_bytes(fake_api, client):
+    fake_api(_keyset(list(range(1, 26))))
+    pages = [page async for page in client.vn.query_paginated(QueryRequest(reverse=True), raw="bytes", keyset=True)]
+    ids = [item["id"] for page in pages for item in orjson.loads(page)["results"]]
+    assert ids == [f"v{n}" for n in range(25, 0, -1)]
+
+
+@pytest.mark.asyncio
+async def test_keyset_max_pages_and_invalid_options(fake_api, client):
+    fake_api(_keyset(list(range(1, 100))))
+    assert len(await client.vn.query_all_pages(QueryRequest(), max_pages=2, keyset=True)) == 20
+    with pytest.raises(ValueError):
+        await client.vn.query_all_pages(QueryRequest(), keyset=True, concurrency=2)
+    with pytest.raises(ValueError):
+        await client.vn.query_all_pages(QueryRequest(filters="abc"), keyset=True)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the client-side rate limiter.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from veedb import VNDB, QueryRequest, RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_burst_then_paced():
+    """The bucket lets `burst` requests through at once and paces the rest."""
+    limiter = RateLimiter(requests=5, window=0.5, burst=2, max_concurrency=None)
+    # (5 - 2) tokens per 0.5s -> one token every ~0.167s
+    start = time.monotonic()
+    for _ in range(4):
+        async with limiter:
+            pass
+    elapsed = time.monotonic() - start
+    assert elapsed >= 0.3
+    assert limiter.fill_level < 1.0
+
+
+@pytest.mark.asyncio
+async def test_fill_level_refills():
+    limiter = RateLimiter(requests=100, window=1.0, burst=4, max_concurrency=None)
+    assert limiter.fill_level == pytest.approx(1.0)
+    for _ in range(4):
+        await limiter.acquire()
+        limiter.release()
+    assert limiter.tokens < 1.0
+    await asyncio.sleep(0.05)
+    assert limiter.tokens > 1.0
+
+
+def test_fill_level_stays_in_range_while_paused():
+    limiter = RateLimiter(requests=100, window=1.0, burst=4, max_concurrency=None)
+    limiter.pause(5.0)
+    assert limiter.tokens < 0
+    assert limiter.fill_level == 0.0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap():
+    limiter = RateLimiter(requests=None, max_concurrency=2)
+    peak = 0
+
+    async def worker():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(worker() for _ in range(10)))
+    assert peak == 2
+    assert limiter.in_flight == 0
+    assert limiter.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_pacing():
+    limiter = RateLimiter(requests=None, max_concurrency=None)
+    assert not limiter.enabled
+    assert limiter.fill_level == 1.0
+    for _ in range(100):
+        async with limiter:
+            pass
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        RateLimiter(requests=0)
+    with pytest.raises(ValueError):
+        RateLimiter(window=0)
+    with pytest.raises(ValueError):
+        RateLimiter(max_concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_client_requests_go_through_limiter(fake_api):
+    """Every call path on the client must pass through the shared limiter."""
+    limiter = RateLimiter(requests=None, max_concurrency=1)
+    seen = []
+
+    def serve(call):
+        seen.append(limiter.in_flight)
+        if call.url.endswith("/stats"):
+            return {"chars": 1, "producers": 1, "releases": 1, "staff": 1, "tags": 1, "traits": 1, "vn": 1}
+        if call.url.endswith("/schema"):
+            return {"api_fields": {}}
+        return {"results": [{"id": "v1"}], "more": False}
+
+    fake_api(serve)
+    client = VNDB(rate_limiter=limiter)
+    assert client.rate_limiter is limiter
+
+    await client.vn.query(QueryRequest(fields="id"))
+    await client.get_stats()
+    await client._schema_cache_instance._download_schema(client)
+    await client.close()
+
+    assert seen == [1, 1, 1]
+    assert limiter.in_flight == 0
+
+
+def test_client_builds_limiter_from_arguments():
+    client = VNDB(rate_limit_requests=50, rate_limit_window=60, max_concurrent_requests=3)
+    assert client.rate_limiter.requests == 50
+    assert client.rate_limiter.window == 60
+    assert client.rate_limiter.max_concurrency == 3
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the raw (dict / undecoded bytes) result modes of the query methods.
+"""
+
+import orjson
+import pytest
+
+from veedb import VNDB, QueryRequest
+from veedb.apitypes.entities import VN
+from veedb.client import _page_has_more
+from veedb.exceptions import NotFoundError
+
+PAGES = [
+    {"results": [{"id": "v1", "title": "One"}, {"id": "v2", "title": "Two"}], "more": True},
+    {"results": [{"id": "v3", "title": 'Three "more": false'}], "more": False},
+]
+
+
+@pytest.fixture
+def api(fake_api):
+    return fake_api(lambda call: PAGES[call.payload["page"] - 1])
+
+
+@pytest.fixture
+async def client():
+    client = VNDB(rate_limit_requests=None)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_query_modes(api, client):
+    query = QueryRequest(fields="id, title")
+    typed = await client.vn.query(query)
+    assert isinstance(typed.results[0], VN)
+
+    dicts = await client.vn.query(query, raw=True)
+    assert dicts.results == PAGES[0]["results"] and dicts.more is True
+
+    body = await client.vn.query(query, raw="bytes")
+    assert isinstance(body, bytes) and orjson.loads(body) == PAGES[0]
+    assert [call.raw for call in api.calls] == [False, False, True]
+
+
+@pytest.mark.asyncio
+async def test_query_all_pages_raw(api, client):
+    query = QueryRequest(fields="id, title")
+    assert await client.vn.query_all_pages(query, raw=True) == PAGES[0]["results"] + PAGES[1]["results"]
+
+    bodies = await client.vn.query_all_pages(query, raw="bytes")
+    assert [orjson.loads(body) for body in bodies] == PAGES
+
+
+@pytest.mark.asyncio
+async def test_query_paginated_raw(api, client):
+    pages = [page async for page in client.vn.query_paginated(QueryRequest(), raw="bytes")]
+    assert len(pages) == 2 and all(isinstance(page, bytes) for page in pages)
+
+
+@pytest.mark.asyncio
+async def test_ulist_raw(api, client):
+    pages = [page async for page in client.ulist.query_paginated("u1", QueryRequest(), raw=True)]
+    assert [item["id"] for page in pages for item in page.results] == ["v1", "v2", "v3"]
+    assert api.payloads[0]["user"] == "u1"
+
+
+@pytest.mark.asyncio
+async def test_invalid_raw_mode(api, client):
+    with pytest.raises(ValueError):
+        await client.vn.query(QueryRequest(), raw="dicts")
+
+
+@pytest.mark.asyncio
+async def test_raw_bytes_errors_are_still_raised(fake_api, client):
+    def missing(call):
+        raise NotFoundError("No such endpoint.", 404)
+
+    fake_api(missing)
+    with pytest.raises(NotFoundError):
+        await client.vn.query(QueryRequest(), raw="bytes")
+
+
+@pytest.mark.parametrize("body, expected", [
+    (b'{"results":[],"more":true}', True),
+    (b'{"more":false,"results":[{"id":"v1"}]}', False),
+    (b'{"results":[{"title":"\\"more\\":true"}],"more":false}', False),
+    (b'{"results": [], "more" : true, "count": 3}', True),
+    (b'{"results":[]}', False),
+])
+def test_page_has_more(body, expected):
+    assert _page_has_more(body) is expected
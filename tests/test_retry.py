@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Tests for the retry policy and the error classification in `_fetch_api`.
+"""
+
+import random
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from veedb import VNDB, QueryRequest, RetryPolicy
+from veedb.exceptions import (
+    InvalidRequestError,
+    NetworkError,
+    RateLimitError,
+    RequestTimeoutError,
+    ServerError,
+)
+from veedb.methods.fetch import _fetch_api, _parse_retry_after
+
+
+def _flaky(errors, result="ok"):
+    """Returns a `send` callable raising `errors` in turn, then returning `result`."""
+    calls = []
+
+    async def send():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return send, calls
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr("veedb.methods.retry.asyncio.sleep", fake_sleep)
+    return delays
+
+
+@pytest.mark.asyncio
+async def test_retries_until_success(no_sleep):
+    policy = RetryPolicy(max_attempts=4, jitter="none", backoff_base=0.1)
+    send, calls = _flaky([ServerError("boom", 503), RequestTimeoutError(), NetworkError()])
+
+    assert await policy.run("POST", "https://api.vndb.org/kana/vn", send) == "ok"
+    assert len(calls) == 4
+    assert no_sleep == [pytest.approx(0.1), pytest.approx(0.2), pytest.approx(0.4)]
+    assert policy.retries == 3
+    assert policy.retries_by_reason == {"503": 1, "timeout": 1, "connection": 1}
+    assert policy.amplification == 4.0
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts(no_sleep):
+    policy = RetryPolicy(max_attempts=2)
+    send, calls = _flaky([ServerError("boom", 502)] * 5)
+
+    with pytest.raises(ServerError):
+        await policy.run("GET", "https://api.vndb.org/kana/stats", send)
+    assert len(calls) == 2
+    assert policy.gave_up == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried(no_sleep):
+    policy = RetryPolicy()
+    send, calls = _flaky([InvalidRequestError("bad filter")])
+
+    with pytest.raises(InvalidRequestError):
+        await policy.run("POST", "https://api.vndb.org/kana/vn", send)
+    assert len(calls) == 1
+    assert policy.retries == 0
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_respected(no_sleep):
+    policy = RetryPolicy(jitter="none", backoff_base=0.1)
+    send, _ = _flaky([RateLimitError("slow down", retry_after=7.0)])
+
+    await policy.run("POST", "https://api.vndb.org/kana/vn", send)
+    assert no_sleep == [7.0]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_beyond_limit_gives_up(no_sleep):
+    policy = RetryPolicy(max_retry_after=5.0)
+    send, calls = _flaky([RateLimitError("slow down", retry_after=60.0)])
+
+    with pytest.raises(RateLimitError):
+        await policy.run("POST", "https://api.vndb.org/kana/vn", send)
+    assert len(calls) == 1
+
+
+def test_idempotency_rules():
+    policy = RetryPolicy()
+    base = "https://api.vndb.org/kana"
+    assert policy.is_idempotent("GET", f"{base}/stats")
+    assert policy.is_idempotent("POST", f"{base}/release")
+    assert policy.is_idempotent("PATCH", f"{base}/ulist/v17")
+    assert policy.is_idempotent("DELETE", f"{base}/rlist/r12")
+    assert not policy.is_idempotent("PATCH", f"{base}/vn/v17")
+    assert not policy.is_idempotent("PUT", f"{base}/ulist/v17")
+
+    strict = RetryPolicy(idempotent_requests={"GET": None})
+    assert not strict.is_idempotent("POST", f"{base}/vn")
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_requests_are_not_retried(no_sleep):
+    policy = RetryPolicy(idempotent_requests={"GET": None})
+    send, calls = _flaky([ServerError("boom", 503)])
+
+    with pytest.raises(ServerError):
+        await policy.run("POST", "https://api.vndb.org/kana/vn", send)
+    assert len(calls) == 1
+
+
+def test_jitter_bounds():
+    policy = RetryPolicy(backoff_base=1.0, backoff_factor=2.0, backoff_max=3.0, rng=random.Random(1))
+    for retry_number in range(1, 6):
+        assert 0.0 <= policy.backoff(retry_number) <= 3.0
+    equal = RetryPolicy(backoff_base=1.0, jitter="equal", rng=random.Random(1))
+    assert 0.5 <= equal.backoff(1) <= 1.0
+
+
+def test_parse_retry_after():
+    assert _parse_retry_after("12") == 12.0
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("not a date") is None
+    assert _parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_fetch_api_reports_retry_after():
+    async def throttled(request):
+        return web.json_response({"detail": "Throttled"}, status=429, headers={"Retry-After": "3"})
+
+    app = web.Application()
+    app.router.add_get("/stats", throttled)
+    async with TestServer(app) as server:
+        async with aiohttp.ClientSession() as session:
+            with pytest.raises(RateLimitError) as info:
+                await _fetch_api(session, "GET", str(server.make_url("/stats")))
+    assert info.value.retry_after == 3.0
+
+
+@pytest.mark.asyncio
+async def test_client_retries_through_policy(fake_api, no_sleep):
+    def serve(call):
+        if len(api.calls) == 1:
+            raise RateLimitError("slow down", retry_after=0.5)
+        return {"results": [{"id": "v1"}], "more": False}
+
+    api = fake_api(serve)
+    client = VNDB(rate_limit_requests=None)
+    response = await client.vn.query(QueryRequest(fields="id"))
+    await client.close()
+
+    assert [vn.id for vn in response.results] == ["v1"]
+    assert len(api.calls) == 2
+    assert client.retry_policy.retries == 1
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-flight check of `fields` selections against the schema.
+"""
+
+from pathlib import Path
+
+import orjson
+import pytest
+
+from veedb import VNDB, QueryRequest
+from veedb.exceptions import InvalidRequestError, TooMuchDataSelectedError
+from veedb.selection import ENTITY_FANOUT, OBJECT_FANOUT, check_selection
+from veedb.schema_validator import SchemaCache
+
+SCHEMA = orjson.loads((Path(__file__).parent.parent / "assets" / "schema.example.json").read_bytes())
+
+
+@pytest.mark.parametrize("fields", [
+    "id, title, rating",
+    "title, image{url, dims}",
+    "developers.name, developers{id, original}",
+    "relations{relation, title}, relations.relations.title",
+    "screenshots.release{title, platforms}",
+    "va{character.name, staff{name, lang}}",
+])
+def test_valid_selections(fields):
+    report = check_selection(SCHEMA, "/vn", fields)
+    assert report["valid"], report["errors"]
+    assert report["errors"] == [] and report["weight"] > 0
+
+
+def test_inherited_fields_of_other_endpoints():
+    assert check_selection(SCHEMA, "/ulist", "vote, vn.title, releases{list_status, title}")["valid"]
+    assert check_selection(SCHEMA, "/release", "vns{rtype, title}")["valid"]
+
+
+def test_invalid_selections():
+    report = check_selection(SCHEMA, "/vn", "titel, developers.nmae")
+    assert report["errors"] == [
+        "Unknown field 'developers.nmae' for endpoint '/vn'.",
+        "Unknown field 'titel' for endpoint '/vn'.",
+    ]
+    assert {"title", "developers.name"} <= set(report["suggestions"])
+
+    assert check_selection(SCHEMA, "/vn", "image")["errors"][0].startswith(
+        "Field 'image' of endpoint '/vn' is an object; select its subfields"
+    )
+    assert check_selection(SCHEMA, "/vn", "title.length")["errors"] == [
+        "Field 'title' of endpoint '/vn' has no subfields (selected 'title.length')."
+    ]
+    # Leaves under a bad parent are reported once, for the parent.
+    assert check_selection(SCHEMA, "/release", "id, editions{eid, name}")["errors"] == [
+        "Unknown field 'editions' for endpoint '/release'."
+    ]
+    assert len(check_selection(SCHEMA, "/vn", "title{a, b}")["errors"]) == 1
+    assert not check_selection(SCHEMA, "/vn", "title{")["valid"]
+    assert check_selection(SCHEMA, "/nope", "id")["errors"] == ["Unknown endpoint '/nope'."]
+
+
+def test_weights():
+    def weight(fields):
+        return check_selection(SCHEMA, "/vn", fields)["weight"]
+
+    assert weight("id, title") == 2
+    assert weight("image{url, dims}") == 2 * OBJECT_FANOUT
+    assert weight("tags.name") == ENTITY_FANOUT
+    assert weight("relations.relations.title") == ENTITY_FANOUT ** 2
+    assert weight("title") < weight("tags{name, category}") < weight("relations.tags.name")
+
+
+@pytest.mark.asyncio
+async def test_preflight_rejects_selections_locally(fake_api, tmp_path):
+    api = fake_api(lambda call: {"results": [], "more": False})
+    SchemaCache(cache_dir=str(tmp_path)).save_schema(SCHEMA)
+    async with VNDB(rate_limit_requests=None, schema_cache_dir=str(tmp_path),
+                    preflight_fields=True, max_response_weight=5000) as client:
+        await client.vn.query(QueryRequest(fields="title, image.url"))
+        with pytest.raises(InvalidRequestError, match="Did you mean: title"):
+            await client.vn.query(QueryRequest(fields="titel"))
+        with pytest.raises(TooMuchDataSelectedError):
+            await client.vn.query(QueryRequest(fields="relations.relations{title, description}", results=100))
+        await client.vn.query(QueryRequest(fields="relations.relations{title, description}", results=10))
+        assert (await client.vn.validate_fields("title, image"))["valid"] is False
+    assert len(api.calls) == 2
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing identical in-flight requests.
+"""
+
+import asyncio
+
+import pytest
+
+from veedb import VNDB, QueryRequest, RetryPolicy, SingleFlight
+from veedb.exceptions import NotFoundError
+
+
+def _serve(error=None):
+    async def handle(call):
+        await asyncio.sleep(0.01)
+        if error is not None:
+            raise error
+        if call.url.endswith("/stats"):
+            return {"chars": 1, "producers": 1, "releases": 1, "staff": 1, "tags": 1, "traits": 1, "vn": 1}
+        return {"results": [{"id": "v1", "aliases": ["a"]}], "more": False}
+
+    return handle
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_call(fake_api):
+    api = fake_api(_serve())
+    async with VNDB(rate_limit_requests=None) as client:
+        queries = [QueryRequest(filters=["search", "=", "x"], fields="id, aliases") for _ in range(50)]
+        responses = await asyncio.gather(*(client.vn.query(query) for query in queries))
+        stats = await asyncio.gather(*(client.get_stats() for _ in range(10)))
+
+    assert len(api.calls) == 2
+    assert client.singleflight.stats() == {"calls": 60, "saved": 58, "in_flight": 0}
+    assert all(r.results[0].id == "v1" for r in responses)
+    # Every caller gets its own objects.
+    responses[0].results[0].aliases.append("b")
+    assert responses[1].results[0].aliases == ["a"]
+    assert stats[0] == stats[1] and stats[0] is not stats[1]
+
+
+@pytest.mark.asyncio
+async def test_raw_callers_get_their_own_dicts(fake_api):
+    api = fake_api(_serve())
+    async with VNDB(rate_limit_requests=None) as client:
+        query = QueryRequest(fields="id, aliases")
+        responses = await asyncio.gather(*(client.vn.query(query, raw=True) for _ in range(3)))
+    assert len(api.calls) == 1
+    responses[0].results[0]["aliases"].append("b")
+    responses[1].results[0]["title"] = "changed"
+    assert responses[2].results == [{"id": "v1", "aliases": ["a"]}]
+
+
+@pytest.mark.asyncio
+async def test_key_distinguishes_payload_token_and_method(fake_api):
+    api = fake_api(_serve())
+    async with VNDB(rate_limit_requests=None) as client:
+        other = VNDB(rate_limit_requests=None, api_token="secret", coalesce_requests=client.singleflight)
+        await asyncio.gather(
+            client.vn.query(QueryRequest(fields="id", sort="id")),
+            client.vn.query(QueryRequest(fields="id", sort="rating")),
+            other.vn.query(QueryRequest(fields="id", sort="id")),
+            client.release.query(QueryRequest(fields="id", sort="id")),
+            client.vn.query(QueryRequest(fields="id", sort="id"), raw="bytes"),
+        )
+        await other.close()
+    assert len(api.calls) == 5
+
+    flight = SingleFlight()
+    assert flight.key("POST", "u", {"b": 1, "a": [1, 2]}) == flight.key("POST", "u", {"a": [1, 2], "b": 1})
+    assert flight.key("PATCH", "u", {"a": 1}) is None
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared(fake_api):
+    api = fake_api(_serve(error=NotFoundError("gone", 404)))
+    async with VNDB(rate_limit_requests=None, retry_policy=RetryPolicy(max_attempts=1)) as client:
+        results = await asyncio.gather(*(client.get_stats() for _ in range(3)), return_exceptions=True)
+    assert len(api.calls) == 1
+    assert all(isinstance(result, NotFoundError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_request_for_others(fake_api):
+    api = fake_api(_serve())
+    async with VNDB(rate_limit_requests=None) as client:
+        first = asyncio.ensure_future(client.get_stats())
+        second = asyncio.ensure_future(client.get_stats())
+        await asyncio.sleep(0.001)
+        first.cancel()
+        assert (await second).vn == 1
+        assert first.cancelled()
+    assert len(api.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled(fake_api):
+    api = fake_api(_serve())
+    async with VNDB(rate_limit_requests=None, coalesce_requests=False) as client:
+        await asyncio.gather(client.get_stats(), client.get_stats())
+    assert client.singleflight is None and len(api.calls) == 2
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for `ItemStream` and the `aiter_items()` helpers.
+"""
+
+import asyncio
+
+import pytest
+
+from veedb import VNDB, ItemStream, QueryRequest
+from veedb.apitypes.entities import VN
+
+
+def _pages(pages, latency=0.0):
+    async def handle(call):
+        page = call.payload["page"]
+        await asyncio.sleep(latency)
+        start = (page - 1) * 10
+        return {"results": [{"id": f"v{n}"} for n in range(start + 1, start + 11)], "more": page < pages}
+
+    return handle
+
+
+@pytest.fixture
+async def client():
+    client = VNDB(rate_limit_requests=None)
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_yields_every_item_in_order(fake_api, client):
+    fake_api(_pages(pages=4))
+    items = [vn async for vn in client.vn.aiter_items(QueryRequest(results=10), prefetch=2)]
+    assert all(isinstance(vn, VN) for vn in items)
+    assert [vn.id for vn in items] == [f"v{n}" for n in range(1, 41)]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_overlaps_and_is_bounded(fake_api, client):
+    api = fake_api(_pages(pages=10))
+    async with client.vn.aiter_items(QueryRequest(results=10), prefetch=2) as items:
+        first = await items.__anext__()
+        assert first.id == "v1"
+        await asyncio.sleep(0.05)  # consumer is busy; the stream fetches ahead meanwhile
+        # Page 1 is being consumed, two pages are buffered and one more is waiting to be queued.
+        assert items.buffered_pages == 2
+        assert len(api.calls) - api.in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_early_exit_cancels_prefetch(fake_api, client):
+    api = fake_api(_pages(pages=100, latency=0.01))
+    async with client.vn.aiter_items(QueryRequest(results=10), prefetch=3) as items:
+        async for vn in items:
+            if vn.id == "v15":
+                break
+    requested = len(api.calls)
+    await asyncio.sleep(0.05)
+    assert len(api.calls) == requested <= 6
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_the_consumer():
+    async def pages():
+        yield type("Page", (), {"results": [1, 2]})()
+        raise RuntimeError("boom")
+
+    seen = []
+    with pytest.raises(RuntimeError, match="boom"):
+        async for item in ItemStream(pages()):
+            seen.append(item)
+    assert seen == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_ulist_and_raw(fake_api, client):
+    fake_api(_pages(pages=2))
+    items = [item async for item in client.ulist.aiter_items("u1", QueryRequest(results=10), raw=True)]
+    assert [item["id"] for item in items] == [f"v{n}" for n in range(1, 21)]
+    with pytest.raises(ValueError):
+        client.vn.aiter_items(raw="bytes")
+    with pytest.raises(ValueError):
+        ItemStream(None, prefetch=0)